@@ -1,31 +1,82 @@
 from ast import Delete
 from copy import deepcopy
+from datetime import date, timedelta
+from functools import lru_cache, reduce
+from operator import or_
 
 from django import forms
 from django.contrib import admin, messages
-from django.core.exceptions import MultipleObjectsReturned
+from django.core.exceptions import (
+    MultipleObjectsReturned,
+    PermissionDenied,
+    ValidationError,
+)
 from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Concat
 from django.forms import CheckboxSelectMultiple
+from django.http import HttpResponse
 from django.shortcuts import redirect
+from django.template.response import TemplateResponse
 from django.urls import path, reverse
-from django.utils.translation import ngettext
+from django.utils import timezone
+from django.utils.html import format_html
+from django.utils.translation import get_language, ngettext
 
 from .admin_filters import (
     CoachNameFilter,
     LocationFilter,
     LockedCancelledFilter,
     MemberFilter,
+    SeasonFilter,
     WeekIsoFilter,
+    WeekParityFilter,
+)
+from .forms import (
+    ChangeLocationForm,
+    ReplaceCoachForm,
+    SessionAdminForm,
+    ShiftTimeForm,
 )
-from .forms import SessionAdminForm
-from .models import Category, CoachAssignment, Location, Member, Recurrence, Session
+from .models import (
+    CalendarDay,
+    Category,
+    Closure,
+    CoachAssignment,
+    CoachMonthlyLoad,
+    Location,
+    Member,
+    Recurrence,
+    Session,
+    StaffingProposal,
+    WeeklyCoverage,
+)
+from .services import bulk, closures, overlap, staffing, summaries, workload
+from .services.calendar import season_of
 from .services.recurrence import (
     generate_series,
     propagate_coach_assignments,
     propagate_form_fields,
 )
+from .services.search import matching_sessions, name_q
+from .services.session_cards import title_formatter
+from .services.stats import ApproximateCountPaginator, StringAgg
 from .utils import compare_model_instance
 
+
+@lru_cache
+def _session_title(language):
+    """Formateur de titres de la liste des séances, construit une fois par langue."""
+    return title_formatter()
+
+
+def _overlap_warning(overlapping) -> str:
+    """Suffixe du message d'une action en masse (OVERLAP_POLICY="warn")."""
+    if not overlapping:
+        return ""
+    return " Chevauchements : " + ", ".join(s.title_auto for s in overlapping)
+
+
 ### INLINES ###
 
 
@@ -58,14 +109,69 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
     search_fields = ["name", "address"]
+    list_display = ("name", "address", "capacity")
 
 
 @admin.register(Member)
 class MemberAdmin(admin.ModelAdmin):
     form = MemberAdminForm
-    search_fields = ["first_name", "last_name"]
+    search_fields = ["search_name"]
+    change_list_template = "admin/core/member/change_list.html"
     list_filter = [MemberFilter, "qualifications"]
 
+    def get_search_results(self, request, queryset, search_term):
+        # recherche (et autocomplete) insensible aux accents sur search_name
+        if not search_term:
+            return queryset, False
+        return queryset.filter(name_q(search_term)), False
+
+    def get_urls(self):
+        return [
+            path(
+                "workload/",
+                self.admin_site.admin_view(self.workload_view),
+                name="core_member_workload",
+            ),
+            *super().get_urls(),
+        ]
+
+    def workload_view(self, request):
+        # charge des coachs sur une saison (core.services.workload), en CSV
+        # avec ?format=csv
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        current = season_of(timezone.localdate())
+        try:
+            season = int(request.GET.get("season", current))
+        except ValueError:
+            season = current
+        # la saison s'étend sur l'année suivante : bornes de datetime.date
+        if not date.min.year <= season < date.max.year:
+            season = current
+        report = workload.season_workload(season)
+
+        if request.GET.get("format") == "csv":
+            response = HttpResponse(content_type="text/csv; charset=utf-8")
+            response["Content-Disposition"] = (
+                f'attachment; filename="charge-coachs-{season}.csv"'
+            )
+            workload.write_csv(report, response)
+            return response
+
+        seasons = set(
+            CalendarDay.objects.order_by().values_list("season", flat=True).distinct()
+        )
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": f"Charge des coachs — saison {season}-{season + 1}",
+            "season": season,
+            "seasons": sorted(seasons | {current, season}, reverse=True),
+            "rows": report.reset_index().to_dict("records"),
+            "median": workload.median_per_week(report),
+        }
+        return TemplateResponse(request, "admin/core/member/workload.html", context)
+
 
 @admin.register(Recurrence)
 class RecurrenceAdmin(admin.ModelAdmin):
@@ -81,11 +187,56 @@ class RecurrenceAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(Closure)
+class ClosureAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "reason", "start_date", "end_date")
+    list_filter = ["location", "category"]
+    autocomplete_fields = ["location", "category"]
+    date_hierarchy = "start_date"
+    actions = ["apply_closures", "coach_report"]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self._report_cancelled(request, closures.apply_closure(obj))
+
+    def _report_cancelled(self, request, cancelled):
+        self.message_user(
+            request,
+            ngettext(
+                "%d séance couverte a été annulée.",
+                "%d séances couvertes ont été annulées.",
+                cancelled,
+            )
+            % cancelled,
+            messages.SUCCESS,
+        )
+
+    @admin.action(description="Annuler les séances couvertes")
+    def apply_closures(self, request, queryset):
+        self._report_cancelled(
+            request, sum(closures.apply_closure(c) for c in queryset)
+        )
+
+    @admin.action(description="Encadrants concernés")
+    def coach_report(self, request, queryset):
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Encadrants concernés par les fermetures",
+            "reports": [(c, closures.affected_coaches(c)) for c in queryset],
+        }
+        return TemplateResponse(
+            request, "admin/core/closure/coach_report.html", context
+        )
+
+
 @admin.register(Session)
 class SessionAdmin(admin.ModelAdmin):
-    list_display = ("title_auto", "week_iso")
+    list_display = ("title", "week_iso", "coverage", "coach_names")
     list_filter = [
         WeekIsoFilter,
+        SeasonFilter,
+        WeekParityFilter,
         CoachNameFilter,
         LocationFilter,
         "category",
@@ -97,30 +248,226 @@ class SessionAdmin(admin.ModelAdmin):
     exclude = ["recurrence", "created_by", "is_locked"]
     ordering = ["start_at"]
     inlines = [CoachAssignmentInline]
-    actions = ["cancel_session"]
+    actions = [
+        "cancel_session",
+        "cancel_series",
+        "reactivate_sessions",
+        "reactivate_series",
+        "shift_time",
+        "replace_coach",
+        "change_location",
+        "propose_staffing",
+    ]
     list_select_related = ("location", "category")
+    search_fields = ["group"]  # affiche la recherche, servie par l'index plein texte
+    search_help_text = "Groupe, lieu ou notes de la séance"
+    # pas de second COUNT(*) sur la table entière ; estimation sur les grosses tables
+    show_full_result_count = False
+    paginator = ApproximateCountPaginator
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        # sous-requête : pas de liste d'ids, pas de plafond sur les résultats
+        matching = matching_sessions(search_term)
+        if matching is None:
+            return queryset.none(), False
+        return queryset.filter(pk__in=matching), False
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.prefetch_related("assignments__coach").select_related(
-            "category", "location"
+        if request.resolver_match.url_name != "core_session_changelist":
+            return qs
+        # liste : couverture et noms des encadrants confirmés dans la même requête,
+        # en sous-requêtes corrélées (index (session, status)) : le COUNT(*) du
+        # paginator les ignore et reste sans jointure ni GROUP BY
+        confirmed = (
+            CoachAssignment.objects.filter(session=OuterRef("pk"), status="confirmed")
+            .order_by()
+            .values("session")
+        )
+        return qs.annotate(
+            confirmed_cnt=Coalesce(
+                Subquery(confirmed.annotate(n=Count("pk")).values("n")), 0
+            ),
+            coach_names=Subquery(
+                confirmed.annotate(
+                    names=StringAgg(
+                        Concat("coach__first_name", Value(" "), "coach__last_name"),
+                        ", ",
+                    )
+                ).values("names")
+            ),
+        )
+
+    @admin.display(description="Séance", ordering="start_at")
+    def title(self, obj):
+        return _session_title(get_language())(
+            str(obj.category),
+            obj.group,
+            obj.start_at,
+            obj.location.name if obj.location else None,
         )
 
+    @admin.display(description="Encadrement")
+    def coverage(self, obj):
+        text = f"{obj.confirmed_cnt}/{obj.min_coaches}"
+        if obj.confirmed_cnt < obj.min_coaches:
+            return format_html('<strong style="color:#d9534f">{}</strong>', text)
+        return text
+
+    @admin.display(description="Encadrants")
+    def coach_names(self, obj):
+        return obj.coach_names or "—"
+
     ## Change actions
 
     @admin.action(description="Annuler les sessions sélectionnées")
     def cancel_session(self, request, queryset):
-        cancelled = queryset.update(is_cancelled=True)
+        self._set_cancelled(request, queryset, "selection", True)
+
+    @admin.action(
+        description="Annuler les séances sélectionnées et la suite de leurs séries"
+    )
+    def cancel_series(self, request, queryset):
+        self._set_cancelled(request, queryset, "series", True)
+
+    @admin.action(description="Rétablir les séances sélectionnées")
+    def reactivate_sessions(self, request, queryset):
+        self._set_cancelled(request, queryset, "selection", False)
+
+    @admin.action(
+        description="Rétablir les séances sélectionnées et la suite de leurs séries"
+    )
+    def reactivate_series(self, request, queryset):
+        self._set_cancelled(request, queryset, "series", False)
+
+    def _set_cancelled(self, request, queryset, scope, cancelled):
+        try:
+            count, overlapping = bulk.set_cancelled(
+                bulk.scoped(queryset, scope), cancelled
+            )
+        except ValidationError as e:
+            self.message_user(request, " ".join(e.messages), messages.ERROR)
+            return
+        if cancelled:
+            text = ngettext(
+                "%d séance a été annulée.", "%d séances ont été annulées.", count
+            )
+        else:
+            text = ngettext(
+                "%d séance a été rétablie.", "%d séances ont été rétablies.", count
+            )
+        self.message_user(
+            request, text % count + _overlap_warning(overlapping), messages.SUCCESS
+        )
+
+    @admin.action(description="Décaler l'horaire…")
+    def shift_time(self, request, queryset):
+        def apply(qs, data):
+            count, overlapping = bulk.shift_time(qs, data["minutes"])
+            return ngettext(
+                "%d séance a été décalée.", "%d séances ont été décalées.", count
+            ) % count + _overlap_warning(overlapping)
+
+        return self._bulk_action(
+            request, queryset, "shift_time", ShiftTimeForm, "Décaler l'horaire", apply
+        )
+
+    @admin.action(description="Remplacer un encadrant…")
+    def replace_coach(self, request, queryset):
+        def apply(qs, data):
+            moved, merged, overlapping = bulk.replace_coach(
+                qs, data["old_coach"], data["new_coach"]
+            )
+            message = (
+                ngettext(
+                    "%d inscription transférée",
+                    "%d inscriptions transférées",
+                    moved,
+                )
+                % moved
+                + ngettext(
+                    ", %d fusionnée avec celle du remplaçant.",
+                    ", %d fusionnées avec celles du remplaçant.",
+                    merged,
+                )
+                % merged
+            )
+            return message + _overlap_warning(overlapping)
+
+        return self._bulk_action(
+            request,
+            queryset,
+            "replace_coach",
+            ReplaceCoachForm,
+            "Remplacer un encadrant",
+            apply,
+        )
+
+    @admin.action(description="Changer de lieu…")
+    def change_location(self, request, queryset):
+        def apply(qs, data):
+            count = bulk.change_location(qs, data["location"])
+            return (
+                ngettext(
+                    "%d séance a changé de lieu.",
+                    "%d séances ont changé de lieu.",
+                    count,
+                )
+                % count
+            )
+
+        return self._bulk_action(
+            request,
+            queryset,
+            "change_location",
+            ChangeLocationForm,
+            "Changer de lieu",
+            apply,
+        )
+
+    @admin.action(description="Proposer des encadrants (séances sous-encadrées)")
+    def propose_staffing(self, request, queryset):
+        count = staffing.generate_proposals(bulk.scoped(queryset, "selection"))
         self.message_user(
             request,
             ngettext(
-                "%d séance a été annulée.",
-                "%d séances ont été annulées.",
-                cancelled,
+                "%d inscription proposée, à valider.",
+                "%d inscriptions proposées, à valider.",
+                count,
             )
-            % cancelled,
+            % count,
             messages.SUCCESS,
         )
+        return redirect("admin:core_staffingproposal_changelist")
+
+    def _bulk_action(self, request, queryset, action, form_class, title, apply):
+        """
+        Action à page intermédiaire : affiche le formulaire, puis (champ `apply`
+        renvoyé avec les séances sélectionnées) applique l'opération ensembliste.
+        """
+        form = form_class(request.POST if "apply" in request.POST else None)
+        if form.is_bound and form.is_valid():
+            qs = bulk.scoped(queryset, form.cleaned_data["scope"])
+            try:
+                text = apply(qs, form.cleaned_data)
+            except ValidationError as e:
+                self.message_user(request, " ".join(e.messages), messages.ERROR)
+            else:
+                self.message_user(request, text, messages.SUCCESS)
+            return None
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": title,
+            "form": form,
+            "action": action,
+            # pk explicites : couvre aussi « sélectionner tous les résultats »
+            "selected": list(queryset.values_list("pk", flat=True)),
+        }
+        return TemplateResponse(request, "admin/core/session/bulk_action.html", context)
 
     def get_actions(self, request):
         actions = super().get_actions(request)
@@ -143,9 +490,27 @@ class SessionAdmin(admin.ModelAdmin):
         return fields
 
     def save_model(self, request, obj, form, change):
+        # synthèses : clés relevées avant modification, recalculées au commit
+        if change and obj.recurrence_id and "_propagate_following" in request.POST:
+            summaries.touch(
+                Session.objects.filter(recurrence_id=obj.recurrence_id).values_list(
+                    "pk", flat=True
+                )
+            )
+        elif change:
+            summaries.touch([obj.pk])
 
         if "_propagate_following" in request.POST:
-            propagate_form_fields(obj, form.changed_data)
+            try:
+                propagate_form_fields(obj, form.changed_data)
+            except ValidationError as e:
+                # la séance elle-même a passé les contrôles du formulaire
+                self.message_user(
+                    request,
+                    "Modification non propagée aux séances suivantes : "
+                    + " ".join(e.messages),
+                    messages.ERROR,
+                )
         super().save_model(request, obj, form, change)
 
     def save_related(self, request, form, formsets, change):
@@ -171,6 +536,192 @@ class SessionAdmin(admin.ModelAdmin):
             mode, end_date = form._recurrence_request  # type: ignore
             source = form.instance
             generate_series(session=source, mode=mode, end_date=end_date)
+        summaries.touch([form.instance.pk])
+
+        # l'admin peut passer outre : chevauchements signalés, pas refusés
+        session = form.instance
+        for ca in session.assignments.filter(status="confirmed").select_related(
+            "coach"
+        ):
+            for other in overlap.conflicts(ca.coach_id, session):
+                self.message_user(
+                    request,
+                    f"{ca.coach} est aussi inscrit sur « {other} » au même moment.",
+                    messages.WARNING,
+                )
+
+
+@admin.register(StaffingProposal)
+class StaffingProposalAdmin(admin.ModelAdmin):
+    list_display = ("session_title", "coach", "coverage", "cost")
+    list_filter = ["session__category", "session__week_iso"]
+    list_select_related = ("session__category", "session__location", "coach")
+    ordering = ["session__start_at", "cost"]
+    actions = ["apply_proposals"]
+    list_per_page = 200
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        confirmed = (
+            CoachAssignment.objects.filter(
+                session=OuterRef("session"), status="confirmed"
+            )
+            .order_by()
+            .values("session")
+            .annotate(n=Count("pk"))
+            .values("n")
+        )
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(confirmed_cnt=Coalesce(Subquery(confirmed), 0))
+        )
+
+    @admin.display(description="Séance", ordering="session__start_at")
+    def session_title(self, obj):
+        return str(obj.session)
+
+    @admin.display(description="Encadrement actuel")
+    def coverage(self, obj):
+        return f"{obj.confirmed_cnt}/{obj.session.min_coaches}"
+
+    @admin.action(description="Valider les propositions sélectionnées")
+    def apply_proposals(self, request, queryset):
+        count, stale = staffing.apply_proposals(queryset)
+        self.message_user(
+            request,
+            ngettext("%d inscription confirmée.", "%d inscriptions confirmées.", count)
+            % count,
+            messages.SUCCESS,
+        )
+        if stale:
+            self.message_user(
+                request,
+                ngettext(
+                    "%d proposition écartée : la séance est complète, annulée "
+                    "ou passée, ou le coach n'est plus disponible ou éligible.",
+                    "%d propositions écartées : la séance est complète, annulée "
+                    "ou passée, ou le coach n'est plus disponible ou éligible.",
+                    stale,
+                )
+                % stale,
+                messages.WARNING,
+            )
+
+
+class ReadOnlySummaryAdmin(admin.ModelAdmin):
+    """Tables de synthèse : lecture seule, tenues par core.services.summaries."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(WeeklyCoverage)
+class WeeklyCoverageAdmin(ReadOnlySummaryAdmin):
+    list_display = (
+        "week",
+        "category",
+        "location",
+        "sessions",
+        "covered",
+        "coverage_pct",
+        "staffing",
+    )
+    list_filter = ["year_iso", "category", "location"]
+    list_select_related = ("category", "location")
+    ordering = ["year_iso", "week_iso", "category", "location"]
+    change_list_template = "admin/core/weeklycoverage/change_list.html"
+    list_per_page = 200
+    DASHBOARD_WEEKS = 8
+
+    @admin.display(description="Semaine", ordering="week_iso")
+    def week(self, obj):
+        return f"{obj.year_iso}-S{obj.week_iso:02d}"
+
+    @admin.display(description="Au minimum")
+    def coverage_pct(self, obj):
+        return _coverage_html(obj.covered, obj.sessions)
+
+    @admin.display(description="Confirmés / requis")
+    def staffing(self, obj):
+        return f"{obj.confirmed}/{obj.required}"
+
+    def changelist_view(self, request, extra_context=None):
+        # tableau de bord : semaines à venir, totaux lus dans la synthèse
+        # (quelques lignes par semaine, indépendamment du nombre de séances)
+        today = timezone.localdate()
+        weeks = [
+            (today + timedelta(weeks=n)).isocalendar()[:2]
+            for n in range(self.DASHBOARD_WEEKS)
+        ]
+        totals = {
+            (r["year_iso"], r["week_iso"]): r
+            for r in WeeklyCoverage.objects.filter(
+                reduce(or_, (Q(year_iso=y, week_iso=w) for y, w in weeks))
+            )
+            .values("year_iso", "week_iso")
+            .annotate(
+                n_sessions=Sum("sessions"),
+                n_covered=Sum("covered"),
+                n_confirmed=Sum("confirmed"),
+                n_required=Sum("required"),
+            )
+            .order_by()
+        }
+        dashboard = []
+        for year, week in weeks:
+            r = totals.get((year, week), {})
+            dashboard.append(
+                {
+                    "week": f"{year}-S{week:02d}",
+                    "sessions": r.get("n_sessions", 0),
+                    "covered": r.get("n_covered", 0),
+                    "pct": _coverage_html(
+                        r.get("n_covered", 0), r.get("n_sessions", 0)
+                    ),
+                    "staffing": f"{r.get('n_confirmed', 0)}/{r.get('n_required', 0)}",
+                }
+            )
+        extra_context = {**(extra_context or {}), "dashboard": dashboard}
+        return super().changelist_view(request, extra_context)
+
+
+def _coverage_html(covered, total):
+    if not total:
+        return "—"
+    pct = round(100 * covered / total)
+    if pct < 80:
+        return format_html('<strong style="color:#d9534f">{} %</strong>', pct)
+    return f"{pct} %"
+
+
+@admin.register(CoachMonthlyLoad)
+class CoachMonthlyLoadAdmin(ReadOnlySummaryAdmin):
+    list_display = ("coach", "month_label", "sessions", "hours")
+    list_filter = ["month"]
+    list_select_related = ("coach",)
+    search_fields = ["coach__search_name"]
+    ordering = ["-month", "-sessions"]
+    list_per_page = 200
+
+    @admin.display(description="Mois", ordering="month")
+    def month_label(self, obj):
+        return f"{obj.month:%m/%Y}"
+
+    @admin.display(description="Heures", ordering="minutes")
+    def hours(self, obj):
+        return f"{obj.minutes / 60:.1f}"
 
 
 @admin.register(CoachAssignment)
@@ -4,6 +4,9 @@ from django.db.models import Q
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .models import CalendarDay
+from .services.search import coach_assigned, name_q
+
 
 class InputFilter(admin.SimpleListFilter):
     # doc : https://hakibenita.com/how-to-add-a-text-filter-to-django-admin
@@ -63,11 +66,7 @@ class MemberFilter(InputFilter):
         if term is None:
             return
 
-        any_name = Q()
-        for bit in term.split():
-            any_name &= Q(first_name__icontains=bit) | Q(last_name__icontains=bit)
-
-        return queryset.filter(any_name)
+        return queryset.filter(name_q(term))
 
 
 class CoachNameFilter(InputFilter):
@@ -79,13 +78,7 @@ class CoachNameFilter(InputFilter):
         if term is None:
             return
 
-        any_name = Q()
-        for bit in term.split():
-            any_name &= Q(coach__first_name__icontains=bit) | Q(
-                coach__last_name__icontains=bit
-            )
-
-        return queryset.filter(any_name)
+        return queryset.filter(coach_assigned(term))
 
 
 class LockedCancelledFilter(admin.SimpleListFilter):
@@ -122,3 +115,37 @@ class LockedCancelledFilter(admin.SimpleListFilter):
             "query_string": changelist.get_query_string({self.parameter_name: "all"}),
             "display": "Toutes les séances",
         }
+
+
+class SeasonFilter(admin.SimpleListFilter):
+    # saisons présentes dans le calendrier (filtre masqué s'il est vide)
+    title = "Saison"
+    parameter_name = "season"
+
+    def lookups(self, request, model_admin):
+        seasons = (
+            CalendarDay.objects.order_by("season")
+            .values_list("season", flat=True)
+            .distinct()
+        )
+        return [(str(s), f"{s}-{s + 1}") for s in seasons]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(day__season=self.value())
+        return queryset
+
+
+class WeekParityFilter(admin.SimpleListFilter):
+    title = "Type de semaine"
+    parameter_name = "parity"
+
+    def lookups(self, request, model_admin):
+        if not CalendarDay.objects.exists():
+            return []
+        return CalendarDay.PARITY_CHOICES
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(day__parity=self.value())
+        return queryset
@@ -0,0 +1,60 @@
+# core/bench.py
+
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+
+# -----------------------------------------------------------
+# Outils des commandes de benchmark (bench_*)
+# -----------------------------------------------------------
+
+
+def measure(fn, repeat: int = 5) -> dict:
+    """
+    Exécute fn `repeat` fois et renvoie :
+    - ms : durée médiane
+    - cpu_ms : temps CPU médian du processus
+    - peak_kib : pic mémoire Python d'une exécution (tracemalloc)
+    - queries : nombre de requêtes SQL d'une exécution
+    """
+    durations, cpu = [], []
+    for _ in range(repeat):
+        start, start_cpu = time.perf_counter(), time.process_time()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+        cpu.append((time.process_time() - start_cpu) * 1000)
+
+    reset_queries()
+    with CaptureQueriesContext(connection) as ctx:
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "ms": statistics.median(durations),
+        "cpu_ms": statistics.median(cpu),
+        "peak_kib": peak / 1024,
+        "queries": len(ctx.captured_queries),
+    }
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Bloc dont toutes les écritures (données synthétiques) sont annulées à la sortie."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
@@ -1,11 +1,16 @@
 # core/forms.py
 
 
+from datetime import timedelta
+
 from django import forms
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
-from .models import Member, Session
+from .models import Location, Member, Session
+from .services.bulk import SCOPE_CHOICES
+from .services.capacity import check_capacity
+from .services.recurrence import occurrence_starts
 from .utils import next_july_31
 
 RECURRENCE_CHOICES = [
@@ -139,8 +144,34 @@ class SessionAdminForm(forms.ModelForm):
                     )
                 if (end_date - start_at.date()).days > 365:
                     raise ValidationError("La récurrence ne peut pas dépasser un an.")
+
+        self._check_capacity(cleaned)
         return cleaned
 
+    def _check_capacity(self, cleaned):
+        """Capacité du lieu : la séance et, pour une nouvelle série, ses occurrences."""
+        start_at, location = cleaned.get("start_at"), cleaned.get("location")
+        duration_min = cleaned.get("duration_min")
+        if not (start_at and duration_min and location):
+            return
+        if location.capacity is None:  # 0 : lieu fermé, aucune séance
+            return
+        if cleaned.get("is_cancelled"):
+            return
+        starts = [start_at]
+        mode = cleaned.get("recurrence_mode") or "none"
+        if mode != "none" and not self.instance.recurrence_id:
+            draft = Session(
+                start_at=start_at, location=location, category=cleaned.get("category")
+            )
+            starts += occurrence_starts(draft, mode, cleaned["recurrence_end_date"])
+        duration = timedelta(minutes=duration_min)
+        check_capacity(
+            location,
+            [(f"candidate-{n}", dt, dt + duration) for n, dt in enumerate(starts)],
+            exclude_ids=[self.instance.pk] if self.instance.pk else [],
+        )
+
     def save(self, commit=True):
         session = super().save(commit=commit)
         # Marque l’intention de créer une série (l’admin s’en chargera après les inlines)
@@ -159,3 +190,47 @@ class CoachSelectForm(forms.Form):
         queryset=Member.objects.none(),  # important : ModelChoiceField
         label="Encadrant",
     )
+
+
+# -----------------------------------------------------------
+# Actions en masse de l'admin des séances
+# -----------------------------------------------------------
+
+
+class BulkScopeForm(forms.Form):
+    scope = forms.ChoiceField(
+        label="Portée",
+        choices=SCOPE_CHOICES,
+        initial="selection",
+        widget=forms.RadioSelect,
+    )
+
+
+class ShiftTimeForm(BulkScopeForm):
+    minutes = forms.IntegerField(
+        label="Décalage (minutes)",
+        min_value=-720,
+        max_value=720,
+        help_text="Négatif pour avancer. Le jour (heure de Paris) ne peut pas changer.",
+    )
+
+    def clean_minutes(self):
+        minutes = self.cleaned_data["minutes"]
+        if minutes == 0:
+            raise ValidationError("Le décalage doit être non nul.")
+        return minutes
+
+
+class ReplaceCoachForm(BulkScopeForm):
+    old_coach = forms.ModelChoiceField(
+        queryset=Member.objects.all(), label="Encadrant à remplacer"
+    )
+    new_coach = forms.ModelChoiceField(
+        queryset=Member.objects.all(), label="Nouvel encadrant"
+    )
+
+
+class ChangeLocationForm(BulkScopeForm):
+    location = forms.ModelChoiceField(
+        queryset=Location.objects.all(), label="Nouveau lieu"
+    )
@@ -0,0 +1,64 @@
+from core.bench import measure
+from core.services import compression, refdata
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    help = """Mesure, pour les pages publiques, les octets envoyés selon l'encodage
+    et le CPU par requête : rendu complet (cache vide) et page servie depuis
+    le cache avec sa variante compressée."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def urls(self):
+        yield reverse("public_homepage")
+        yield reverse("public_sessions_by_category", args=["all"])
+        if cat := next(iter(refdata.categories()), None):
+            yield reverse("public_sessions_by_category", args=[cat.code])
+        if coach := next(iter(refdata.coaches().values()), None):
+            yield reverse("coach_page", args=[coach.slug])
+
+    def handle(self, *args, **options):
+        # le client de test envoie Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            self.bench(options)
+
+    def bench(self, options):
+        client = Client()
+
+        def get(url, encoding):
+            response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+            if response.status_code != 200:
+                raise CommandError(f"{url} : HTTP {response.status_code}")
+            return response
+
+        encodings = ["identity", "gzip"] + (["br"] if compression.brotli else [])
+        if not compression.brotli:
+            self.stdout.write("brotli non installé : gzip seul.")
+
+        for url in self.urls():
+            sizes = {enc: len(get(url, enc).content) for enc in encodings}
+            self.stdout.write(
+                url
+                + "  "
+                + "  ".join(f"{e} {n / 1024:.1f} Kio" for e, n in sizes.items())
+            )
+
+            def cold():
+                cache.clear()
+                get(url, "gzip")
+
+            def hot():
+                get(url, "gzip")
+
+            for name, fn in (("rendu + gzip", cold), ("cache gzip", hot)):
+                r = measure(fn, options["repeat"])
+                self.stdout.write(
+                    f"    {name:<13} {r['cpu_ms']:7.1f} ms CPU  "
+                    f"{r['ms']:7.1f} ms  {r['queries']} requêtes"
+                )
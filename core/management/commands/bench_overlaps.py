@@ -0,0 +1,112 @@
+import random
+from datetime import date, timedelta
+from itertools import combinations
+
+from core.bench import measure, rolled_back
+from core.models import Category, CoachAssignment, Location, Member, Session
+from core.services.calendar import season_of
+from core.services.closures import day_start
+from core.services.overlap import conflicts, overlaps_by_coach, season_overlaps
+from django.core.management.base import BaseCommand
+
+
+def naive_overlaps(rows):
+    """Comparaison de toutes les paires d'inscriptions de chaque coach."""
+    by_coach = {}
+    for coach_id, session_id, start, end in rows:
+        by_coach.setdefault(coach_id, []).append((session_id, start, end))
+    return [
+        (coach_id, a[0], b[0])
+        for coach_id, intervals in by_coach.items()
+        for a, b in combinations(intervals, 2)
+        if a[1] < b[2] and b[1] < a[2]
+    ]
+
+
+class Command(BaseCommand):
+    help = """Détection des chevauchements d'inscriptions : balayage d'une saison
+    comparé aux paires naïves, et coût de la vérification à l'inscription.
+    Les données synthétiques sont créées dans une transaction annulée."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--assignments", type=int, default=100_000)
+        parser.add_argument("--coaches", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def make_data(self, n_assignments, n_coaches):
+        rnd = random.Random(46)
+        season = season_of(date.today())
+        start = day_start(date(season, 9, 1))
+        category = Category.objects.first() or Category.objects.create(
+            code="bench", label="Bench"
+        )
+        location = Location.objects.first() or Location.objects.create(name="Bench")
+        coaches = Member.objects.bulk_create(
+            Member(first_name="Bench", last_name=f"Coach {i}") for i in range(n_coaches)
+        )
+
+        sessions = []
+        for i in range(n_assignments // 4):
+            s = Session(
+                category=category,
+                location=location,
+                # créneaux au quart d'heure entre 6h et 21h, sur 300 jours
+                start_at=start
+                + timedelta(
+                    days=rnd.randrange(300), minutes=360 + 15 * rnd.randrange(60)
+                ),
+                duration_min=rnd.choice([45, 60, 90]),
+                group=f"Bench {i}",
+            )
+            s.set_computed_fields()
+            sessions.append(s)
+        sessions = Session.objects.bulk_create(sessions, batch_size=2000)
+
+        assignments = [
+            CoachAssignment(session=s, coach=c, status="confirmed")
+            for s in sessions
+            for c in rnd.sample(coaches, 4)
+        ]
+        CoachAssignment.objects.bulk_create(assignments, batch_size=2000)
+        return season, sessions, coaches, rnd
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            season, sessions, coaches, rnd = self.make_data(
+                options["assignments"], options["coaches"]
+            )
+            rows = list(
+                CoachAssignment.objects.filter(coach__in=coaches)
+                .order_by("coach_id", "session__start_at")
+                .values_list(
+                    "coach_id", "session_id", "session__start_at", "session__end_at"
+                )
+            )
+            self.stdout.write(f"{len(rows)} inscriptions, {len(coaches)} coachs")
+
+            swept = list(overlaps_by_coach(rows))
+            naive = naive_overlaps(rows)
+            assert {(c, *sorted((a, b))) for c, a, b in swept} == {
+                (c, *sorted((a, b))) for c, a, b in naive
+            }
+            self.stdout.write(f"{len(swept)} chevauchements (balayage = paires)")
+
+            repeat = options["repeat"]
+            for label, fn in [
+                ("balayage (mémoire)", lambda: list(overlaps_by_coach(rows))),
+                ("paires naïves (mémoire)", lambda: naive_overlaps(rows)),
+                ("rapport saison (SQL + balayage)", lambda: season_overlaps(season)),
+            ]:
+                r = measure(fn, repeat)
+                self.stdout.write(
+                    f"{label:<34} {r['ms']:9.1f} ms  {r['peak_kib']:9.0f} KiB"
+                )
+
+            checks = [
+                (rnd.choice(coaches).pk, rnd.choice(sessions)) for _ in range(200)
+            ]
+            r = measure(lambda: [list(conflicts(c, s)) for c, s in checks], repeat)
+            self.stdout.write(
+                f"{'vérification à l inscription':<34} {r['ms'] * 1000 / len(checks):9.1f} µs"
+                f"  ({r['queries'] // len(checks)} requête)"
+            )
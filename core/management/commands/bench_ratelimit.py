@@ -0,0 +1,64 @@
+from core.bench import measure
+from core.services.ratelimit import (
+    CacheBuckets,
+    MemoryBuckets,
+    TokenBucket,
+    rate_limited,
+)
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+
+class Command(BaseCommand):
+    help = """Mesure le coût par requête du limiteur de débit (seaux mémoire et
+    cache) : vérification seule, et vue décorée comparée à la vue nue."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=10_000)
+        parser.add_argument("--keys", type=int, default=1_000)
+
+    def handle(self, *args, **options):
+        calls, keys = options["calls"], options["keys"]
+        bucket = TokenBucket(burst=5, per_minute=20)
+        backends = {"mémoire": MemoryBuckets(bucket)}
+        try:
+            caches[settings.RATELIMIT_CACHE].get("ratelimit:bench")
+            backends["cache"] = CacheBuckets(bucket)
+        except DatabaseError as e:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"seaux cache ignorés : cache {settings.RATELIMIT_CACHE!r} "
+                    f"inaccessible ({e}). Lancer `python manage.py createcachetable`."
+                )
+            )
+
+        for name, backend in backends.items():
+
+            def run():
+                for i in range(calls):
+                    backend.hit(f"10.0.{i % keys}:{i % 7}")
+
+            r = measure(run, repeat=3)
+            self.stdout.write(
+                f"seaux {name:<8} {r['ms'] * 1000 / calls:6.2f} µs / vérification"
+            )
+
+        request = RequestFactory().post(
+            "/public/assign/do/", {"coach_id": "1", "session_id": "1"}
+        )
+        request.POST  # corps déjà analysé, comme après la vue
+
+        def view(request):
+            return HttpResponse()
+
+        limited = rate_limited("ip", "ip_and_coach")(view)
+        for name, fn in (("vue nue", view), ("vue limitée", limited)):
+            r = measure(lambda: [fn(request) for _ in range(calls)], repeat=3)
+            self.stdout.write(
+                f"{name:<14} {r['ms'] * 1000 / calls:6.2f} µs / requête "
+                f"({r['queries']} requête SQL)"
+            )
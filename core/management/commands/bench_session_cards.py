@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from core.bench import measure, rolled_back
+from core.models import Category, CoachAssignment, Location, Member, Session
+from core.services.public_view_utils import get_public_sessions
+from core.services.session_cards import card_values, session_cards
+from core.utils import PARIS_TZ
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+from django.template import engines
+from django.test import RequestFactory
+from django.utils import timezone
+
+CARDS_TEMPLATE = (
+    "{% for s in cards %}{% include 'core/includes/session_card.html' %}{% endfor %}"
+)
+
+
+def legacy_cards(qs):
+    """Ancien chemin : instances complètes + title_auto par carte."""
+    qs = qs.select_related("category", "location").prefetch_related(
+        Prefetch(
+            "assignments",
+            queryset=CoachAssignment.objects.filter(status="confirmed")
+            .select_related("coach")
+            .order_by("pk"),
+            to_attr="confirmed",
+        )
+    )
+    return [
+        {
+            "id": s.pk,
+            "title": s.title_auto,
+            "coaches": [{"id": a.coach_id, "name": str(a.coach)} for a in s.confirmed],
+            "confirmed_cnt": s.confirmed_cnt,
+            "min_coaches": s.min_coaches,
+            "missing": s.confirmed_cnt < s.min_coaches,
+        }
+        for s in qs
+    ]
+
+
+class Command(BaseCommand):
+    help = """Compare le rendu des cartes séance publiques : instances complètes
+    (ancien chemin) et projection légère (session_cards), en durée et mémoire.
+    Les séances synthétiques sont créées dans une transaction annulée."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def make_sessions(self, count):
+        category = Category.objects.first() or Category.objects.create(
+            code="bench", label="Bench"
+        )
+        location = Location.objects.first() or Location.objects.create(name="Bench")
+        coaches = list(Member.objects.order_by("pk")[:3])
+        start = timezone.now() + timedelta(minutes=1)
+
+        sessions = []
+        for i in range(count):
+            start_at = start + timedelta(minutes=i)
+            year_iso, week_iso, _ = start_at.astimezone(PARIS_TZ).isocalendar()
+            sessions.append(
+                Session(
+                    category=category,
+                    location=location,
+                    start_at=start_at,
+                    group=f"Bench {i}",
+                    notes="Notes de séance. " * 40,
+                    min_coaches=2,
+                    year_iso=year_iso,
+                    week_iso=week_iso,
+                )
+            )
+        sessions = Session.objects.bulk_create(sessions)
+        if coaches:
+            CoachAssignment.objects.bulk_create(
+                CoachAssignment(session=s, coach=c, status="confirmed")
+                for s in sessions
+                for c in coaches[: 1 + s.pk % len(coaches)]
+            )
+
+    def handle(self, *args, **options):
+        template = engines["django"].from_string(CARDS_TEMPLATE)
+        request = RequestFactory().get("/public/category/all/")
+
+        def render(cards):
+            return template.render({"cards": cards}, request)
+
+        with rolled_back():
+            self.make_sessions(max(options["sizes"]))
+            for size in options["sizes"]:
+                qs = get_public_sessions("all", {})[:size]
+                paths = {
+                    "instances": lambda: render(legacy_cards(qs)),
+                    "projection": lambda: render(session_cards(card_values(qs))),
+                }
+                for name, fn in paths.items():
+                    r = measure(fn, options["repeat"])
+                    self.stdout.write(
+                        f"{size:>5} cartes  {name:<10}  {r['ms']:8.1f} ms  "
+                        f"{r['peak_kib']:8.0f} Kio  {r['queries']} requêtes"
+                    )
@@ -0,0 +1,170 @@
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+
+from core.bench import measure, rolled_back
+from core.models import Category, CoachAssignment, Location, Member, Session
+from core.services.calendar import season_of
+from core.services.closures import day_start
+from core.services.workload import (
+    LATE_WITHDRAWAL,
+    assignment_frame,
+    coach_workload,
+    season_assignments,
+)
+from django.core.management.base import BaseCommand
+from django.db.models import F, OuterRef, Subquery
+
+ROW_FIELDS = [
+    "coach_id",
+    "status",
+    "updated_at",
+    "session__start_at",
+    "session__duration_min",
+    "session__year_iso",
+    "session__week_iso",
+]
+
+
+def loop_workload(rows):
+    """
+    Référence : mêmes indicateurs, une boucle Python par inscription, la
+    désinscription tardive recalculée à partir des horodatages.
+    """
+    stats = defaultdict(lambda: defaultdict(int))
+    weeks = defaultdict(lambda: defaultdict(int))
+    for coach_id, status, updated, start, duration, year, week in rows:
+        s = stats[coach_id]
+        s["assignments"] += 1
+        if status == "confirmed":
+            s["sessions"] += 1
+            s["minutes"] += duration
+            weeks[coach_id][year, week] += 1
+        elif status == "withdrawn":
+            s["withdrawn"] += 1
+            s["late_withdrawals"] += start - updated < LATE_WITHDRAWAL
+    return {
+        coach_id: (
+            s["sessions"],
+            s["withdrawn"],
+            s["late_withdrawals"],
+            round(s["minutes"] / 60, 6),
+            len(weeks[coach_id]),
+            max(weeks[coach_id].values(), default=0),
+        )
+        for coach_id, s in stats.items()
+    }
+
+
+class Command(BaseCommand):
+    help = """Analyse de charge des coachs : lecture en colonnes + pandas
+    comparée à une boucle Python par inscription. Les données synthétiques
+    sont créées dans une transaction annulée."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--assignments", type=int, default=1_000_000)
+        parser.add_argument("--coaches", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def make_data(self, n_assignments, n_coaches):
+        rnd = random.Random(50)
+        season = season_of(date.today())
+        start = day_start(date(season, 9, 1))
+        category = Category.objects.first() or Category.objects.create(
+            code="bench", label="Bench"
+        )
+        location = Location.objects.first() or Location.objects.create(name="Bench")
+        coaches = Member.objects.bulk_create(
+            Member(first_name="Bench", last_name=f"Coach {i}") for i in range(n_coaches)
+        )
+        # charge inégale : quelques coachs très sollicités, d'autres peu
+        weights = [rnd.paretovariate(1.5) for _ in coaches]
+
+        sessions = []
+        for i in range(n_assignments // 8):
+            s = Session(
+                category=category,
+                location=location,
+                start_at=start
+                + timedelta(
+                    days=rnd.randrange(300), minutes=360 + 15 * rnd.randrange(60)
+                ),
+                duration_min=rnd.choice([45, 60, 90]),
+                group=f"Bench {i}",
+            )
+            s.set_computed_fields()
+            sessions.append(s)
+        sessions = Session.objects.bulk_create(sessions, batch_size=2000)
+
+        assignments = []
+        for s in sessions:
+            for c in {*rnd.choices(coaches, weights, k=8)}:
+                status = "withdrawn" if rnd.random() < 0.1 else "confirmed"
+                assignments.append(CoachAssignment(session=s, coach=c, status=status))
+        CoachAssignment.objects.bulk_create(assignments, batch_size=5000)
+
+        # un tiers des désinscriptions au moment de la séance : tardives
+        bench = CoachAssignment.objects.filter(
+            coach__first_name="Bench", status="withdrawn"
+        )
+        bench.annotate(third=F("pk") % 3).filter(third=0).update(
+            updated_at=Subquery(
+                Session.objects.filter(pk=OuterRef("session_id")).values("start_at")
+            )
+        )
+        return season, coaches
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            season, coaches = self.make_data(options["assignments"], options["coaches"])
+            # filtre par jointure : un IN de milliers de coachs ferait sonder
+            # SQLite chaque (séance, coach) de la liste
+            assignments = season_assignments(season).filter(coach__first_name="Bench")
+            rows = list(assignments.order_by().values_list(*ROW_FIELDS))
+            df = assignment_frame(assignments)
+            self.stdout.write(
+                f"{len(df)} inscriptions, {len(coaches)} coachs, "
+                f"DataFrame {df.memory_usage(deep=True).sum() / 2**20:.0f} MiB"
+            )
+
+            result = coach_workload(df)
+            expected = loop_workload(rows)
+            columns = [
+                "sessions",
+                "withdrawn",
+                "late_withdrawals",
+                "hours",
+                "active_weeks",
+                "peak_week",
+            ]
+            vectorized = {
+                coach_id: (*values[:3], round(values[3], 6), *values[4:])
+                for coach_id, *values in result[columns].itertuples()
+            }
+            assert vectorized == expected
+            flags = result["flag"].value_counts()
+            self.stdout.write(
+                f"indicateurs identiques à la boucle ; "
+                f"{flags.get('surchargé', 0)} surchargé(s), "
+                f"{flags.get('sous-utilisé', 0)} sous-utilisé(s)"
+            )
+
+            repeat = options["repeat"]
+            for label, fn in [
+                ("lecture en colonnes (SQL)", lambda: assignment_frame(assignments)),
+                ("indicateurs pandas (mémoire)", lambda: coach_workload(df)),
+                ("indicateurs boucle (mémoire)", lambda: loop_workload(rows)),
+                (
+                    "rapport pandas (SQL + calcul)",
+                    lambda: coach_workload(assignment_frame(assignments)),
+                ),
+                (
+                    "rapport boucle (SQL + calcul)",
+                    lambda: loop_workload(assignments.values_list(*ROW_FIELDS)),
+                ),
+            ]:
+                r = measure(fn, repeat)
+                self.stdout.write(
+                    f"{label:<32} {r['ms']:9.1f} ms  {r['peak_kib']:9.0f} KiB"
+                    f"  ({r['queries']} requête(s))"
+                )
@@ -0,0 +1,116 @@
+import re
+
+from core.models import CoachAssignment, Location, Member, Session
+from core.services import refdata
+from core.services.public_view_utils import get_public_sessions
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+# Nœuds de plan : PostgreSQL ("Index Scan using idx on table", "Seq Scan on table",
+# "Bitmap Index Scan on idx") et SQLite ("SEARCH table USING INDEX idx", "SCAN table")
+PG_NODE = re.compile(
+    r"(Seq Scan|Index Only Scan|Index Scan|Bitmap Index Scan)"
+    r"(?: Backward)?(?: using (\S+))? on (\S+)"
+)
+SQLITE_NODE = re.compile(r"\b(SCAN|SEARCH) (\S+)")
+SQLITE_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\S+)")
+
+
+def parse_plan(plan: str, vendor: str) -> tuple[set, set]:
+    """Renvoie (index utilisés, tables parcourues séquentiellement)."""
+    indexes, seq_scans = set(), set()
+    if vendor == "postgresql":
+        for node, using, target in PG_NODE.findall(plan):
+            if node == "Seq Scan":
+                seq_scans.add(target)
+            elif node == "Bitmap Index Scan":
+                indexes.add(target)
+            else:
+                indexes.add(using)
+    else:
+        for line in plan.splitlines():
+            m = SQLITE_NODE.search(line)
+            if not m:
+                continue
+            node, table = m.groups()
+            if index := SQLITE_INDEX.search(line):
+                indexes.add(index.group(1))
+            # SCAN = parcours complet, de la table ou d'un index entier
+            if node == "SCAN":
+                seq_scans.add(table)
+    return indexes, seq_scans
+
+
+class Command(BaseCommand):
+    help = """Lance EXPLAIN sur les requêtes principales des pages publiques et
+    indique pour chacune les index utilisés et les parcours séquentiels."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="EXPLAIN ANALYZE (PostgreSQL uniquement : exécute réellement les requêtes)",
+        )
+        parser.add_argument(
+            "--plans", action="store_true", help="Affiche les plans complets"
+        )
+
+    def querysets(self):
+        now = timezone.now()
+        cat = next(iter(refdata.categories()), None)
+        loc = Location.objects.first()
+        coach = Member.objects.filter(is_head_coach=False).first()
+
+        yield "Séances à venir (toutes)", get_public_sessions("all", {})
+        if cat:
+            yield "Séances à venir (catégorie)", get_public_sessions(cat.code, {})
+        if loc:
+            yield "Séances à venir (lieu)", get_public_sessions(
+                "all", {"loc": str(loc.pk)}
+            )
+        if coach:
+            yield "Séances éligibles d'un coach", Session.objects.filter(
+                category_id__in=refdata.category_ids_for_mask(coach.eligibility_mask),
+                is_cancelled=False,
+                start_at__gte=now,
+            ).order_by("start_at", "pk")
+            yield "Inscriptions confirmées d'un coach", CoachAssignment.objects.filter(
+                coach=coach, status="confirmed"
+            )
+        yield "Synchro incrémentale (séances)", Session.objects.filter(
+            updated_at__gt=now
+        ).order_by("updated_at", "pk")
+        yield "Synchro incrémentale (inscriptions)", CoachAssignment.objects.filter(
+            updated_at__gt=now
+        ).order_by("updated_at", "pk")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        explain_options = {}
+        if options["analyze"]:
+            if vendor == "postgresql":
+                explain_options["analyze"] = True
+            else:
+                self.stdout.write(self.style.WARNING("ANALYZE ignoré hors PostgreSQL."))
+
+        seq_total = 0
+        for label, qs in self.querysets():
+            plan = qs.explain(**explain_options)
+            indexes, seq_scans = parse_plan(plan, vendor)
+            seq_total += bool(seq_scans)
+            if seq_scans:
+                status = self.style.WARNING(
+                    f"SEQ SCAN sur {', '.join(sorted(seq_scans))}"
+                )
+            else:
+                status = self.style.SUCCESS("index")
+            self.stdout.write(f"{label} : {status}")
+            if indexes:
+                self.stdout.write(f"    index : {', '.join(sorted(indexes))}")
+            if options["plans"]:
+                self.stdout.write(plan)
+
+        self.stdout.write(
+            f"{seq_total} requête(s) avec parcours séquentiel (base {vendor})."
+        )
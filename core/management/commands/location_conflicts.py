@@ -0,0 +1,31 @@
+from core.models import Location, Session
+from core.services.capacity import season_conflicts
+from django.core.management.base import BaseCommand
+from django.utils import formats, timezone
+
+
+class Command(BaseCommand):
+    help = """Liste les dépassements de capacité des lieux (séances actives
+    simultanées) pendant une saison (par défaut la saison courante)."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--season", type=int, help="Année de début, ex. 2025")
+
+    def handle(self, *args, **options):
+        conflicts = season_conflicts(options["season"])
+        if not conflicts:
+            self.stdout.write(self.style.SUCCESS("Aucun dépassement de capacité."))
+            return
+
+        locations = Location.objects.in_bulk({c.location_id for c in conflicts})
+        sessions = Session.objects.select_related("category", "location").in_bulk(
+            {k for c in conflicts for k in c.keys}
+        )
+        for c in conflicts:
+            location = locations[c.location_id]
+            when = formats.date_format(timezone.localtime(c.start_at), "D d/m/Y H:i")
+            self.stdout.write(
+                f"{location} (capacité {location.capacity}) {when} : "
+                + " | ".join(str(sessions[k]) for k in c.keys)
+            )
+        self.stdout.write(self.style.WARNING(f"{len(conflicts)} dépassement(s)."))
@@ -0,0 +1,26 @@
+from core.models import Member, Session
+from core.services.overlap import season_overlaps
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = """Liste les coachs confirmés sur des séances qui se chevauchent
+    pendant une saison (par défaut la saison courante)."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--season", type=int, help="Année de début, ex. 2025")
+
+    def handle(self, *args, **options):
+        overlaps = season_overlaps(options["season"])
+        if not overlaps:
+            self.stdout.write(self.style.SUCCESS("Aucun chevauchement."))
+            return
+
+        coaches = Member.objects.in_bulk({o.coach_id for o in overlaps})
+        ids = {o.first_id for o in overlaps} | {o.second_id for o in overlaps}
+        sessions = Session.objects.select_related("category", "location").in_bulk(ids)
+        for o in overlaps:
+            self.stdout.write(
+                f"{coaches[o.coach_id]} : {sessions[o.first_id]}  ×  {sessions[o.second_id]}"
+            )
+        self.stdout.write(self.style.WARNING(f"{len(overlaps)} chevauchement(s)."))
@@ -0,0 +1,52 @@
+import csv
+from datetime import date
+
+from core.models import Session
+from core.services.calendar import populate, season_of
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = """Remplit (ou met à jour) la table calendrier : semaine ISO, parité,
+    saison, jours fériés et, avec --school-holidays, vacances scolaires.
+    Par défaut : des saisons des séances existantes jusqu'à deux saisons
+    après la saison courante."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat)
+        parser.add_argument("--end", type=date.fromisoformat)
+        parser.add_argument(
+            "--school-holidays",
+            help="CSV start_date,end_date,name (dates ISO, fin incluse)",
+        )
+
+    def handle(self, *args, **options):
+        bounds = Session.objects.aggregate(first=Min("day"), last=Max("day"))
+        today = timezone.localdate()
+        start = options["start"] or date(
+            season_of(min(filter(None, [bounds["first"], today]))), 8, 1
+        )
+        end = options["end"] or date(
+            season_of(max(filter(None, [bounds["last"], today]))) + 3, 7, 31
+        )
+        if end < start:
+            raise CommandError("--end précède --start.")
+
+        school = []
+        if options["school_holidays"]:
+            with open(options["school_holidays"], newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    school.append(
+                        (
+                            date.fromisoformat(row["start_date"]),
+                            date.fromisoformat(row["end_date"]),
+                            row.get("name", "Vacances scolaires"),
+                        )
+                    )
+
+        count = populate(start, end, school)
+        self.stdout.write(
+            self.style.SUCCESS(f"{count} jours du {start} au {end} enregistrés.")
+        )
@@ -0,0 +1,20 @@
+import time
+
+from core.services.staffing import generate_proposals
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = """Calcule les propositions d'encadrement des séances à venir
+    sous-encadrées (flot de coût minimal par semaine). Les propositions sont
+    à valider dans l'admin (« Propositions d'encadrement »)."""
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = generate_proposals()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{count} inscription(s) proposée(s) en "
+                f"{time.perf_counter() - start:.2f} s."
+            )
+        )
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Les workers sont lancés en "spawn" (pas de connexion base héritée d'un fork) :
+# ce module est réimporté avant django.setup(), d'où les imports différés.
+
+
+def _init_worker():
+    django.setup()
+
+
+def _render(root, path, url):
+    from core.services.publish import render_page
+
+    return render_page(root, path, url)
+
+
+class Command(BaseCommand):
+    help = """Exporte les pages publiques (accueil, catégories, coachs, flux iCal,
+    JSON) en fichiers statiques sous STATIC_ROOT/public/. Seules les pages dont
+    les données ont changé depuis le dernier export sont re-rendues."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processus de rendu (1 = dans le processus courant)",
+        )
+        parser.add_argument(
+            "--force", action="store_true", help="Re-rend toutes les pages"
+        )
+
+    def handle(self, *args, **options):
+        from core.services.publish import public_pages, read_manifest, write_manifest
+
+        root = Path(settings.STATIC_ROOT)
+        manifest = {} if options["force"] else read_manifest(root)
+        pages = public_pages()
+        todo = [
+            p
+            for p in pages
+            if manifest.get(p.path) != p.fingerprint or not (root / p.path).exists()
+        ]
+        self.stdout.write(f"{len(todo)} page(s) à rendre sur {len(pages)}.")
+
+        start = time.perf_counter()
+        total = 0
+        if options["workers"] <= 1 or len(todo) <= 1:
+            for page in todo:
+                total += _render(str(root), page.path, page.url)
+                manifest[page.path] = page.fingerprint
+        else:
+            with ProcessPoolExecutor(
+                max_workers=options["workers"],
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            ) as pool:
+                futures = {
+                    pool.submit(_render, str(root), page.path, page.url): page
+                    for page in todo
+                }
+                for future in as_completed(futures):
+                    page = futures[future]
+                    total += future.result()
+                    manifest[page.path] = page.fingerprint
+
+        # pages disparues (coach ou catégorie supprimés)
+        current = {p.path for p in pages}
+        for path in set(manifest) - current:
+            (root / path).unlink(missing_ok=True)
+            del manifest[path]
+        write_manifest(root, manifest)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(todo)} page(s) écrite(s), {total / 1024:.0f} Kio, "
+                f"{time.perf_counter() - start:.1f} s."
+            )
+        )
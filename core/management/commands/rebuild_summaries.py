@@ -0,0 +1,21 @@
+import time
+
+from core.services.summaries import rebuild
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = """Recalcule entièrement les tables de synthèse de l'encadrement
+    (semaine × catégorie × lieu, coach × mois). À lancer après une migration
+    ou une modification directe en base ; sinon elles sont tenues à jour
+    au fil des écritures."""
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        weekly, monthly = rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{weekly} ligne(s) semaine, {monthly} ligne(s) coach × mois "
+                f"en {time.perf_counter() - start:.2f} s."
+            )
+        )
@@ -0,0 +1,87 @@
+# core/middleware.py
+from django.conf import settings
+from django.http import HttpResponse
+
+from .services import admission, compression, invalidation
+
+
+class InvalidationMiddleware:
+    """Synchronise la copie locale des versions de données une fois par requête."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        invalidation.start_listener()
+
+    def __call__(self, request):
+        invalidation.sync()
+        return self.get_response(request)
+
+
+class AdmissionControlMiddleware:
+    """
+    Limite les requêtes en cours par classe de vues (voir services.admission).
+    Placée avant les sessions et l'invalidation : une requête refusée ne
+    touche pas la base.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        kind = admission.view_class(request.path_info)
+        if kind is None:
+            return self.get_response(request)
+
+        gate = admission.gate(kind)
+        if kind == "write":
+            admitted = gate.enter(settings.ADMISSION_WRITE_WAIT)
+        else:
+            admitted = gate.try_enter()
+
+        if not admitted:
+            if kind == "read" and (stale := compression.stale_response(request)):
+                gate.count("served_stale")
+                return stale
+            gate.count("rejected")
+            response = HttpResponse(
+                "Trop de demandes en cours, réessayez dans quelques secondes.",
+                status=503,
+                content_type="text/plain; charset=utf-8",
+            )
+            response["Retry-After"] = "5"
+            return response
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            gate.leave()
+            raise
+        if response.streaming:
+            # le contenu est produit après le retour du middleware : la place
+            # n'est rendue qu'une fois le flux consommé ou fermé
+            if response.is_async:
+                response.streaming_content = _aleave_after(
+                    response.streaming_content, gate
+                )
+            else:
+                response.streaming_content = _leave_after(
+                    response.streaming_content, gate
+                )
+        else:
+            gate.leave()
+        return response
+
+
+def _leave_after(content, gate):
+    try:
+        yield from content
+    finally:
+        gate.leave()
+
+
+async def _aleave_after(content, gate):
+    try:
+        async for chunk in content:
+            yield chunk
+    finally:
+        gate.leave()
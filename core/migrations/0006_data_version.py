@@ -0,0 +1,101 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:13
+
+from django.db import migrations, models
+
+# SQL figé à la date de la migration (ne pas importer core.services ici : le
+# code applicatif peut évoluer, pas l'historique des migrations).
+TRACKED_TABLES = {
+    "session": ["core_session"],
+    "assignment": ["core_coachassignment"],
+    "member": ["core_member", "core_member_qualifications"],
+    "category": ["core_category"],
+    "location": ["core_location"],
+}
+
+SQLITE_EVENTS = ("INSERT", "UPDATE", "DELETE")
+
+PG_BUMP_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION core_bump_data_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE core_dataversion SET version = version + 1 WHERE name = TG_ARGV[0];
+    PERFORM pg_notify('core_data_version', TG_ARGV[0]);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def create_triggers_sql(vendor, table, name):
+    if vendor == "postgresql":
+        return [f"""
+            CREATE TRIGGER {table}_bump_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION core_bump_data_version('{name}')
+            """]
+    return [f"""
+        CREATE TRIGGER {table}_bump_version_{event.lower()}
+        AFTER {event} ON {table}
+        BEGIN
+            UPDATE core_dataversion SET version = version + 1 WHERE name = '{name}';
+        END
+        """ for event in SQLITE_EVENTS]
+
+
+def drop_triggers_sql(vendor, table):
+    if vendor == "postgresql":
+        return [f"DROP TRIGGER IF EXISTS {table}_bump_version ON {table}"]
+    return [
+        f"DROP TRIGGER IF EXISTS {table}_bump_version_{event.lower()}"
+        for event in SQLITE_EVENTS
+    ]
+
+
+def create_versions_and_triggers(apps, schema_editor):
+    DataVersion = apps.get_model("core", "DataVersion")
+    for name in TRACKED_TABLES:
+        DataVersion.objects.using(schema_editor.connection.alias).get_or_create(
+            name=name
+        )
+
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(PG_BUMP_FUNCTION_SQL)
+    for name, tables in TRACKED_TABLES.items():
+        for table in tables:
+            for sql in create_triggers_sql(vendor, table, name):
+                schema_editor.execute(sql)
+
+
+def drop_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for tables in TRACKED_TABLES.values():
+        for table in tables:
+            for sql in drop_triggers_sql(vendor, table):
+                schema_editor.execute(sql)
+    if vendor == "postgresql":
+        schema_editor.execute("DROP FUNCTION IF EXISTS core_bump_data_version()")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_changes_sync"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataVersion",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Version des données",
+                "verbose_name_plural": "Versions des données",
+            },
+        ),
+        migrations.RunPython(create_versions_and_triggers, drop_triggers),
+    ]
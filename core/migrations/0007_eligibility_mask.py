@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:15
+
+from django.db import migrations, models
+
+HEAD_COACH_MASK = -1
+
+
+def fill_masks(apps, schema_editor):
+    Category = apps.get_model("core", "Category")
+    Member = apps.get_model("core", "Member")
+    bits = {}
+    for bit, cat in enumerate(Category.objects.order_by("pk")):
+        cat.bit = bit
+        cat.save(update_fields=["bit"])
+        bits[cat.pk] = bit
+    for member in Member.objects.prefetch_related("qualifications"):
+        mask = 0
+        if member.is_head_coach:
+            mask = HEAD_COACH_MASK
+        else:
+            for cat in member.qualifications.all():
+                mask |= 1 << bits[cat.pk]
+        member.eligibility_mask = mask
+        member.save(update_fields=["eligibility_mask"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_data_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="bit",
+            field=models.PositiveSmallIntegerField(
+                editable=False, null=True, unique=True, verbose_name="Bit d'éligibilité"
+            ),
+        ),
+        migrations.AddField(
+            model_name="member",
+            name="eligibility_mask",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_masks, migrations.RunPython.noop),
+    ]
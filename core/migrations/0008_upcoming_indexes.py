@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_eligibility_mask"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="session",
+            name="core_sessio_is_canc_2ce52f_idx",
+        ),
+        migrations.AddIndex(
+            model_name="coachassignment",
+            index=models.Index(
+                fields=["coach", "status"], name="core_coacha_coach_i_444e79_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="coachassignment",
+            index=models.Index(
+                fields=["session", "status"], name="core_coacha_session_4b99a6_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                condition=models.Q(("is_cancelled", False)),
+                fields=["start_at", "id"],
+                name="session_upcoming_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                condition=models.Q(("is_cancelled", False)),
+                fields=["category", "start_at"],
+                name="session_cat_upcoming_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                condition=models.Q(("is_cancelled", False)),
+                fields=["location", "start_at"],
+                name="session_loc_upcoming_idx",
+            ),
+        ),
+    ]
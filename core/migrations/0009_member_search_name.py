@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:16
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalize_search(s):
+    # copie figée de core.utils.normalize_search à la date de la migration
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    return " ".join(s.lower().split())
+
+
+def fill_search_name(apps, schema_editor):
+    Member = apps.get_model("core", "Member")
+    for member in Member.objects.all():
+        member.search_name = normalize_search(f"{member.first_name} {member.last_name}")
+        member.save(update_fields=["search_name"])
+
+
+def create_trigram_index(apps, schema_editor):
+    # index trigramme pour les recherches "contient" ; SQLite : parcours simple
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS core_member_search_name_trgm "
+        "ON core_member USING gin (search_name gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS core_member_search_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_upcoming_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="member",
+            name="search_name",
+            field=models.CharField(default="", editable=False, max_length=201),
+        ),
+        migrations.RunPython(fill_search_name, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+# indexation initiale de toutes les séances : SQL figé ici plutôt qu'importé
+# de core.services.search, qui peut évoluer
+PG_INDEX_SQL = """
+UPDATE core_session AS t SET search_document =
+    setweight(to_tsvector('french', unaccent(coalesce(s."group", ''))), 'A')
+    || setweight(to_tsvector('french', unaccent(coalesce(l.name, ''))), 'B')
+    || setweight(to_tsvector('french', unaccent(coalesce(s.notes, ''))), 'C')
+FROM core_session s LEFT JOIN core_location l ON l.id = s.location_id
+WHERE t.id = s.id
+"""
+
+SQLITE_INDEX_SQL = """
+INSERT INTO core_session_fts (rowid, grp, location, notes)
+SELECT s.id, coalesce(s."group", ''), coalesce(l.name, ''), coalesce(s.notes, '')
+FROM core_session s LEFT JOIN core_location l ON l.id = s.location_id
+"""
+
+
+def create_search_backend(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        schema_editor.execute(
+            "ALTER TABLE core_session ADD COLUMN search_document tsvector"
+        )
+        schema_editor.execute(
+            "CREATE INDEX core_session_search_document_gin "
+            "ON core_session USING gin (search_document)"
+        )
+        schema_editor.execute(PG_INDEX_SQL)
+    else:
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE core_session_fts USING fts5("
+            "grp, location, notes, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(SQLITE_INDEX_SQL)
+
+
+def drop_search_backend(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("ALTER TABLE core_session DROP COLUMN search_document")
+    else:
+        schema_editor.execute("DROP TABLE core_session_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_member_search_name"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_backend, drop_search_backend),
+    ]
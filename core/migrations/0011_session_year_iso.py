@@ -0,0 +1,33 @@
+from zoneinfo import ZoneInfo
+
+from django.db import migrations, models
+
+# fuseau figé à la date de la migration (ne pas importer core.utils ici)
+PARIS_TZ = ZoneInfo("Europe/Paris")
+
+
+def fill_iso_week(apps, schema_editor):
+    Session = apps.get_model("core", "Session")
+    sessions = list(Session.objects.only("pk", "start_at"))
+    for s in sessions:
+        s.year_iso, s.week_iso, _ = s.start_at.astimezone(PARIS_TZ).isocalendar()
+    Session.objects.bulk_update(sessions, ["year_iso", "week_iso"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_session_fulltext"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="session",
+            name="year_iso",
+            field=models.PositiveSmallIntegerField(
+                default=0, editable=False, verbose_name="Année ISO"
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_iso_week, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_session_year_iso"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Closure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start_date", models.DateField(verbose_name="Du")),
+                ("end_date", models.DateField(verbose_name="Au (inclus)")),
+                (
+                    "reason",
+                    models.CharField(blank=True, max_length=150, verbose_name="Motif"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="closures",
+                        to="core.category",
+                        verbose_name="Catégorie",
+                    ),
+                ),
+                (
+                    "location",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="closures",
+                        to="core.location",
+                        verbose_name="Lieu",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Fermeture",
+                "verbose_name_plural": "Fermetures",
+                "ordering": ["-start_date"],
+                "indexes": [
+                    models.Index(
+                        fields=["start_date", "end_date"],
+                        name="core_closur_start_d_e04a13_idx",
+                    )
+                ],
+            },
+        ),
+    ]
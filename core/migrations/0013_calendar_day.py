@@ -0,0 +1,95 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:40
+
+from zoneinfo import ZoneInfo
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# fuseau figé à la date de la migration (ne pas importer core.utils ici)
+PARIS_TZ = ZoneInfo("Europe/Paris")
+
+
+def fill_local_date(apps, schema_editor):
+    Session = apps.get_model("core", "Session")
+    sessions = list(Session.objects.only("pk", "start_at"))
+    for s in sessions:
+        s.day_id = s.start_at.astimezone(PARIS_TZ).date()
+    Session.objects.bulk_update(sessions, ["day"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_closure"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CalendarDay",
+            fields=[
+                ("date", models.DateField(primary_key=True, serialize=False)),
+                (
+                    "year_iso",
+                    models.PositiveSmallIntegerField(verbose_name="Année ISO"),
+                ),
+                (
+                    "week_iso",
+                    models.PositiveSmallIntegerField(verbose_name="Semaine ISO"),
+                ),
+                (
+                    "weekday",
+                    models.PositiveSmallIntegerField(
+                        verbose_name="Jour ISO (1 = lundi)"
+                    ),
+                ),
+                (
+                    "parity",
+                    models.CharField(
+                        choices=[("even", "Paire"), ("odd", "Impaire")],
+                        max_length=4,
+                        verbose_name="Parité",
+                    ),
+                ),
+                ("season", models.PositiveSmallIntegerField(verbose_name="Saison")),
+                (
+                    "is_public_holiday",
+                    models.BooleanField(default=False, verbose_name="Férié"),
+                ),
+                (
+                    "is_school_holiday",
+                    models.BooleanField(
+                        default=False, verbose_name="Vacances scolaires"
+                    ),
+                ),
+                ("holiday_name", models.CharField(blank=True, max_length=100)),
+            ],
+            options={
+                "verbose_name": "Jour",
+                "verbose_name_plural": "Calendrier",
+                "ordering": ["date"],
+                "indexes": [
+                    models.Index(
+                        fields=["year_iso", "week_iso"],
+                        name="core_calend_year_is_fe5323_idx",
+                    ),
+                    models.Index(
+                        fields=["season"], name="core_calend_season_3ab25e_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="session",
+            name="day",
+            field=models.ForeignKey(
+                db_column="local_date",
+                db_constraint=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="sessions",
+                to="core.calendarday",
+            ),
+        ),
+        migrations.RunPython(fill_local_date, migrations.RunPython.noop),
+    ]
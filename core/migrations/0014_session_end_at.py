@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:42
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def fill_end_at(apps, schema_editor):
+    Session = apps.get_model("core", "Session")
+    sessions = list(Session.objects.only("pk", "start_at", "duration_min"))
+    for s in sessions:
+        s.end_at = s.start_at + timedelta(minutes=s.duration_min)
+    Session.objects.bulk_update(sessions, ["end_at"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_calendar_day"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="session",
+            name="end_at",
+            field=models.DateTimeField(editable=False, null=True, verbose_name="Fin"),
+        ),
+        migrations.RunPython(fill_end_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_session_end_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="session",
+            name="session_loc_upcoming_idx",
+        ),
+        migrations.AddField(
+            model_name="location",
+            name="capacity",
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                help_text="Nombre maximum de séances simultanées. Vide : pas de contrôle.",
+                null=True,
+                verbose_name="Capacité",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                condition=models.Q(("is_cancelled", False)),
+                fields=["location", "start_at", "end_at"],
+                name="session_loc_interval_idx",
+            ),
+        ),
+    ]
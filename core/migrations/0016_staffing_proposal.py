@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_location_capacity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StaffingProposal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cost", models.PositiveIntegerField(verbose_name="Coût")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "coach",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="staffing_proposals",
+                        to="core.member",
+                        verbose_name="Encadrant",
+                    ),
+                ),
+                (
+                    "session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="staffing_proposals",
+                        to="core.session",
+                        verbose_name="Séance",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Proposition d'encadrement",
+                "verbose_name_plural": "Propositions d'encadrement",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("session", "coach"), name="unique_proposal_per_session"
+                    )
+                ],
+            },
+        ),
+    ]
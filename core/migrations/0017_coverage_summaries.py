@@ -0,0 +1,116 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_staffing_proposal"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CoachMonthlyLoad",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(verbose_name="Mois")),
+                ("sessions", models.PositiveIntegerField(verbose_name="Séances")),
+                ("minutes", models.PositiveIntegerField(verbose_name="Minutes")),
+                (
+                    "coach",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="monthly_loads",
+                        to="core.member",
+                        verbose_name="Encadrant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Charge mensuelle",
+                "verbose_name_plural": "Charges mensuelles",
+                "ordering": ["month", "coach"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("coach", "month"), name="unique_coach_month_load"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="WeeklyCoverage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "year_iso",
+                    models.PositiveSmallIntegerField(verbose_name="Année ISO"),
+                ),
+                (
+                    "week_iso",
+                    models.PositiveSmallIntegerField(verbose_name="Semaine ISO"),
+                ),
+                ("sessions", models.PositiveIntegerField(verbose_name="Séances")),
+                (
+                    "covered",
+                    models.PositiveIntegerField(verbose_name="Encadrées au minimum"),
+                ),
+                (
+                    "confirmed",
+                    models.PositiveIntegerField(verbose_name="Inscriptions confirmées"),
+                ),
+                (
+                    "required",
+                    models.PositiveIntegerField(verbose_name="Encadrants requis"),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.category",
+                        verbose_name="Catégorie",
+                    ),
+                ),
+                (
+                    "location",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.location",
+                        verbose_name="Lieu",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Encadrement par semaine",
+                "verbose_name_plural": "Encadrement par semaine",
+                "ordering": ["year_iso", "week_iso"],
+                "indexes": [
+                    models.Index(
+                        fields=["year_iso", "week_iso"],
+                        name="core_weekly_year_is_b3ef70_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,10 +1,11 @@
 # pyright: reportAttributeAccessIssue=false
 import uuid
+from datetime import timedelta
 
-from core.utils import PARIS_TZ, normalize_string
+from core.utils import PARIS_TZ, normalize_search, normalize_string
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils import formats, timezone
 
 User = get_user_model()
@@ -14,13 +15,54 @@ User = get_user_model()
 # -----------------------------------------------------------
 
 
+# Bits 0..62 réservés aux catégories ; un coach principal a tous les bits
+# (y compris le bit de signe), ce qui le distingue d'un coach multi-qualifié.
+MAX_CATEGORY_BITS = 63
+HEAD_COACH_MASK = -1
+
+# une séance dure au plus un jour : borne les recherches d'intervalle sur start_at
+MAX_DURATION_MIN = 24 * 60
+
+
 class Category(models.Model):
     code = models.CharField(max_length=50, unique=True)
     label = models.CharField(max_length=150)
+    bit = models.PositiveSmallIntegerField(
+        "Bit d'éligibilité", unique=True, null=True, editable=False
+    )
 
     def __str__(self):
         return self.label
 
+    @property
+    def mask(self) -> int:
+        # sans bit (bulk_create, fixture brute) : aucun coach qualifié
+        return 0 if self.bit is None else 1 << self.bit
+
+    def save(self, *args, **kwargs):
+        if self.bit is not None:
+            return super().save(*args, **kwargs)
+        # premier bit libre ; deux créations simultanées peuvent viser le même,
+        # la contrainte d'unicité départage et le perdant prend le suivant
+        for _ in range(MAX_CATEGORY_BITS):
+            used = set(Category.objects.exclude(bit=None).values_list("bit", flat=True))
+            self.bit = next(
+                (b for b in range(MAX_CATEGORY_BITS) if b not in used), None
+            )
+            if self.bit is None:
+                raise ValidationError(
+                    f"Nombre maximum de catégories atteint ({MAX_CATEGORY_BITS})."
+                )
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                taken = Category.objects.filter(bit=self.bit).exists()
+                self.bit = None
+                if not taken:  # autre contrainte (code en double)
+                    raise
+        raise ValidationError("Aucun bit d'éligibilité libre n'a pu être attribué.")
+
     class Meta:
         verbose_name = "Catégorie"
         verbose_name_plural = "Catégories"
@@ -29,6 +71,12 @@ class Category(models.Model):
 class Location(models.Model):
     name = models.CharField("Nom", max_length=100, unique=True)
     address = models.CharField("Adresse", max_length=200, blank=True, null=True)
+    capacity = models.PositiveSmallIntegerField(
+        "Capacité",
+        null=True,
+        blank=True,
+        help_text="Nombre maximum de séances simultanées. Vide : pas de contrôle.",
+    )
 
     class Meta:
         ordering = ["name"]
@@ -52,6 +100,12 @@ class Member(models.Model):
     qualifications = models.ManyToManyField(
         Category, verbose_name="Peut encadrer", blank=True, related_name="coaches"
     )
+    # Bits des catégories de `qualifications`, HEAD_COACH_MASK pour un coach
+    # principal. Tenu à jour par les signaux m2m (voir core.signals).
+    eligibility_mask = models.BigIntegerField(default=0, editable=False)
+    # "prénom nom" sans accents ni majuscules, pour la recherche par nom
+    # (index trigramme sous PostgreSQL, voir migration 0009)
+    search_name = models.CharField(max_length=201, default="", editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -69,6 +123,62 @@ class Member(models.Model):
     def __str__(self):
         return self.first_name + " " + self.last_name
 
+    def compute_eligibility_mask(self) -> int:
+        if self.is_head_coach:
+            return HEAD_COACH_MASK
+        if self.pk is None:
+            return 0
+        mask = 0
+        for bit in self.qualifications.exclude(bit=None).values_list("bit", flat=True):
+            mask |= 1 << bit
+        return mask
+
+    def save(self, *args, **kwargs):
+        self.eligibility_mask = self.compute_eligibility_mask()
+        self.search_name = normalize_search(f"{self.first_name} {self.last_name}")
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if "is_head_coach" in update_fields:
+                update_fields.add("eligibility_mask")
+            if update_fields & {"first_name", "last_name"}:
+                update_fields.add("search_name")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
+
+class CalendarDay(models.Model):
+    """
+    Dimension calendrier (dates locales Paris) : semaine ISO, parité, saison,
+    jours fériés et vacances. Remplie par `populate_calendar`, jointe depuis
+    Session.day pour filtrer et générer les séries en SQL.
+    """
+
+    PARITY_CHOICES = [("even", "Paire"), ("odd", "Impaire")]
+
+    date = models.DateField(primary_key=True)
+    year_iso = models.PositiveSmallIntegerField("Année ISO")
+    week_iso = models.PositiveSmallIntegerField("Semaine ISO")
+    weekday = models.PositiveSmallIntegerField("Jour ISO (1 = lundi)")
+    parity = models.CharField("Parité", max_length=4, choices=PARITY_CHOICES)
+    # saison sportive du 1er août au 31 juillet, désignée par son année de début
+    season = models.PositiveSmallIntegerField("Saison")
+    is_public_holiday = models.BooleanField("Férié", default=False)
+    is_school_holiday = models.BooleanField("Vacances scolaires", default=False)
+    holiday_name = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        verbose_name = "Jour"
+        verbose_name_plural = "Calendrier"
+        ordering = ["date"]
+        indexes = [
+            models.Index(fields=["year_iso", "week_iso"]),
+            models.Index(fields=["season"]),
+        ]
+
+    def __str__(self):
+        return self.date.isoformat()
+
 
 class Recurrence(models.Model):
     MODE_CHOICES = [
@@ -104,6 +214,8 @@ class Session(models.Model):
     )
     start_at = models.DateTimeField("Jour et Horaire")
     duration_min = models.PositiveIntegerField("Durée en minute", default=60)
+    # start_at + duration_min, pour les recherches de chevauchement en SQL
+    end_at = models.DateTimeField("Fin", null=True, editable=False)
     location = models.ForeignKey(
         Location,
         verbose_name="Lieu",
@@ -143,6 +255,18 @@ class Session(models.Model):
     week_iso = models.PositiveSmallIntegerField(
         "Numéro de Semaine", db_index=True, editable=False
     )
+    year_iso = models.PositiveSmallIntegerField("Année ISO", editable=False)
+    # jour local Paris ; clé de jointure vers le calendrier, sans contrainte
+    # pour ne pas dépendre de son remplissage
+    day = models.ForeignKey(
+        CalendarDay,
+        db_column="local_date",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="sessions",
+        null=True,
+        editable=False,
+    )
 
     # -------------------------------------------------------
     # Properties & Computed fields
@@ -168,7 +292,7 @@ class Session(models.Model):
         super().clean()
 
         # Cohérence durée
-        if self.duration_min <= 0:
+        if not 0 < self.duration_min <= MAX_DURATION_MIN:
             raise ValidationError({"duration_min": "Durée invalide."})
 
     def __str__(self):
@@ -180,14 +304,37 @@ class Session(models.Model):
         ordering = ["-start_at"]
         indexes = [
             models.Index(fields=["start_at"]),  #  tri chronologique
-            models.Index(fields=["is_cancelled"]),  # filtres is_cancelled=False
             models.Index(fields=["category"]),  # filtrage par cat
             models.Index(fields=["location"]),  # filtrage par lieu (loc_id=)
+            models.Index(fields=["updated_at"]),  # synchro incrémentale (API changes)
+            # Pages publiques : is_cancelled=False, start_at >= now, tri (start_at, pk)
+            models.Index(
+                fields=["start_at", "id"],
+                condition=models.Q(is_cancelled=False),
+                name="session_upcoming_idx",
+            ),
+            models.Index(
+                fields=["category", "start_at"],
+                condition=models.Q(is_cancelled=False),
+                name="session_cat_upcoming_idx",
+            ),
+            # filtre par lieu et recherche d'intervalle par lieu (capacité)
+            models.Index(
+                fields=["location", "start_at", "end_at"],
+                condition=models.Q(is_cancelled=False),
+                name="session_loc_interval_idx",
+            ),
         ]
 
+    def set_computed_fields(self):
+        """Fin, jour, année et numéro de semaine ISO (heure de Paris) de la séance."""
+        self.end_at = self.start_at + timedelta(minutes=self.duration_min)
+        local = self.start_at.astimezone(PARIS_TZ)
+        self.year_iso, self.week_iso, _ = local.isocalendar()
+        self.day_id = local.date()
+
     def save(self, *args, **kwargs):
-        self.week_iso = self.start_at.astimezone(PARIS_TZ).isocalendar()[1]
-        # met à jour le numéro de semaine avant sauvegarde
+        self.set_computed_fields()
         super().save(*args, **kwargs)
 
 
@@ -204,6 +351,7 @@ class CoachAssignment(models.Model):
         max_length=20, choices=STATUS_CHOICES, default="confirmed"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         constraints = [
@@ -211,6 +359,11 @@ class CoachAssignment(models.Model):
                 fields=["session", "coach"], name="unique_coach_per_session"
             )
         ]
+        indexes = [
+            models.Index(fields=["updated_at"]),  # synchro incrémentale (API changes)
+            models.Index(fields=["coach", "status"]),  # page coach
+            models.Index(fields=["session", "status"]),  # inscrits confirmés
+        ]
         verbose_name = "Séance×Coach"
         verbose_name_plural = "Séance×Coach"
 
@@ -218,6 +371,192 @@ class CoachAssignment(models.Model):
         return f"{self.coach} → {self.session} ({self.status})"
 
 
+class Closure(models.Model):
+    """
+    Fermeture (travaux, vacances scolaires) d'un lieu et/ou d'une catégorie
+    sur une plage de dates locales Paris, bornes incluses. Un champ vide
+    couvre tous les lieux (ou toutes les catégories).
+    """
+
+    location = models.ForeignKey(
+        Location,
+        verbose_name="Lieu",
+        on_delete=models.CASCADE,
+        related_name="closures",
+        null=True,
+        blank=True,
+    )
+    category = models.ForeignKey(
+        Category,
+        verbose_name="Catégorie",
+        on_delete=models.CASCADE,
+        related_name="closures",
+        null=True,
+        blank=True,
+    )
+    start_date = models.DateField("Du")
+    end_date = models.DateField("Au (inclus)")
+    reason = models.CharField("Motif", max_length=150, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Fermeture"
+        verbose_name_plural = "Fermetures"
+        ordering = ["-start_date"]
+        indexes = [
+            # recherche d'intervalle : start_date <= jour <= end_date
+            models.Index(fields=["start_date", "end_date"]),
+        ]
+
+    def __str__(self):
+        scope = " / ".join(str(x) for x in (self.location, self.category) if x)
+        return f"{scope} : {self.start_date:%d/%m/%Y} → {self.end_date:%d/%m/%Y}"
+
+    def clean(self):
+        super().clean()
+        if self.location_id is None and self.category_id is None:
+            raise ValidationError("Indiquez un lieu, une catégorie ou les deux.")
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError(
+                {"end_date": "La date de fin précède la date de début."}
+            )
+
+
+class StaffingProposal(models.Model):
+    """Inscription proposée par l'encadrement automatique, à valider dans l'admin."""
+
+    session = models.ForeignKey(
+        Session,
+        verbose_name="Séance",
+        on_delete=models.CASCADE,
+        related_name="staffing_proposals",
+    )
+    coach = models.ForeignKey(
+        Member,
+        verbose_name="Encadrant",
+        on_delete=models.CASCADE,
+        related_name="staffing_proposals",
+    )
+    # coût retenu par le calcul : plus il est bas, moins le coach est chargé
+    cost = models.PositiveIntegerField("Coût")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Proposition d'encadrement"
+        verbose_name_plural = "Propositions d'encadrement"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session", "coach"], name="unique_proposal_per_session"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.coach} → {self.session}"
+
+
+class WeeklyCoverage(models.Model):
+    """
+    Synthèse de l'encadrement par semaine ISO, catégorie et lieu (séances
+    actives). Tenue à jour par core.services.summaries, reconstruite par
+    `rebuild_summaries`.
+    """
+
+    year_iso = models.PositiveSmallIntegerField("Année ISO")
+    week_iso = models.PositiveSmallIntegerField("Semaine ISO")
+    category = models.ForeignKey(
+        Category,
+        verbose_name="Catégorie",
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="+",
+    )
+    location = models.ForeignKey(
+        Location,
+        verbose_name="Lieu",
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="+",
+    )
+    sessions = models.PositiveIntegerField("Séances")
+    covered = models.PositiveIntegerField("Encadrées au minimum")
+    confirmed = models.PositiveIntegerField("Inscriptions confirmées")
+    required = models.PositiveIntegerField("Encadrants requis")
+
+    class Meta:
+        verbose_name = "Encadrement par semaine"
+        verbose_name_plural = "Encadrement par semaine"
+        ordering = ["year_iso", "week_iso"]
+        indexes = [models.Index(fields=["year_iso", "week_iso"])]
+
+    def __str__(self):
+        return f"{self.year_iso}-S{self.week_iso:02d} {self.category or '—'} {self.location or '—'}"
+
+
+class CoachMonthlyLoad(models.Model):
+    """Inscriptions confirmées d'un coach par mois (séances actives, mois de Paris)."""
+
+    coach = models.ForeignKey(
+        Member,
+        verbose_name="Encadrant",
+        on_delete=models.CASCADE,
+        related_name="monthly_loads",
+    )
+    month = models.DateField("Mois")  # premier jour du mois
+    sessions = models.PositiveIntegerField("Séances")
+    minutes = models.PositiveIntegerField("Minutes")
+
+    class Meta:
+        verbose_name = "Charge mensuelle"
+        verbose_name_plural = "Charges mensuelles"
+        ordering = ["month", "coach"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["coach", "month"], name="unique_coach_month_load"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.coach} {self.month:%m/%Y}"
+
+
+class Tombstone(models.Model):
+    """
+    Trace d'une suppression définitive (séance ou inscription), pour que les
+    clients qui synchronisent par delta puissent retirer l'objet de leur copie.
+    """
+
+    KIND_CHOICES = [("session", "Séance"), ("assignment", "Séance×Coach")]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Suppression"
+        verbose_name_plural = "Suppressions"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id} supprimé(e)"
+
+
+class DataVersion(models.Model):
+    """
+    Compteur de version par famille de données, incrémenté par des triggers
+    SQL dans la transaction de chaque écriture. Sert à invalider les caches
+    locaux des différents workers (voir core.services.invalidation).
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Version des données"
+        verbose_name_plural = "Versions des données"
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
 # class AuditLog(models.Model):
 #     ACTION_CHOICES = [
 #         ("create_session", "Création séance"),
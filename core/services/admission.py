@@ -0,0 +1,118 @@
+# core/services/admission.py
+
+import threading
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+# -----------------------------------------------------------
+# Contrôle d'admission des vues publiques
+# -----------------------------------------------------------
+# Chaque classe de vues a un nombre maximum de requêtes en cours par
+# processus. Au-delà :
+# - lecture : page servie périmée depuis le cache des pages (compression),
+#   sinon 503 immédiat ;
+# - écriture : attente bornée d'une place (ADMISSION_WRITE_WAIT), puis 503.
+# Les vues non listées (admin, flux live, statiques) ne sont pas limitées.
+
+VIEW_CLASSES = {
+    "public_homepage": "read",
+    "public_sessions_by_category": "read",
+    "coach_page": "read",
+    "public_search": "read",
+    "public_category_calendar": "read",
+    "coach_calendar": "read",
+    "public_changes": "read",
+    "assign_confirm": "read",
+    "unassign_confirm": "read",
+    "assign_do": "write",
+    "unassign_do": "write",
+}
+
+COUNTERS = ("admitted", "served_stale", "rejected", "wait_timeouts")
+
+
+class Gate:
+    """Sémaphore d'une classe de vues et ses compteurs."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.slots = threading.BoundedSemaphore(limit)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.counts = dict.fromkeys(COUNTERS, 0)
+
+    def _admitted(self):
+        with self.lock:
+            self.in_flight += 1
+            self.counts["admitted"] += 1
+
+    def try_enter(self) -> bool:
+        if not self.slots.acquire(blocking=False):
+            return False
+        self._admitted()
+        return True
+
+    def enter(self, timeout: float) -> bool:
+        """Attend une place au plus `timeout` secondes."""
+        if self.try_enter():
+            return True
+        with self.lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            ok = self.slots.acquire(timeout=timeout)
+        finally:
+            with self.lock:
+                self.waiting -= 1
+        if ok:
+            self._admitted()
+        else:
+            self.count("wait_timeouts")
+        return ok
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def count(self, counter: str):
+        with self.lock:
+            self.counts[counter] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "queue_depth": self.waiting,
+                "max_queue_depth": self.max_waiting,
+                **self.counts,
+            }
+
+
+_gates: dict[str, Gate] = {}
+_gates_lock = threading.Lock()
+
+
+def gate(name: str) -> Gate:
+    with _gates_lock:
+        if name not in _gates:
+            _gates[name] = Gate(name, settings.ADMISSION_LIMITS[name])
+        return _gates[name]
+
+
+def view_class(path: str) -> str | None:
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+    return VIEW_CLASSES.get(match.url_name)
+
+
+def metrics() -> dict:
+    """Compteurs du processus courant, par classe de vues."""
+    return {name: gate(name).snapshot() for name in settings.ADMISSION_LIMITS}
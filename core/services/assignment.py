@@ -0,0 +1,38 @@
+# core/services/assignment.py
+
+from core.models import CoachAssignment, Member, Session
+from django.db import transaction
+
+from .eligibility import can_coach
+from .live import publish_coverage
+
+
+def is_eligible(coach: Member, session: Session) -> bool:
+    """Un coach peut encadrer la séance s'il est coach principal ou qualifié pour sa catégorie."""
+    return can_coach(coach.eligibility_mask, session.category_id)
+
+
+@transaction.atomic
+def assign_coach(session: Session, coach: Member) -> CoachAssignment:
+    """Inscrit (ou réinscrit) le coach sur la séance. L'éligibilité est vérifiée par l'appelant."""
+    ca, created = CoachAssignment.objects.get_or_create(
+        session=session, coach=coach, defaults={"status": "confirmed"}
+    )
+    if not created:
+        ca.status = "confirmed"
+        ca.save()
+    publish_coverage(session.pk)
+    return ca
+
+
+@transaction.atomic
+def unassign_coach(session_id, coach_id) -> CoachAssignment | None:
+    """Désinscrit le coach de la séance, s'il y était inscrit."""
+    ca = CoachAssignment.objects.filter(
+        session_id=session_id, coach_id=coach_id, status="confirmed"
+    ).first()
+    if ca:
+        ca.status = "withdrawn"
+        ca.save(update_fields=["status", "updated_at"])
+        publish_coverage(ca.session_id)
+    return ca
@@ -0,0 +1,174 @@
+# core/services/bulk.py
+
+from datetime import timedelta
+
+from core.models import HEAD_COACH_MASK, CoachAssignment, Location, Member, Session
+from core.utils import PARIS_TZ
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from . import capacity, overlap, refdata, summaries
+from .search import reindex_sessions
+
+# -----------------------------------------------------------
+# Actions en masse sur des séances ou leurs séries
+# -----------------------------------------------------------
+# Chaque action est une transaction de quelques requêtes ensemblistes
+# (UPDATE / DELETE sur le queryset), quel que soit le nombre de séances,
+# et renvoie le nombre de lignes touchées. update() contourne auto_now :
+# updated_at est daté explicitement pour l'API changes et le flux live.
+
+
+SCOPE_CHOICES = [
+    ("selection", "Séances sélectionnées"),
+    ("series", "Séances sélectionnées et occurrences suivantes de leurs séries"),
+]
+
+
+def with_series(qs):
+    """
+    Séances de `qs` et, pour chacune en série, les occurrences suivantes
+    non verrouillées.
+    """
+    selected = Session.objects.filter(pk__in=qs.values("pk"))
+    later_in_series = Exists(
+        selected.filter(
+            recurrence_id=OuterRef("recurrence_id"), start_at__lte=OuterRef("start_at")
+        )
+    )
+    return Session.objects.filter(
+        Q(pk__in=qs.values("pk")) | Q(later_in_series, is_locked=False)
+    )
+
+
+def scoped(qs, scope: str):
+    """Queryset de travail, sans les annotations de la liste d'administration."""
+    if scope == "series":
+        return with_series(qs)
+    return Session.objects.filter(pk__in=qs.values("pk"))
+
+
+@transaction.atomic
+def set_cancelled(qs, cancelled: bool) -> tuple[int, list[Session]]:
+    """
+    Annule ou rétablit les séances. Renvoie (séances modifiées, séances en
+    chevauchement signalées par OVERLAP_POLICY="warn" au rétablissement).
+    """
+    sessions = list(
+        qs.exclude(is_cancelled=cancelled).select_related("category", "location")
+    )
+    ids = [s.pk for s in sessions]
+    overlapping = []
+    if not cancelled:
+        for s in sessions:
+            s.is_cancelled = False
+        capacity.check_sessions(sessions)
+        overlapping = overlap.check_sessions(sessions, between=True)
+    summaries.touch(ids)
+    count = Session.objects.filter(pk__in=ids).update(
+        is_cancelled=cancelled, updated_at=timezone.now()
+    )
+    return count, overlapping
+
+
+@transaction.atomic
+def shift_time(qs, minutes: int) -> tuple[int, list[Session]]:
+    """
+    Décale l'horaire de `minutes` ; refuse si une séance changeait de jour
+    (Paris). Renvoie (séances décalées, séances en chevauchement signalées
+    par OVERLAP_POLICY="warn").
+    """
+    delta = timedelta(minutes=minutes)
+    sessions = list(qs.select_related("category", "location"))
+    crossing = [
+        s.pk
+        for s in sessions
+        if (s.start_at + delta).astimezone(PARIS_TZ).date()
+        != s.start_at.astimezone(PARIS_TZ).date()
+    ]
+    if crossing:
+        raise ValidationError(
+            f"{len(crossing)} séance(s) changeraient de jour (ex. n° {crossing[0]}) : "
+            "rien n'a été modifié."
+        )
+    # séances à leur nouvel horaire, contrôlées avant l'écriture
+    for s in sessions:
+        s.start_at += delta
+        s.end_at += delta
+    capacity.check_sessions(sessions)
+    active = [s for s in sessions if not s.is_cancelled]
+    overlapping = overlap.check_sessions(active, between=False)
+    count = qs.update(
+        start_at=F("start_at") + delta,
+        end_at=F("end_at") + delta,
+        updated_at=timezone.now(),
+    )
+    return count, overlapping
+
+
+@transaction.atomic
+def replace_coach(qs, old: Member, new: Member) -> tuple[int, int, list[Session]]:
+    """
+    Remplace `old` par `new` dans les inscriptions confirmées des séances (les
+    désinscriptions de `old` restent à son nom). Si `new` s'était désinscrit
+    d'une séance, son inscription est reconfirmée. Renvoie (inscriptions
+    transférées, fusionnées : `new` avait déjà une inscription, séances en
+    chevauchement signalées par OVERLAP_POLICY="warn").
+    """
+    if old.pk == new.pk:
+        raise ValidationError("Choisissez deux encadrants différents.")
+    assignments = CoachAssignment.objects.filter(
+        session__in=qs, coach=old, status="confirmed"
+    )
+
+    if new.eligibility_mask != HEAD_COACH_MASK:
+        allowed = refdata.category_ids_for_mask(new.eligibility_mask)
+        refused = assignments.exclude(session__category_id__in=allowed).count()
+        if refused:
+            raise ValidationError(
+                f"{new} n'est pas qualifié pour {refused} séance(s) concernée(s) : "
+                "rien n'a été modifié."
+            )
+
+    # séances où `new` devient confirmé : même contrôle qu'à l'inscription
+    already_confirmed = CoachAssignment.objects.filter(
+        session=OuterRef("pk"), coach=new, status="confirmed"
+    )
+    overlapping = []
+    for session in (
+        Session.objects.filter(pk__in=assignments.values("session_id"))
+        .exclude(Exists(already_confirmed))
+        .order_by("start_at")
+    ):
+        overlapping += overlap.check_assignment(session, new)
+
+    summaries.touch(assignments.values_list("session_id", flat=True))
+    now = timezone.now()
+    existing = CoachAssignment.objects.filter(session=OuterRef("session"), coach=new)
+    # `new` désinscrit de la séance : une seule inscription par coach, on la reconfirme
+    CoachAssignment.objects.filter(
+        coach=new,
+        status="withdrawn",
+        session__in=assignments.values("session_id"),
+    ).update(status="confirmed", updated_at=now)
+    moved = assignments.exclude(Exists(existing)).update(coach=new, updated_at=now)
+    # restent celles où `new` avait déjà une inscription
+    merged, _ = assignments.delete()
+    return moved, merged, overlapping
+
+
+@transaction.atomic
+def change_location(qs, location: Location) -> int:
+    sessions = list(qs.exclude(location=location))
+    for s in sessions:
+        s.location = location
+    capacity.check_sessions(sessions)
+    ids = [s.pk for s in sessions]
+    summaries.touch(ids)
+    changed = Session.objects.filter(pk__in=ids).update(
+        location=location, updated_at=timezone.now()
+    )
+    reindex_sessions(ids)  # le lieu fait partie du document plein texte
+    return changed
@@ -0,0 +1,134 @@
+# core/services/calendar.py
+
+from datetime import date, datetime, timedelta
+
+from core.models import CalendarDay
+from core.utils import iter_weekly_occurrences, to_paris
+
+# -----------------------------------------------------------
+# Dimension calendrier
+# -----------------------------------------------------------
+# Une ligne par date locale Paris. Les calculs par date (semaine ISO,
+# parité, saison) sont faits une fois ici ; filtres et générations de
+# séries les lisent ensuite en SQL. Tant que le calendrier ne couvre pas
+# une période, la génération retombe sur le calcul Python (utils).
+
+
+def season_of(d: date) -> int:
+    """Saison sportive (année de début) : du 1er août au 31 juillet."""
+    return d.year if d.month >= 8 else d.year - 1
+
+
+def easter(year: int) -> date:
+    """Dimanche de Pâques (calendrier grégorien, algorithme de Meeus)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+
+def public_holidays(year: int) -> dict[date, str]:
+    """Jours fériés nationaux (métropole)."""
+    paques = easter(year)
+    return {
+        date(year, 1, 1): "Jour de l'an",
+        paques + timedelta(days=1): "Lundi de Pâques",
+        date(year, 5, 1): "Fête du travail",
+        date(year, 5, 8): "Victoire 1945",
+        paques + timedelta(days=39): "Ascension",
+        paques + timedelta(days=50): "Lundi de Pentecôte",
+        date(year, 7, 14): "Fête nationale",
+        date(year, 8, 15): "Assomption",
+        date(year, 11, 1): "Toussaint",
+        date(year, 11, 11): "Armistice 1918",
+        date(year, 12, 25): "Noël",
+    }
+
+
+def calendar_days(start: date, end: date, school_holidays=()) -> list[CalendarDay]:
+    """
+    Lignes du calendrier de `start` à `end` inclus.
+    - school_holidays : (début, fin incluse, nom) des vacances scolaires de la zone
+    """
+    holidays = {}
+    for year in range(start.year, end.year + 1):
+        holidays.update(public_holidays(year))
+    school = {}
+    for lo, hi, name in school_holidays:
+        for n in range((hi - lo).days + 1):
+            school[lo + timedelta(days=n)] = name
+
+    days = []
+    for n in range((end - start).days + 1):
+        d = start + timedelta(days=n)
+        year_iso, week_iso, weekday = d.isocalendar()
+        days.append(
+            CalendarDay(
+                date=d,
+                year_iso=year_iso,
+                week_iso=week_iso,
+                weekday=weekday,
+                parity="even" if week_iso % 2 == 0 else "odd",
+                season=season_of(d),
+                is_public_holiday=d in holidays,
+                is_school_holiday=d in school,
+                holiday_name=holidays.get(d) or school.get(d, ""),
+            )
+        )
+    return days
+
+
+def populate(start: date, end: date, school_holidays=()) -> int:
+    """Crée ou met à jour les jours de la période ; renvoie leur nombre."""
+    days = calendar_days(start, end, school_holidays)
+    CalendarDay.objects.bulk_create(
+        days,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["date"],
+        update_fields=[
+            "year_iso",
+            "week_iso",
+            "weekday",
+            "parity",
+            "season",
+            "is_public_holiday",
+            "is_school_holiday",
+            "holiday_name",
+        ],
+    )
+    return len(days)
+
+
+def covers(start: date, end: date) -> bool:
+    """Le calendrier contient-il tous les jours de [start, end] ?"""
+    expected = (end - start).days + 1
+    return CalendarDay.objects.filter(date__range=(start, end)).count() == expected
+
+
+def occurrence_dates(start_at: datetime, end_date: date, same_type: bool) -> list:
+    """
+    Dates locales des occurrences suivant `start_at` jusqu'à end_date incluse :
+    même jour de la semaine, et même parité de semaine ISO si same_type.
+    Une requête sur le calendrier s'il couvre la période, calcul Python sinon.
+    """
+    first = to_paris(start_at).date()
+    if first >= end_date:
+        return []
+    if not covers(first, end_date):
+        return [
+            dt.date()
+            for dt in iter_weekly_occurrences(start_at, end_date, same_type=same_type)
+        ]
+
+    days = CalendarDay.objects.filter(
+        date__gt=first, date__lte=end_date, weekday=first.isoweekday()
+    )
+    if same_type:
+        days = days.filter(parity=CalendarDay.objects.get(date=first).parity)
+    return list(days.order_by("date").values_list("date", flat=True))
@@ -0,0 +1,149 @@
+# core/services/capacity.py
+
+import heapq
+from collections import namedtuple
+from datetime import date, timedelta
+
+from core.models import MAX_DURATION_MIN, Location, Session
+from django.core.exceptions import ValidationError
+from django.utils import formats, timezone
+
+from .calendar import season_of
+from .closures import day_start
+
+# -----------------------------------------------------------
+# Capacité des lieux
+# -----------------------------------------------------------
+# Un lieu avec une capacité accueille au plus `capacity` séances actives
+# simultanées. Les séances candidates (création, modification, série) sont
+# confrontées aux séances existantes du lieu lues en une requête de plage
+# sur l'index (location, start_at, end_at), puis balayées dans le temps.
+
+LocationConflict = namedtuple("LocationConflict", "location_id start_at keys")
+
+MAX_DURATION = timedelta(minutes=MAX_DURATION_MIN)
+
+
+def over_capacity(intervals, capacity: int):
+    """
+    Instants de dépassement parmi des (clé, début, fin) triés par début :
+    (début, clés des séances alors en cours) dès que leur nombre dépasse capacity.
+    """
+    active = []  # (fin, ordre, clé) : l'ordre évite de comparer les clés
+    for n, (key, start, end) in enumerate(intervals):
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        heapq.heappush(active, (end, n, key))
+        if len(active) > capacity:
+            yield start, [k for _, _, k in active]
+
+
+def existing_intervals(location_id, lo, hi, exclude_ids=()):
+    """Séances actives du lieu qui recoupent [lo, hi[, en (pk, début, fin)."""
+    return (
+        Session.objects.filter(
+            location_id=location_id,
+            is_cancelled=False,
+            start_at__gte=lo - MAX_DURATION,
+            start_at__lt=hi,
+            end_at__gt=lo,
+        )
+        .exclude(pk__in=exclude_ids)
+        .values_list("pk", "start_at", "end_at")
+    )
+
+
+def location_conflicts(location: Location | None, candidates, exclude_ids=()):
+    """
+    Dépassements de capacité causés par des séances candidates.
+    - candidates : (clé, début, fin) ; clés distinctes des pk existants
+    - exclude_ids : séances existantes remplacées par les candidates
+    """
+    if location is None or location.capacity is None or not candidates:
+        return []
+    lo = min(start for _, start, _ in candidates)
+    hi = max(end for _, _, end in candidates)
+    intervals = sorted(
+        [*existing_intervals(location.pk, lo, hi, exclude_ids), *candidates],
+        key=lambda i: i[1],
+    )
+    new = {key for key, _, _ in candidates}
+    return [
+        LocationConflict(location.pk, start, keys)
+        for start, keys in over_capacity(intervals, location.capacity)
+        if any(k in new for k in keys)
+    ]
+
+
+def check_capacity(location: Location | None, candidates, exclude_ids=()):
+    """ValidationError décrivant les dépassements, s'il y en a."""
+    conflicts = location_conflicts(location, candidates, exclude_ids)
+    if not conflicts:
+        return
+    titles = Session.objects.select_related("category", "location").in_bulk(
+        {k for c in conflicts for k in c.keys if isinstance(k, int)}
+    )
+    lines = []
+    for c in conflicts[:5]:
+        others = ", ".join(str(titles[k]) for k in c.keys if k in titles)
+        when = formats.date_format(timezone.localtime(c.start_at), "D d/m/Y H:i")
+        lines.append(f"{when} : {others or 'séances de la série'}")
+    more = f" (et {len(conflicts) - 5} autres)" if len(conflicts) > 5 else ""
+    raise ValidationError(
+        f"{location} accueille au plus {location.capacity} séance(s) à la fois. "
+        f"Dépassement{more} : " + " ; ".join(lines)
+    )
+
+
+def check_sessions(sessions):
+    """
+    check_capacity pour des séances modifiées en masse (lieu, horaire,
+    rétablissement), avant l'écriture : `sessions` portent leurs nouvelles
+    valeurs ; elles sont les candidates et leurs pk sont exclus des séances
+    existantes, qui sont encore à l'ancienne position en base.
+    """
+    by_location = {}
+    for s in sessions:
+        if s.location_id and not s.is_cancelled:
+            by_location.setdefault(s.location_id, []).append(
+                (s.pk, s.start_at, s.end_at)
+            )
+    if not by_location:
+        return
+    exclude_ids = [s.pk for s in sessions]
+    for location in Location.objects.filter(pk__in=by_location).exclude(capacity=None):
+        check_capacity(location, by_location[location.pk], exclude_ids)
+
+
+def season_conflicts(season: int | None = None) -> list[LocationConflict]:
+    """Dépassements de capacité de la saison, pour tous les lieux limités."""
+    if season is None:
+        season = season_of(date.today())
+    capacities = dict(
+        Location.objects.exclude(capacity=None).values_list("pk", "capacity")
+    )
+    rows = (
+        Session.objects.filter(
+            location_id__in=capacities,
+            is_cancelled=False,
+            start_at__gte=day_start(date(season, 8, 1)),
+            start_at__lt=day_start(date(season + 1, 8, 1)),
+        )
+        .order_by("location_id", "start_at")
+        .values_list("location_id", "pk", "start_at", "end_at")
+        .iterator(chunk_size=5000)
+    )
+
+    conflicts, location, intervals = [], None, []
+
+    def flush():
+        for start, keys in over_capacity(intervals, capacities.get(location, 0)):
+            conflicts.append(LocationConflict(location, start, keys))
+
+    for location_id, pk, start, end in rows:
+        if location_id != location:
+            flush()
+            location, intervals = location_id, []
+        intervals.append((pk, start, end))
+    flush()
+    return conflicts
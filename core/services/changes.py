@@ -0,0 +1,133 @@
+# core/services/changes.py
+
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from core.models import CoachAssignment, Session, Tombstone
+from django.conf import settings
+from django.utils import timezone
+
+# -----------------------------------------------------------
+# Jeton de synchronisation
+# -----------------------------------------------------------
+# Le jeton est un horodatage en microsecondes depuis l'epoch (UTC) :
+# croissant, opaque pour le client, et directement comparable à `updated_at`.
+# Il est renvoyé avec un retard de CHANGES_SAFETY_LAG secondes sur l'instant
+# de lecture : une ligne horodatée juste avant la lecture mais dont la
+# transaction est validée après reste ainsi dans la fenêtre suivante. Les
+# lignes récentes peuvent donc être renvoyées deux fois ; le client les
+# applique par id (dernier état reçu), ce qui rend la répétition sans effet.
+
+
+def encode_token(dt: datetime) -> str:
+    return str(int(dt.timestamp() * 1_000_000))
+
+
+def decode_token(token: str | None) -> datetime | None:
+    """
+    Renvoie le datetime correspondant au jeton, None si absent. ValueError si
+    invalide : hors des dates représentables, ou postérieur à maintenant (un
+    jeton émis par le serveur est toujours en retard sur l'horloge).
+    """
+    if not token:
+        return None
+    micros = int(token)
+    if micros < 0:
+        raise ValueError(f"Jeton invalide : {token}")
+    try:
+        since = datetime.fromtimestamp(micros / 1_000_000, tz=dt_timezone.utc)
+    except (OverflowError, OSError) as e:
+        raise ValueError(f"Jeton invalide : {token}") from e
+    if since > timezone.now():
+        raise ValueError(f"Jeton dans le futur : {token}")
+    return since
+
+
+# -----------------------------------------------------------
+# Calcul du delta
+# -----------------------------------------------------------
+
+
+def _session_payload(row: dict) -> dict:
+    return {
+        "id": row["id"],
+        "category": row["category__code"],
+        "start_at": row["start_at"].isoformat(),
+        "duration_min": row["duration_min"],
+        "location_id": row["location_id"],
+        "location": row["location__name"],
+        "group": row["group"],
+        "min_coaches": row["min_coaches"],
+        "is_cancelled": row["is_cancelled"],
+    }
+
+
+def _assignment_payload(row: dict) -> dict:
+    return {
+        "id": row["id"],
+        "session_id": row["session_id"],
+        "coach_id": row["coach_id"],
+        "coach": f"{row['coach__first_name']} {row['coach__last_name']}",
+        "status": row["status"],
+    }
+
+
+def get_changes(since: datetime | None, category_code: str | None = None) -> dict:
+    """
+    Renvoie les séances, inscriptions et suppressions modifiées après `since`.
+    - since=None : instantané initial (séances à venir et leurs inscriptions)
+    - category_code : restreint aux séances d'une catégorie ("all" = pas de filtre)
+    Le jeton renvoyé est à repasser tel quel au prochain appel ; il ne
+    recule jamais, mais reste en retard sur la lecture (voir plus haut).
+    """
+    now = timezone.now()
+    token_at = now - timedelta(seconds=settings.CHANGES_SAFETY_LAG)
+    if since is not None:
+        token_at = max(token_at, since)
+
+    sessions = Session.objects.all()
+    assignments = CoachAssignment.objects.all()
+    if since is None:
+        sessions = sessions.filter(start_at__gte=now)
+        assignments = assignments.filter(session__start_at__gte=now)
+    else:
+        sessions = sessions.filter(updated_at__gt=since, updated_at__lte=now)
+        assignments = assignments.filter(updated_at__gt=since, updated_at__lte=now)
+
+    if category_code and category_code != "all":
+        sessions = sessions.filter(category__code=category_code)
+        assignments = assignments.filter(session__category__code=category_code)
+
+    session_rows = sessions.order_by("updated_at", "pk").values(
+        "id",
+        "category__code",
+        "start_at",
+        "duration_min",
+        "location_id",
+        "location__name",
+        "group",
+        "min_coaches",
+        "is_cancelled",
+    )
+    assignment_rows = assignments.order_by("updated_at", "pk").values(
+        "id",
+        "session_id",
+        "coach_id",
+        "coach__first_name",
+        "coach__last_name",
+        "status",
+    )
+
+    deleted = {"session": [], "assignment": []}
+    if since is not None:
+        for kind, object_id in Tombstone.objects.filter(
+            deleted_at__gt=since, deleted_at__lte=now
+        ).values_list("kind", "object_id"):
+            deleted[kind].append(object_id)
+
+    return {
+        "token": encode_token(token_at),
+        "sessions": [_session_payload(r) for r in session_rows],
+        "assignments": [_assignment_payload(r) for r in assignment_rows],
+        "deleted": deleted,
+    }
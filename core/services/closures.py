@@ -0,0 +1,105 @@
+# core/services/closures.py
+
+import bisect
+from datetime import date, datetime, time, timedelta
+
+from core.models import Closure, CoachAssignment, Member, Session
+from core.utils import PARIS_TZ, to_paris
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from . import summaries
+
+# -----------------------------------------------------------
+# Fermetures : annulation en masse et garde de la génération
+# -----------------------------------------------------------
+# Une fermeture couvre les séances dont le jour (heure de Paris) est dans
+# [start_date, end_date], au lieu et/ou dans la catégorie indiqués.
+
+
+def day_start(d: date) -> datetime:
+    """Minuit heure de Paris, début du jour `d`."""
+    return datetime.combine(d, time.min, tzinfo=PARIS_TZ)
+
+
+def closure_q(closure: Closure) -> Q:
+    """Filtre des séances couvertes (plage start_at, indexée, + lieu / catégorie)."""
+    q = Q(
+        start_at__gte=day_start(closure.start_date),
+        start_at__lt=day_start(closure.end_date + timedelta(days=1)),
+    )
+    if closure.location_id:
+        q &= Q(location_id=closure.location_id)
+    if closure.category_id:
+        q &= Q(category_id=closure.category_id)
+    return q
+
+
+def covered_sessions(closure: Closure):
+    """Séances non verrouillées couvertes par la fermeture, annulées ou non."""
+    return Session.objects.filter(closure_q(closure), is_locked=False)
+
+
+@transaction.atomic
+def apply_closure(closure: Closure) -> int:
+    """Annule en un seul UPDATE les séances actives couvertes ; renvoie leur nombre."""
+    active = covered_sessions(closure).filter(is_cancelled=False)
+    summaries.touch(active.values_list("pk", flat=True))
+    return active.update(is_cancelled=True, updated_at=timezone.now())
+
+
+def affected_coaches(closure: Closure):
+    """
+    Encadrants confirmés sur les séances couvertes, à prévenir : Member
+    annotés de `closed_sessions` (nombre) et `first_closed` (première date).
+    """
+    assignments = CoachAssignment.objects.filter(
+        session__in=covered_sessions(closure), status="confirmed"
+    )
+    return (
+        Member.objects.filter(assignments__in=assignments)
+        .annotate(
+            closed_sessions=Count("assignments"),
+            first_closed=Min("assignments__session__start_at"),
+        )
+        .order_by("first_closed", "last_name", "first_name")
+    )
+
+
+class ClosedDays:
+    """
+    Jours fermés pour un lieu et une catégorie sur une période : une requête
+    d'intervalle (chevauchement avec la période), puis recherche dichotomique
+    par occurrence.
+    """
+
+    def __init__(self, location_id, category_id, start: date, end: date):
+        intervals = sorted(
+            Closure.objects.filter(start_date__lte=end, end_date__gte=start)
+            .filter(Q(location_id=location_id) | Q(location__isnull=True))
+            .filter(Q(category_id=category_id) | Q(category__isnull=True))
+            .values_list("start_date", "end_date")
+        )
+        # fusion des chevauchements : intervalles disjoints triés
+        self.starts, self.ends = [], []
+        for lo, hi in intervals:
+            if self.ends and lo <= self.ends[-1] + timedelta(days=1):
+                self.ends[-1] = max(self.ends[-1], hi)
+            else:
+                self.starts.append(lo)
+                self.ends.append(hi)
+
+    def __contains__(self, dt: datetime) -> bool:
+        d = to_paris(dt).date()
+        i = bisect.bisect_right(self.starts, d) - 1
+        return i >= 0 and d <= self.ends[i]
+
+    @classmethod
+    def for_session(cls, session: Session, end: date) -> "ClosedDays":
+        return cls(
+            session.location_id,
+            session.category_id,
+            to_paris(session.start_at).date(),
+            end,
+        )
@@ -0,0 +1,141 @@
+# core/services/compression.py
+
+import gzip
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+
+from .invalidation import versions_for
+
+try:
+    import brotli
+except ImportError:  # optionnel : gzip seul
+    brotli = None
+
+# -----------------------------------------------------------
+# Pages publiques compressées et mises en cache
+# -----------------------------------------------------------
+# Le rendu d'une page est mis en cache avec la version des familles de
+# données dont elle dépend ; les variantes gzip / brotli sont calculées à la
+# première demande et stockées dans la même entrée. Une page chaude est donc
+# rendue et compressée une fois par version de données (et au plus toutes
+# les PUBLIC_PAGE_CACHE_SECONDS, les séances passées sortant des listes).
+# Les réponses en streaming (?all=1) sont compressées au fil de l'eau (gzip).
+# Les entrées restent PUBLIC_PAGE_STALE_SECONDS en cache : le contrôle
+# d'admission les sert périmées quand les vues de lecture sont saturées.
+
+# en dessous, la compression ne fait pas gagner d'octets
+MIN_SIZE = 200
+
+
+def accepted_encoding(request, streaming: bool = False) -> str | None:
+    """Meilleur encodage accepté par le client : "br", "gzip" ou None."""
+    accepted = set()
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, q = item.partition(";q=")
+        try:
+            if float(q or 1) > 0:
+                accepted.add(name.strip().lower())
+        except ValueError:
+            continue
+    if brotli and not streaming and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=9)
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def page_key(request) -> str:
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"page:{path}"
+
+
+def is_fresh(entry: dict | None, version: tuple) -> bool:
+    return (
+        entry is not None
+        and entry["version"] == version
+        and time.time() - entry["at"] < settings.PUBLIC_PAGE_CACHE_SECONDS
+    )
+
+
+def entry_response(key: str, entry: dict, encoding: str | None) -> HttpResponse:
+    """Réponse depuis une entrée de cache ; calcule et stocke la variante manquante."""
+    raw = entry["bodies"]["identity"]
+    if encoding is None or len(raw) < MIN_SIZE:
+        body, encoding = raw, None
+    elif (body := entry["bodies"].get(encoding)) is None:
+        body = entry["bodies"][encoding] = compress(raw, encoding)
+        cache.set(key, entry, settings.PUBLIC_PAGE_STALE_SECONDS)
+
+    response = HttpResponse(body, content_type=entry["content_type"])
+    if encoding:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+def stale_response(request) -> HttpResponse | None:
+    """Dernier rendu en cache de l'URL, quelle que soit sa fraîcheur."""
+    key = page_key(request)
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    response = entry_response(key, entry, accepted_encoding(request))
+    response["X-Cache"] = "stale"
+    return response
+
+
+def _compress_stream(request, response):
+    encoding = accepted_encoding(request, streaming=True)
+    if encoding and not response.has_header("Content-Encoding"):
+        response.streaming_content = compress_sequence(response.streaming_content)
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+def cached_page(*families: str):
+    """
+    Décorateur des vues publiques en lecture : cache par URL complète,
+    invalidé par les versions des familles de données, et compression.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            key = page_key(request)
+            version = versions_for(*families)
+            entry = cache.get(key)
+            if not is_fresh(entry, version):
+                response = view(request, *args, **kwargs)
+                if response.streaming:
+                    return _compress_stream(request, response)
+                if response.status_code != 200:
+                    return response
+                entry = {
+                    "version": version,
+                    "at": time.time(),
+                    "content_type": response["Content-Type"],
+                    "bodies": {"identity": response.content},
+                }
+                cache.set(key, entry, settings.PUBLIC_PAGE_STALE_SECONDS)
+            return entry_response(key, entry, accepted_encoding(request))
+
+        return wrapper
+
+    return decorator
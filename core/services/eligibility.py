@@ -0,0 +1,64 @@
+# core/services/eligibility.py
+
+from core.models import HEAD_COACH_MASK, Category, Member
+from django.db.models import F
+
+from . import refdata
+
+# -----------------------------------------------------------
+# Éligibilité coach ↔ catégorie par masque de bits
+# -----------------------------------------------------------
+# Règle unique : un coach peut encadrer une séance s'il est coach principal,
+# ou si la séance a une catégorie pour laquelle il est qualifié.
+# Le masque est lu sur Member.eligibility_mask (SQL) ou CoachRef (mémoire) ;
+# le bit de la catégorie vient du cache de référence : aucune jointure.
+
+
+def category_mask(category_id) -> int:
+    cat = refdata.category_by_id(category_id)
+    return cat.mask if cat else 0
+
+
+def can_coach(eligibility_mask: int, category_id) -> bool:
+    if category_id is None:
+        return eligibility_mask == HEAD_COACH_MASK
+    return bool(eligibility_mask & category_mask(category_id))
+
+
+def eligible_members(category_id, qs=None):
+    """Filtre SQL des licenciés pouvant encadrer une séance de la catégorie."""
+    qs = Member.objects.all() if qs is None else qs
+    if category_id is None:
+        return qs.filter(eligibility_mask=HEAD_COACH_MASK)
+    return qs.alias(
+        _eligible=F("eligibility_mask").bitand(category_mask(category_id))
+    ).exclude(_eligible=0)
+
+
+def refresh_eligibility(member_ids=None):
+    """
+    Recalcule eligibility_mask depuis le m2m qualifications (tous les
+    licenciés si member_ids est None). Une écriture par masque distinct.
+    """
+    members = Member.objects.all()
+    if member_ids is not None:
+        members = members.filter(pk__in=member_ids)
+
+    bits = dict(Category.objects.exclude(bit=None).values_list("pk", "bit"))
+    masks = {
+        pk: (HEAD_COACH_MASK if head else 0)
+        for pk, head in members.values_list("pk", "is_head_coach")
+    }
+    for member_id, category_id in Member.qualifications.through.objects.filter(
+        member_id__in=masks
+    ).values_list("member_id", "category_id"):
+        if masks[member_id] != HEAD_COACH_MASK and category_id in bits:
+            masks[member_id] |= 1 << bits[category_id]
+
+    by_mask = {}
+    for pk, mask in masks.items():
+        by_mask.setdefault(mask, []).append(pk)
+    for mask, pks in by_mask.items():
+        Member.objects.filter(pk__in=pks).exclude(eligibility_mask=mask).update(
+            eligibility_mask=mask
+        )
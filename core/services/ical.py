@@ -0,0 +1,180 @@
+# core/services/ical.py
+
+import hashlib
+from datetime import datetime, time, timedelta
+from datetime import timezone as dt_timezone
+
+from core.models import CoachAssignment, Session
+from core.utils import PARIS_TZ
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from . import refdata
+from .invalidation import versions_for
+from .session_cards import iter_card_chunks
+
+# -----------------------------------------------------------
+# Flux iCalendar (abonnement agenda) par coach et par catégorie
+# -----------------------------------------------------------
+# Un flux est identifié par un ETag construit à partir de ses propres lignes
+# (nombre et dernière modification des séances du flux et de leurs
+# inscriptions, comme publish.category_fingerprints), des versions des données
+# de référence et de la date du jour : une modification ailleurs dans le club
+# ne change pas l'ETag, l'agenda qui relit le flux reçoit un 304 après deux
+# agrégats indexés. Le contenu est mis en cache sous la même clé ; à défaut,
+# il est généré en streaming par lots (curseur `.iterator()`).
+
+# données de référence affichées dans le flux (noms des coachs, catégories, lieux)
+REFERENCE_FAMILIES = ("member", "category", "location")
+# séances passées gardées dans le flux, pour qu'elles restent dans l'agenda
+PAST_DAYS = 30
+CHUNK_SIZE = 500
+CACHE_TIMEOUT = 24 * 3600
+
+
+def window_start() -> datetime:
+    day = timezone.localdate() - timedelta(days=PAST_DAYS)
+    return datetime.combine(day, time.min, tzinfo=PARIS_TZ)
+
+
+def _feed_qs(qs):
+    return qs.annotate(
+        confirmed_cnt=Count("assignments", filter=Q(assignments__status="confirmed"))
+    ).order_by("start_at", "pk")
+
+
+def coach_feed_sessions(coach_id):
+    """Séances où le coach est inscrit (index CoachAssignment(coach, status))."""
+    return Session.objects.filter(
+        pk__in=CoachAssignment.objects.filter(
+            coach_id=coach_id, status="confirmed"
+        ).values("session_id"),
+        is_cancelled=False,
+        start_at__gte=window_start(),
+    )
+
+
+def category_feed_sessions(category_id):
+    """Séances de la catégorie (index partiel (category, start_at))."""
+    return Session.objects.filter(
+        category_id=category_id, is_cancelled=False, start_at__gte=window_start()
+    )
+
+
+def coach_feed_qs(coach_id):
+    return _feed_qs(coach_feed_sessions(coach_id))
+
+
+def category_feed_qs(category_id):
+    return _feed_qs(category_feed_sessions(category_id))
+
+
+def feed_fingerprint(sessions) -> tuple:
+    """(séances, inscriptions) du flux : (nombre, dernière modification) de chacune."""
+    sessions = sessions.order_by()
+    stats = sessions.aggregate(n=Count("pk"), last=Max("updated_at"))
+    assignments = CoachAssignment.objects.filter(
+        session__in=sessions.values("pk")
+    ).aggregate(n=Count("pk"), last=Max("updated_at"))
+    return (stats["n"], stats["last"]), (assignments["n"], assignments["last"])
+
+
+def feed_etag(kind: str, key, sessions) -> str:
+    digest = hashlib.sha1(
+        repr((feed_fingerprint(sessions), versions_for(*REFERENCE_FAMILIES))).encode()
+    ).hexdigest()[:16]
+    return f'"ics-{kind}-{key}-{timezone.localdate():%Y%m%d}-{digest}"'
+
+
+# -----------------------------------------------------------
+# Format (RFC 5545)
+# -----------------------------------------------------------
+
+
+def _escape(text: str) -> str:
+    # fins de ligne Windows ou Mac (saisies dans l'admin) : un seul \n
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Coupe les lignes à 75 octets (continuation : CRLF + espace)."""
+    out, size = [], 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > 75:
+            out.append("\r\n ")
+            size = 1
+        out.append(char)
+        size += width
+    out.append("\r\n")
+    return "".join(out)
+
+
+def _utc(dt: datetime) -> str:
+    return dt.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _event(card: dict, places: dict) -> str:
+    cat = refdata.category_by_id(card["category_id"])
+    summary = cat.label if cat else "Séance"
+    if card["group"]:
+        summary += f" — {card['group']}"
+    names = ", ".join(c["name"] for c in card["coaches"]) or "aucun"
+    description = (
+        f"Encadrants : {names} ({card['confirmed_cnt']}/{card['min_coaches']})"
+    )
+
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:session-{card['id']}@trihub",
+        f"DTSTAMP:{_utc(card['updated_at'])}",
+        f"DTSTART:{_utc(card['start_at'])}",
+        f"DTEND:{_utc(card['start_at'] + timedelta(minutes=card['duration_min']))}",
+        f"SUMMARY:{_escape(summary)}",
+        f"DESCRIPTION:{_escape(description)}",
+    ]
+    if card["location_id"]:
+        lines.append(f"LOCATION:{_escape(places[card['location_id']])}")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+
+def _generate(name: str, qs):
+    yield "".join(
+        _fold(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//TriHub//Séances//FR",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{_escape(name)}",
+            "X-WR-TIMEZONE:Europe/Paris",
+            "X-PUBLISHED-TTL:PT15M",
+        )
+    )
+    places = {loc.id: loc.name for loc in refdata.locations()}
+    for cards in iter_card_chunks(qs, CHUNK_SIZE, "duration_min", "updated_at"):
+        yield "".join(_event(card, places) for card in cards)
+    yield _fold("END:VCALENDAR")
+
+
+def stream_feed(etag: str, name: str, qs):
+    """Contenu du flux : depuis le cache si la version n'a pas bougé, sinon généré."""
+    key = "ical:" + etag.strip('"')
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    for part in _generate(name, qs):
+        parts.append(part)
+        yield part
+    cache.set(key, "".join(parts), CACHE_TIMEOUT)
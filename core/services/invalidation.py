@@ -0,0 +1,181 @@
+# core/services/invalidation.py
+
+import logging
+import select
+import threading
+
+from core.models import DataVersion
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------
+# Bus d'invalidation inter-processus
+# -----------------------------------------------------------
+# Chaque famille de données a une ligne dans DataVersion, incrémentée par un
+# trigger SQL dans la transaction de l'écriture (y compris update() en masse
+# et écritures m2m). Chaque worker garde une copie locale des versions,
+# rafraîchie au plus une fois par requête (InvalidationMiddleware) ; un cache
+# local se contente de comparer la version qu'il a mémorisée.
+# Sous PostgreSQL, le trigger émet aussi un NOTIFY : avec
+# INVALIDATION_LISTEN=True un thread d'écoute évite la requête par requête
+# tant que rien n'a changé.
+
+# famille -> tables dont les écritures l'invalident
+TRACKED_TABLES = {
+    "session": ["core_session"],
+    "assignment": ["core_coachassignment"],
+    "member": ["core_member", "core_member_qualifications"],
+    "category": ["core_category"],
+    "location": ["core_location"],
+}
+
+NOTIFY_CHANNEL = "core_data_version"
+
+
+def create_triggers_sql(vendor: str, table: str, name: str) -> list[str]:
+    """SQL de création des triggers qui incrémentent la version `name`."""
+    if vendor == "postgresql":
+        return [f"""
+            CREATE TRIGGER {table}_bump_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION core_bump_data_version('{name}')
+            """]
+    return [f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_bump_version_{event.lower()}
+        AFTER {event} ON {table}
+        BEGIN
+            UPDATE core_dataversion SET version = version + 1 WHERE name = '{name}';
+        END
+        """ for event in ("INSERT", "UPDATE", "DELETE")]
+
+
+def drop_triggers_sql(vendor: str, table: str) -> list[str]:
+    if vendor == "postgresql":
+        return [f"DROP TRIGGER IF EXISTS {table}_bump_version ON {table}"]
+    return [
+        f"DROP TRIGGER IF EXISTS {table}_bump_version_{event}"
+        for event in ("insert", "update", "delete")
+    ]
+
+
+def ensure_triggers(connection):
+    """
+    Recrée les triggers SQLite manquants. SQLite reconstruit une table pour
+    certaines migrations (modification de colonne) et ses triggers
+    disparaissent avec elle ; appelé après chaque migrate (post_migrate).
+    """
+    if connection.vendor != "sqlite":
+        return
+    if "core_dataversion" not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        for name, tables in TRACKED_TABLES.items():
+            for table in tables:
+                for sql in create_triggers_sql(connection.vendor, table, name):
+                    cursor.execute(sql)
+
+
+PG_BUMP_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION core_bump_data_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE core_dataversion SET version = version + 1 WHERE name = TG_ARGV[0];
+    PERFORM pg_notify('{NOTIFY_CHANNEL}', TG_ARGV[0]);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+# -----------------------------------------------------------
+# Copie locale des versions
+# -----------------------------------------------------------
+
+
+class _LocalVersions:
+    def __init__(self):
+        self.versions: dict[str, int] | None = None
+        self.stale = True
+        self.listening = False
+        self.thread = None
+        self.lock = threading.Lock()
+
+
+_local = _LocalVersions()
+
+
+def refresh():
+    """Relit toutes les versions (une requête sur une table de quelques lignes)."""
+    _local.stale = False  # avant la lecture : un NOTIFY concurrent restera visible
+    _local.versions = dict(DataVersion.objects.values_list("name", "version"))
+
+
+def sync():
+    """
+    À appeler une fois par requête. Sans écoute active, relit les versions ;
+    avec écoute, ne relit qu'après réception d'une notification.
+    """
+    if _local.stale or not _local.listening:
+        refresh()
+
+
+def versions_for(*names: str) -> tuple:
+    """Versions locales des familles demandées, à comparer par un cache."""
+    if _local.versions is None:
+        refresh()
+    return tuple(_local.versions.get(n, 0) for n in names)
+
+
+def mark_stale():
+    _local.stale = True
+
+
+# -----------------------------------------------------------
+# Écoute LISTEN/NOTIFY (PostgreSQL, optionnelle)
+# -----------------------------------------------------------
+
+
+def _listen_forever():
+    import psycopg2
+
+    db = settings.DATABASES["default"]
+    while True:
+        try:
+            conn = psycopg2.connect(
+                dbname=db["NAME"],
+                user=db["USER"],
+                password=db["PASSWORD"],
+                host=db["HOST"],
+                port=db["PORT"],
+            )
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            # des notifications ont pu être manquées avant le LISTEN
+            mark_stale()
+            _local.listening = True
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                if conn.notifies:
+                    conn.notifies.clear()
+                    mark_stale()
+        except Exception:
+            logger.exception("Écoute des invalidations interrompue, reconnexion")
+            _local.listening = False
+            threading.Event().wait(5)
+
+
+def start_listener():
+    """Démarre (une fois par processus) le thread d'écoute si activé."""
+    if not settings.INVALIDATION_LISTEN or connection.vendor != "postgresql":
+        return
+    with _local.lock:
+        if _local.thread:
+            return
+        _local.thread = threading.Thread(
+            target=_listen_forever, name="invalidation-listener", daemon=True
+        )
+        _local.thread.start()
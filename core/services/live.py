@@ -0,0 +1,123 @@
+# core/services/live.py
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from core.models import CoachAssignment, Session
+from django.db import transaction
+
+# -----------------------------------------------------------
+# Pub/sub en mémoire (un broker par processus)
+# -----------------------------------------------------------
+# Les abonnés sont des flux SSE servis sous ASGI (boucle asyncio), les
+# publications viennent des vues synchrones (thread) : on passe donc par
+# call_soon_threadsafe. Une publication réveille les flux concernés, qui
+# relisent alors la base depuis leur jeton : les changements faits dans
+# d'autres workers sont pris au passage, ou au polling périodique.
+
+QUEUE_SIZE = 100
+
+
+class LiveBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)  # code catégorie -> {(loop, queue)}
+
+    def subscribe(self, category_code: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[category_code].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, category_code: str, queue: asyncio.Queue):
+        with self._lock:
+            subs = self._subscribers[category_code]
+            subs -= {s for s in subs if s[1] is queue}
+            if not subs:
+                del self._subscribers[category_code]
+
+    def has_subscribers(self, *category_codes: str) -> bool:
+        """Sans argument : y a-t-il au moins un abonné, toutes catégories confondues ?"""
+        with self._lock:
+            if not category_codes:
+                return bool(self._subscribers)
+            return any(self._subscribers.get(c) for c in category_codes)
+
+    def publish(self, category_codes, event: dict):
+        with self._lock:
+            targets = [s for c in category_codes for s in self._subscribers.get(c, ())]
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(_put_nowait, queue, event)
+
+
+def _put_nowait(queue: asyncio.Queue, event: dict):
+    # Client trop lent : on perd l'événement, le polling le rattrapera
+    if not queue.full():
+        queue.put_nowait(event)
+
+
+broker = LiveBroker()
+
+
+# -----------------------------------------------------------
+# Événements de couverture
+# -----------------------------------------------------------
+
+
+def coverage_events(session_ids) -> list[dict]:
+    """État d'encadrement (inscrits confirmés / minimum) des séances données."""
+    sessions = {
+        s["id"]: {
+            "session_id": s["id"],
+            "category": s["category__code"],
+            "min_coaches": s["min_coaches"],
+            "coaches": [],
+        }
+        for s in Session.objects.filter(pk__in=session_ids).values(
+            "id", "category__code", "min_coaches"
+        )
+    }
+    for row in (
+        CoachAssignment.objects.filter(session_id__in=sessions, status="confirmed")
+        .order_by("created_at", "pk")
+        .values("session_id", "coach_id", "coach__first_name", "coach__last_name")
+    ):
+        sessions[row["session_id"]]["coaches"].append(
+            {
+                "id": row["coach_id"],
+                "name": f"{row['coach__first_name']} {row['coach__last_name']}",
+            }
+        )
+    for event in sessions.values():
+        event["confirmed_cnt"] = len(event["coaches"])
+    return list(sessions.values())
+
+
+def publish_coverage(session_id):
+    """Réveille, après commit, les abonnés de la catégorie de la séance."""
+
+    def _publish():
+        if not broker.has_subscribers():
+            return
+        category_code = (
+            Session.objects.filter(pk=session_id)
+            .values_list("category__code", flat=True)
+            .first()
+        )
+        codes = ("all", category_code) if category_code else ("all",)
+        if not broker.has_subscribers(*codes):
+            return
+        broker.publish(codes, {"session_id": session_id})
+
+    transaction.on_commit(_publish)
+
+
+def format_sse(event: dict, event_id: str | None = None) -> str:
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append("event: coverage")
+    lines.append(f"data: {json.dumps(event)}")
+    return "\n".join(lines) + "\n\n"
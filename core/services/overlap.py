@@ -0,0 +1,141 @@
+# core/services/overlap.py
+
+import heapq
+from collections import namedtuple
+from datetime import date
+
+from core.models import CoachAssignment, Member, Session
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from .calendar import season_of
+from .closures import day_start
+
+# -----------------------------------------------------------
+# Chevauchements d'inscriptions d'un même coach
+# -----------------------------------------------------------
+# Une séance occupe [start_at, end_at[. Deux séances se chevauchent si
+# chacune commence avant la fin de l'autre ; des séances bout à bout
+# (7h-8h puis 8h-9h) ne se chevauchent pas.
+# - à l'inscription : une requête, via l'index (coach, status) des inscriptions ;
+# - sur une saison : balayage (sweep line) des intervalles triés, par coach.
+
+Overlap = namedtuple("Overlap", "coach_id first_id second_id")
+
+
+def conflicts(coach_id, session: Session):
+    """Séances actives où le coach est confirmé et qui chevauchent `session`."""
+    return (
+        Session.objects.filter(
+            assignments__coach_id=coach_id,
+            assignments__status="confirmed",
+            is_cancelled=False,
+            start_at__lt=session.end_at,
+            end_at__gt=session.start_at,
+        )
+        .exclude(pk=session.pk)
+        .select_related("category", "location")
+        .order_by("start_at")
+    )
+
+
+def check_assignment(session: Session, coach: Member) -> list[Session]:
+    """
+    Vérifie l'inscription de `coach` sur `session` selon OVERLAP_POLICY :
+    - "reject" : ValidationError si elle chevauche une autre inscription ;
+    - "warn" : renvoie les séances en conflit, l'inscription reste possible ;
+    - "off" : aucune vérification.
+    """
+    if settings.OVERLAP_POLICY == "off":
+        return []
+    found = list(conflicts(coach.pk, session))
+    if found and settings.OVERLAP_POLICY == "reject":
+        raise ValidationError(
+            f"{coach} est déjà inscrit sur une séance au même moment : "
+            + ", ".join(s.title_auto for s in found)
+        )
+    return found
+
+
+def check_sessions(sessions, between: bool) -> list[Session]:
+    """
+    Même contrôle que check_assignment pour les inscriptions confirmées de
+    séances déplacées ou rétablies en masse, avant l'UPDATE : `sessions`
+    portent leurs nouvelles valeurs (start_at, end_at), pas encore écrites.
+    Chaque séance est confrontée aux autres séances de ses coachs en base
+    (hors lot) et, si `between`, aux autres séances du lot (rétablissement :
+    un décalage commun ne crée pas de chevauchement entre elles).
+    """
+    if settings.OVERLAP_POLICY == "off":
+        return []
+    by_pk = {s.pk: s for s in sessions}
+    per_coach = {}
+    for coach_id, session_id in CoachAssignment.objects.filter(
+        session_id__in=by_pk, status="confirmed"
+    ).values_list("coach_id", "session_id"):
+        per_coach.setdefault(coach_id, []).append(by_pk[session_id])
+
+    found = {}
+    for coach_id, moved in per_coach.items():
+        for session in moved:
+            if conflicts(coach_id, session).exclude(pk__in=by_pk).exists():
+                found[session.pk] = session
+        if between:
+            intervals = sorted(
+                ((s.pk, s.start_at, s.end_at) for s in moved), key=lambda i: i[1]
+            )
+            for first, second in sweep(intervals):
+                found[first], found[second] = by_pk[first], by_pk[second]
+
+    found = sorted(found.values(), key=lambda s: s.start_at)
+    if found and settings.OVERLAP_POLICY == "reject":
+        raise ValidationError(
+            "Des encadrants seraient inscrits sur des séances au même moment : "
+            + ", ".join(s.title_auto for s in found[:5])
+            + (f" (et {len(found) - 5} autres)" if len(found) > 5 else "")
+            + ". Rien n'a été modifié."
+        )
+    return found
+
+
+def sweep(intervals):
+    """
+    Paires qui se chevauchent parmi des (clé, début, fin) triés par début :
+    tas des fins des intervalles en cours, O(n log n + paires).
+    """
+    active = []  # (fin, clé)
+    for key, start, end in intervals:
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, other in active:
+            yield other, key
+        heapq.heappush(active, (end, key))
+
+
+def season_overlaps(season: int | None = None) -> list[Overlap]:
+    """Chevauchements des inscriptions confirmées de la saison (par défaut, la courante)."""
+    if season is None:
+        season = season_of(date.today())
+    rows = (
+        CoachAssignment.objects.filter(
+            status="confirmed",
+            session__is_cancelled=False,
+            session__start_at__gte=day_start(date(season, 8, 1)),
+            session__start_at__lt=day_start(date(season + 1, 8, 1)),
+        )
+        .order_by("coach_id", "session__start_at")
+        .values_list("coach_id", "session_id", "session__start_at", "session__end_at")
+        .iterator(chunk_size=5000)
+    )
+    return list(overlaps_by_coach(rows))
+
+
+def overlaps_by_coach(rows):
+    """Chevauchements de (coach, séance, début, fin) triés par coach puis début."""
+    coach, intervals = None, []
+    for coach_id, session_id, start, end in rows:
+        if coach_id != coach:
+            yield from (Overlap(coach, a, b) for a, b in sweep(intervals))
+            coach, intervals = coach_id, []
+        intervals.append((session_id, start, end))
+    yield from (Overlap(coach, a, b) for a, b in sweep(intervals))
@@ -1,93 +1,99 @@
-from core.models import Category, Member, Session
-from django.db.models import Count, F, Q
+from core.models import CoachAssignment, Session
+from django.db.models import Count, Exists, F, OuterRef, Q
 from django.utils import timezone
 
+from . import refdata
+from .eligibility import can_coach
+from .search import coach_assigned
+
 
 def get_public_sessions(category_code: str, params: dict):
+    """Séances publiques à venir, annotées `confirmed_cnt` (à projeter avec card_values)."""
     now = timezone.now()
 
     qs = Session.objects.filter(is_cancelled=False, start_at__gte=now)
 
     if category_code != "all":
-        qs = qs.filter(category__code=category_code)
-
-    qs = (
-        qs.select_related("location", "category")
-        .prefetch_related("assignments__coach")
-        .annotate(
-            confirmed_cnt=Count(
-                "assignments", filter=Q(assignments__status="confirmed")
-            )
-        )
-        .order_by("start_at", "pk")
-    )
-    # print(qs)
+        cat = refdata.category_by_code(category_code)
+        qs = qs.filter(category_id=cat.id) if cat else qs.none()
+
+    qs = qs.annotate(
+        confirmed_cnt=Count("assignments", filter=Q(assignments__status="confirmed"))
+    ).order_by("start_at", "pk")
     qs = add_filters_to_qs(qs, params)
-    print(params)
     return qs
 
 
+def get_coach_agenda(coach, params: dict, mine: bool = False):
+    """
+    Séances à venir d'un coach, en une requête :
+    - mine=False : séances qu'il peut encadrer (catégories lues dans son masque)
+    - mine=True : séances où il est inscrit (index CoachAssignment(coach, status))
+    Chaque séance porte `is_mine` et `confirmed_cnt`.
+    """
+    mine_q = Exists(
+        CoachAssignment.objects.filter(
+            session=OuterRef("pk"), coach_id=coach.pk, status="confirmed"
+        )
+    )
+    qs = Session.objects.filter(is_cancelled=False, start_at__gte=timezone.now())
+    if mine:
+        qs = qs.filter(mine_q)
+    elif coach.is_head_coach:
+        qs = qs.filter(category__isnull=False)
+    else:
+        qs = qs.filter(
+            category_id__in=refdata.category_ids_for_mask(coach.eligibility_mask)
+        )
+
+    qs = qs.annotate(
+        confirmed_cnt=Count("assignments", filter=Q(assignments__status="confirmed")),
+        is_mine=mine_q,
+    ).order_by("start_at", "pk")
+    return add_filters_to_qs(qs, params)
+
+
+def group_by_week(cards) -> list:
+    """[((année ISO, semaine ISO), [cartes]), ...] selon l'heure de Paris stockée."""
+    weeks = {}
+    for card in cards:
+        weeks.setdefault((card["year_iso"], card["week_iso"]), []).append(card)
+    return sorted(weeks.items(), key=lambda x: x[0])
+
+
 def add_filters_to_qs(qs, params: dict):
     # Filtres GET
     if loc_id := params.get("loc"):
-        qs = qs.filter(location_id=loc_id)
+        if loc_id.isdigit():
+            qs = qs.filter(location_id=int(loc_id))
 
     if dow := params.get("dow"):
         if dow.isdigit():
             qs = qs.filter(start_at__week_day=int(dow))
 
     if coach_q := params.get("coach_q"):
-        print("prout")
-        qs = (
-            qs.filter(assignments__status="confirmed")
-            .filter(
-                Q(assignments__coach__first_name__icontains=coach_q)
-                | Q(assignments__coach__last_name__icontains=coach_q)
-            )
-            .distinct()
-        )
+        qs = qs.filter(coach_assigned(coach_q, status="confirmed"))
 
     if params.get("needs"):
-        print("uuu")
         qs = qs.filter(confirmed_cnt__lt=F("min_coaches"))
 
     return qs
 
 
 def get_cat_coaches(category_code: str):
-    if category_code == "all":
-        return Member.objects.all().prefetch_related("qualifications")
-
-    try:
-        cat = Category.objects.get(code=category_code)
-    except Category.DoesNotExist:
-        return Member.objects.none()
+    return refdata.cat_coaches(category_code)
 
-    return Member.objects.filter(
-        Q(is_head_coach=True) | Q(qualifications=cat)
-    ).prefetch_related("qualifications")
 
-
-def build_available_coaches(qs, cat_coaches):
+def build_available_coaches(cards, cat_coaches):
     available_coaches = {}
-    qualif_map = {
-        c.pk: [c.is_head_coach, {q.pk for q in c.qualifications.all()}]
-        for c in cat_coaches
-    }
-    for s in qs:
-        assigned_ids = {
-            a.coach_id for a in s.assignments.all() if a.status == "confirmed"
-        }
-
-        available_coaches[s.pk] = [
+    for card in cards:
+        assigned_ids = {c["id"] for c in card["coaches"]}
+
+        available_coaches[card["id"]] = [
             {"id": c.pk, "name": f"{c.first_name} {c.last_name}"}
             for c in cat_coaches
             if c.pk not in assigned_ids
-            and (
-                s.category is None
-                or s.category.pk in qualif_map[c.pk][1]
-                or qualif_map[c.pk][0]
-            )
+            and can_coach(c.eligibility_mask, card["category_id"])
         ]
 
     return available_coaches
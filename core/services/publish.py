@@ -0,0 +1,157 @@
+# core/services/publish.py
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from core.models import CoachAssignment, Session
+from django.db.models import Count, Max
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from . import ical, invalidation, refdata
+
+# -----------------------------------------------------------
+# Export statique des pages publiques
+# -----------------------------------------------------------
+# Chaque page exportée porte une empreinte de ses données : versions des
+# tables de référence concernées et, par catégorie, (nombre, dernier
+# updated_at) des séances et inscriptions de la fenêtre publiée. Une page
+# n'est re-rendue que si son empreinte diffère de celle du dernier export
+# (manifest.json) : une inscription en natation ne régénère que les pages
+# natation, "toutes les séances" et les coachs qualifiés en natation.
+
+MANIFEST = "public/manifest.json"
+
+
+@dataclass(frozen=True)
+class Page:
+    path: str  # chemin du fichier, relatif au dossier d'export
+    url: str  # URL rendue (avec query string)
+    fingerprint: str
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+def category_fingerprints() -> dict:
+    """{category_id: (séances, inscriptions)} agrégés sur la fenêtre publiée."""
+    start = ical.window_start()
+    data = {}
+    for row in (
+        Session.objects.filter(start_at__gte=start)
+        .order_by()
+        .values("category_id")
+        .annotate(n=Count("pk"), last=Max("updated_at"))
+    ):
+        data[row["category_id"]] = [(row["n"], row["last"]), None]
+    for row in (
+        CoachAssignment.objects.filter(session__start_at__gte=start)
+        .order_by()
+        .values("session__category_id")
+        .annotate(n=Count("pk"), last=Max("updated_at"))
+    ):
+        data.setdefault(row["session__category_id"], [None, None])[1] = (
+            row["n"],
+            row["last"],
+        )
+    return {k: tuple(v) for k, v in data.items()}
+
+
+def public_pages() -> list[Page]:
+    """Pages (HTML, iCalendar, JSON) de l'export et leurs empreintes."""
+    day = timezone.localdate()
+    refs = invalidation.versions_for("member", "category", "location")
+    by_cat = category_fingerprints()
+    everything = sorted(by_cat.items(), key=lambda kv: kv[0] or 0)
+
+    def path(url: str, filename: str) -> str:
+        return url.removeprefix("/") + filename
+
+    pages = [
+        Page(
+            path(reverse("public_homepage"), "index.html"),
+            reverse("public_homepage"),
+            _digest(invalidation.versions_for("member", "category")),
+        )
+    ]
+
+    url = reverse("public_sessions_by_category", args=["all"])
+    fp = _digest(day, refs, everything)
+    pages += [
+        Page(path(url, "index.html"), url + "?all=1", fp),
+        Page("public/api/changes.json", reverse("public_changes"), fp),
+    ]
+
+    for cat in refdata.categories():
+        fp = _digest(day, refs, cat.id, by_cat.get(cat.id))
+        url = reverse("public_sessions_by_category", args=[cat.code])
+        pages += [
+            Page(path(url, "index.html"), url + "?all=1", fp),
+            Page(
+                path(url, "calendar.ics"),
+                reverse("public_category_calendar", args=[cat.code]),
+                fp,
+            ),
+            Page(
+                f"public/api/changes/{cat.code}.json",
+                reverse("public_changes") + f"?category={cat.code}",
+                fp,
+            ),
+        ]
+
+    for coach in refdata.coaches().values():
+        if coach.is_head_coach:
+            cats = [cat_id for cat_id, _ in everything if cat_id is not None]
+        else:
+            cats = refdata.category_ids_for_mask(coach.eligibility_mask)
+        fp = _digest(day, refs, coach.pk, [(c, by_cat.get(c)) for c in sorted(cats)])
+        url = reverse("coach_page", args=[coach.slug])
+        pages += [
+            Page(path(url, "index.html"), url + "?all=1", fp),
+            # l'agenda du coach dépend aussi des séances hors catégorie
+            Page(
+                path(url, "calendar.ics"),
+                reverse("coach_calendar", args=[coach.slug]),
+                _digest(fp, by_cat.get(None)),
+            ),
+        ]
+    return pages
+
+
+def render_page(root: str, path: str, url: str) -> int:
+    """Rend l'URL sans passer par HTTP et écrit le fichier ; renvoie sa taille."""
+    invalidation.sync()
+    request = RequestFactory().get(url)
+    match = resolve(request.path_info)
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        raise RuntimeError(f"{url} : HTTP {response.status_code}")
+    if response.streaming:
+        content = b"".join(response.streaming_content)
+    else:
+        content = response.content
+
+    target = Path(root) / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, target)  # jamais de fichier à moitié écrit côté CDN
+    return len(content)
+
+
+def read_manifest(root: Path) -> dict:
+    try:
+        return json.loads((root / MANIFEST).read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def write_manifest(root: Path, manifest: dict):
+    tmp = root / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    os.replace(tmp, root / MANIFEST)
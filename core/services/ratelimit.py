@@ -0,0 +1,141 @@
+# core/services/ratelimit.py
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+# -----------------------------------------------------------
+# Limitation de débit par seau à jetons
+# -----------------------------------------------------------
+# Deux seaux par requête : un par IP (RATELIMIT_IP_BURST / _PER_MINUTE) et un
+# par IP + coach (RATELIMIT_BURST / _PER_MINUTE). Le coach_id vient du
+# formulaire : le seau par IP empêche de contourner la limite en le faisant
+# varier. Un seau vide donne un 429 immédiat, sans requête SQL.
+# - "memory" : seaux dans le processus (un seul worker, ou limite par worker)
+# - "cache" : seaux dans le cache Django partagé RATELIMIT_CACHE (table en
+#   base par défaut, voir settings.CACHES ; créée par `createcachetable`).
+#   La lecture-écriture n'est pas atomique : sous forte concurrence quelques
+#   requêtes de plus peuvent passer, ce qui suffit contre les rafales.
+
+
+class TokenBucket:
+    """État d'un seau : (jetons, horodatage) -> (autorisé, nouvel état, attente)."""
+
+    def __init__(self, burst: int, per_minute: float):
+        self.burst = burst
+        self.rate = per_minute / 60
+
+    def take(self, state, now: float):
+        tokens, last = state if state else (self.burst, now)
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens >= 1:
+            return True, (tokens - 1, now), 0
+        return False, (tokens, now), (1 - tokens) / self.rate
+
+
+class MemoryBuckets:
+    def __init__(self, bucket: TokenBucket, maxsize: int = 10_000):
+        self.bucket = bucket
+        self.maxsize = maxsize
+        self.states = OrderedDict()
+        self.lock = threading.Lock()
+
+    def hit(self, key: str):
+        with self.lock:
+            allowed, state, wait = self.bucket.take(
+                self.states.pop(key, None), time.monotonic()
+            )
+            self.states[key] = state
+            if len(self.states) > self.maxsize:
+                self.states.popitem(last=False)  # clé la moins récemment vue
+        return allowed, wait
+
+
+class CacheBuckets:
+    def __init__(self, bucket: TokenBucket, prefix: str = "ratelimit"):
+        self.bucket = bucket
+        self.prefix = prefix
+        # au-delà, le seau est de nouveau plein : inutile de le garder
+        self.timeout = math.ceil(bucket.burst / bucket.rate)
+
+    def hit(self, key: str):
+        cache = caches[settings.RATELIMIT_CACHE]
+        key = f"{self.prefix}:{key}"
+        allowed, state, wait = self.bucket.take(cache.get(key), time.time())
+        cache.set(key, state, self.timeout)
+        return allowed, wait
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def _rates(name: str) -> tuple[int, float]:
+    if name == "ip":
+        return settings.RATELIMIT_IP_BURST, settings.RATELIMIT_IP_PER_MINUTE
+    return settings.RATELIMIT_BURST, settings.RATELIMIT_PER_MINUTE
+
+
+def buckets(name: str):
+    """Seaux de la limite `name` ("ip" ou "ip_and_coach"), créés au premier appel."""
+    with _buckets_lock:
+        if name not in _buckets:
+            bucket = TokenBucket(*_rates(name))
+            if settings.RATELIMIT_BACKEND == "cache":
+                _buckets[name] = CacheBuckets(bucket, f"ratelimit:{name}")
+            else:
+                _buckets[name] = MemoryBuckets(bucket)
+        return _buckets[name]
+
+
+def client_ip(request) -> str:
+    """
+    IP du client. Chaque proxy ajoute à droite de X-Forwarded-For l'adresse
+    qui l'a contacté : seules les RATELIMIT_TRUSTED_PROXIES dernières entrées
+    sont fiables, celles de gauche sont fournies par le client.
+    """
+    hops = settings.RATELIMIT_TRUSTED_PROXIES
+    if hops > 0 and (forwarded := request.headers.get("X-Forwarded-For")):
+        entries = [e.strip() for e in forwarded.split(",") if e.strip()]
+        if entries:
+            return entries[-min(hops, len(entries))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def ip_and_coach(request) -> str:
+    return f"{client_ip(request)}:{request.POST.get('coach_id', '')}"
+
+
+KEY_FUNCS = {"ip": client_ip, "ip_and_coach": ip_and_coach}
+
+
+def rate_limited(*limits: str):
+    """
+    Décorateur de vue : 429 (Retry-After) si le seau d'une des limites est
+    vide. Les limites sont vérifiées dans l'ordre, la première vide arrête.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            for name in limits:
+                allowed, wait = buckets(name).hit(KEY_FUNCS[name](request))
+                if not allowed:
+                    response = HttpResponse(
+                        "Trop de demandes, réessayez dans quelques secondes.",
+                        status=429,
+                        content_type="text/plain; charset=utf-8",
+                    )
+                    response["Retry-After"] = str(math.ceil(wait))
+                    return response
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,22 +1,32 @@
 # core/services/recurrence.py
 
-from datetime import datetime
+from copy import copy
+from datetime import datetime, timedelta
 
 from core.models import CoachAssignment, Recurrence, Session
-from core.utils import PARIS_TZ, iter_weekly_occurrences, to_paris
+from core.utils import PARIS_TZ, to_paris
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models.base import ModelState
+from django.utils import timezone
 
 from ..utils import compare_model_instance
+from . import capacity, summaries
+from .calendar import occurrence_dates
+from .capacity import check_capacity
+from .closures import ClosedDays
+from .search import deferred_reindex, reindex_sessions
 
 
 @transaction.atomic
+@deferred_reindex()
 def generate_series(session: Session, mode: str, end_date) -> Recurrence:
     """
     Crée une récurrence à partir d'une séance existante.
     - session : instance de la première séance
     - mode : 'weekly' ou 'same_type'
     - end_date : date locale (inclusive)
+    Les occurrences tombant dans une fermeture (lieu / catégorie) ne sont pas créées.
     """
     # --- Garde-fous ---
     if session.recurrence:
@@ -35,28 +45,60 @@ def generate_series(session: Session, mode: str, end_date) -> Recurrence:
     recurrence = Recurrence.objects.create(mode=mode, end_date=end_date)
     session.recurrence = recurrence
     session.save()
-    base_pk = session.pk
     base_assignments = list(
-        CoachAssignment.objects.filter(session=session).select_related("coach")
+        CoachAssignment.objects.filter(session=session).values("coach_id", "status")
     )
+
     # --- Génération des occurrences ---
-    for occ_dt in iter_weekly_occurrences(
-        session.start_at, end_date, same_type=(mode == "same_type")
-    ):
-        session.pk = None
-        session._state.adding = True
-        session.start_at = occ_dt
-        session.save()
-        cas = CoachAssignment.objects.filter(session=base_pk)
-        for ca in cas:
-            ca.pk = None
-            ca._state.adding = True
-            ca.session = session
-            ca.save()
+    # dates lues dans le calendrier (ou calculées), hors fermetures, contrôle
+    # de capacité du lieu en une requête, puis insertion des séances et de
+    # leurs inscriptions en deux bulk_create
+    starts = occurrence_starts(session, mode, end_date)
+    duration = timedelta(minutes=session.duration_min)
+    check_capacity(
+        session.location,
+        [(f"occurrence-{n}", dt, dt + duration) for n, dt in enumerate(starts)],
+    )
+    occurrences = []
+    for occ_dt in starts:
+        occ = copy(session)
+        occ.pk = None
+        occ._state = ModelState()
+        occ.start_at = occ_dt
+        occ.set_computed_fields()
+        occurrences.append(occ)
+
+    created = Session.objects.bulk_create(occurrences, batch_size=500)
+    CoachAssignment.objects.bulk_create(
+        [
+            CoachAssignment(session=occ, **ca)
+            for occ in created
+            for ca in base_assignments
+        ],
+        batch_size=500,
+    )
+    reindex_sessions([occ.pk for occ in created])
+    summaries.touch([session.pk] + [occ.pk for occ in created])
 
     return recurrence
 
 
+def occurrence_starts(session: Session, mode: str, end_date) -> list[datetime]:
+    """
+    Débuts des occurrences qui suivent `session` jusqu'à end_date incluse, à la
+    même heure locale, hors fermetures de son lieu / sa catégorie.
+    """
+    closed = ClosedDays.for_session(session, end_date)
+    start_time = to_paris(session.start_at).time()
+    starts = (
+        datetime.combine(day, start_time, tzinfo=PARIS_TZ)
+        for day in occurrence_dates(
+            session.start_at, end_date, same_type=(mode == "same_type")
+        )
+    )
+    return [dt for dt in starts if dt not in closed]
+
+
 def _same_iso_week(a: datetime, b: datetime) -> bool:
     a_iso = to_paris(a).isocalendar()
     b_iso = to_paris(b).isocalendar()
@@ -74,6 +116,7 @@ def change_time(dt: datetime, new_t: datetime) -> datetime:
 
 
 @transaction.atomic
+@deferred_reindex()
 def propagate_form_fields(source: Session, formchange: list):
     """
     Propage des modifications ciblées à partir de `source` vers les occurrences de la même série
@@ -109,12 +152,18 @@ def propagate_form_fields(source: Session, formchange: list):
         .filter(start_at__gte=source.start_at)
         .exclude(pk=source.pk)
     )
+    ses_rec = list(ses_rec)
     for ses in ses_rec:
         for c in formchange:
             if c == "start_at":
                 setattr(ses, c, change_time(ses.start_at, source.start_at))
             else:
                 setattr(ses, c, getattr(source, c))
+        ses.set_computed_fields()
+    # capacité des lieux contrôlée sur les nouvelles valeurs, avant d'écrire
+    if {"start_at", "duration_min", "location", "is_cancelled"} & set(formchange):
+        capacity.check_sessions(ses_rec)
+    for ses in ses_rec:
         ses.save()
 
 
@@ -170,7 +219,7 @@ def propagate_coach_assignments(cas_old, cas_saved):
                     coach_id=cid, session__recurrence=rec, session__start_at__gte=pivot
                 )
                 .exclude(pk=before.pk)
-                .update(**diff)
+                .update(**diff, updated_at=timezone.now())
             )
 
     # 3) Ajouts : répliquer sur toutes les occurrences suivantes
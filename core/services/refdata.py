@@ -0,0 +1,181 @@
+# core/services/refdata.py
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from core.models import Category, Location, Member
+from core.utils import normalize_string
+
+from . import invalidation
+
+# -----------------------------------------------------------
+# Cache local des données de référence
+# -----------------------------------------------------------
+# Catégories, lieux et carte coach → masque d'éligibilité ne changent que
+# quelques fois par saison : on les garde en mémoire par processus, sous forme
+# d'objets légers immuables, et on les recharge quand la version des familles
+# dont ils dépendent change (bus d'invalidation).
+
+
+@dataclass(frozen=True)
+class CategoryRef:
+    id: int
+    code: str
+    label: str
+    bit: int | None
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def mask(self) -> int:
+        return 0 if self.bit is None else 1 << self.bit
+
+    def __str__(self):
+        return self.label
+
+
+@dataclass(frozen=True)
+class LocationRef:
+    id: int
+    name: str
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __str__(self):
+        return self.name
+
+
+@dataclass(frozen=True)
+class CoachRef:
+    id: int
+    first_name: str
+    last_name: str
+    is_head_coach: bool
+    eligibility_mask: int  # voir core.services.eligibility
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def slug(self) -> str:
+        return (
+            normalize_string(self.first_name + self.last_name).lower().replace(" ", "")
+        )
+
+    def __str__(self):
+        return self.first_name + " " + self.last_name
+
+
+class VersionedCache:
+    """
+    Cache LRU borné dont les entrées sont valides tant que la version des
+    familles `families` n'a pas bougé.
+    """
+
+    def __init__(self, families: tuple, maxsize: int = 32):
+        self.families = families
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # clé -> (versions, valeur)
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        versions = invalidation.versions_for(*self.families)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == versions:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = loader()
+        with self._lock:
+            self._entries[key] = (versions, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_categories = VersionedCache(("category",), maxsize=1)
+_locations = VersionedCache(("location",), maxsize=1)
+_coaches = VersionedCache(("member", "category"), maxsize=64)
+
+
+# -----------------------------------------------------------
+# Accès
+# -----------------------------------------------------------
+
+
+def categories() -> list[CategoryRef]:
+    return _categories.get(
+        "all",
+        lambda: [
+            CategoryRef(*row)
+            for row in Category.objects.order_by("pk").values_list(
+                "id", "code", "label", "bit"
+            )
+        ],
+    )
+
+
+def category_by_code(code: str) -> CategoryRef | None:
+    return next((c for c in categories() if c.code == code), None)
+
+
+def category_by_id(category_id) -> CategoryRef | None:
+    return next((c for c in categories() if c.id == category_id), None)
+
+
+def category_ids_for_mask(mask: int) -> list[int]:
+    return [c.id for c in categories() if mask & c.mask]
+
+
+def locations() -> list[LocationRef]:
+    return _locations.get(
+        "all",
+        lambda: [
+            LocationRef(*row)
+            for row in Location.objects.order_by("name").values_list("id", "name")
+        ],
+    )
+
+
+def _load_coaches() -> dict[int, CoachRef]:
+    return {
+        row[0]: CoachRef(*row)
+        for row in Member.objects.values_list(
+            "id", "first_name", "last_name", "is_head_coach", "eligibility_mask"
+        )
+    }
+
+
+def coaches() -> dict[int, CoachRef]:
+    """Tous les licenciés (ordre du modèle : nom, prénom), indexés par id."""
+    return _coaches.get("all", _load_coaches)
+
+
+def coach_by_slug(slug: str) -> CoachRef | None:
+    return next((c for c in coaches().values() if c.slug == slug), None)
+
+
+def cat_coaches(category_code: str) -> list[CoachRef]:
+    """Licenciés pouvant encadrer la catégorie (tous pour "all")."""
+
+    def load():
+        everyone = list(coaches().values())
+        if category_code == "all":
+            return everyone
+        cat = category_by_code(category_code)
+        if cat is None:
+            return []
+        return [c for c in everyone if c.eligibility_mask & cat.mask]
+
+    return _coaches.get(("cat", category_code), load)
@@ -0,0 +1,209 @@
+# core/services/search.py
+
+import threading
+from contextlib import contextmanager
+
+from core.models import CoachAssignment
+from core.utils import normalize_search
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.expressions import RawSQL
+
+# -----------------------------------------------------------
+# Recherche par nom de licencié
+# -----------------------------------------------------------
+# Les noms sont comparés sur Member.search_name (sans accents ni majuscules) :
+# "Hélène" trouve "helene". Chaque mot saisi doit figurer dans le nom.
+
+
+def name_q(term: str, field: str = "search_name") -> Q:
+    q = Q()
+    for bit in normalize_search(term).split():
+        q &= Q(**{f"{field}__contains": bit})
+    return q
+
+
+def coach_assigned(term: str, **assignment_filters) -> Exists:
+    """
+    Condition "la séance a un encadrant dont le nom correspond", en sous-requête
+    EXISTS : pas de jointure sur la requête principale, donc pas de DISTINCT.
+    """
+    return Exists(
+        CoachAssignment.objects.filter(
+            name_q(term, "coach__search_name"),
+            session=OuterRef("pk"),
+            **assignment_filters,
+        )
+    )
+
+
+# -----------------------------------------------------------
+# Recherche plein texte sur les séances (groupe, lieu, notes)
+# -----------------------------------------------------------
+# PostgreSQL : colonne tsvector core_session.search_document + index GIN.
+# SQLite : table virtuelle FTS5 core_session_fts (rowid = id de séance).
+# Les deux sont créés par la migration 0010 et tenus à jour par les signaux
+# de Session/Location ; les écritures en masse regroupent la réindexation
+# avec deferred_reindex().
+
+PG_DOCUMENT_SQL = """
+    setweight(to_tsvector('french', unaccent(coalesce(s."group", ''))), 'A')
+    || setweight(to_tsvector('french', unaccent(coalesce(l.name, ''))), 'B')
+    || setweight(to_tsvector('french', unaccent(coalesce(s.notes, ''))), 'C')
+"""
+
+_deferred = threading.local()
+
+
+def _reindex_now(session_ids):
+    ids = list(session_ids)
+    if not ids:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"""
+                UPDATE core_session AS t SET search_document = {PG_DOCUMENT_SQL}
+                FROM core_session s LEFT JOIN core_location l ON l.id = s.location_id
+                WHERE t.id = s.id AND s.id = ANY(%s)
+                """,
+                [ids],
+            )
+            return
+        for start in range(0, len(ids), 500):  # limite de paramètres SQLite
+            chunk = ids[start : start + 500]
+            marks = ",".join("%s" for _ in chunk)
+            cursor.execute(
+                f"DELETE FROM core_session_fts WHERE rowid IN ({marks})", chunk
+            )
+            cursor.execute(
+                f"""
+                INSERT INTO core_session_fts (rowid, grp, location, notes)
+                SELECT s.id, coalesce(s."group", ''), coalesce(l.name, ''),
+                       coalesce(s.notes, '')
+                FROM core_session s LEFT JOIN core_location l ON l.id = s.location_id
+                WHERE s.id IN ({marks})
+                """,
+                chunk,
+            )
+
+
+def reindex_sessions(session_ids):
+    """Met à jour l'index plein texte des séances (différé dans deferred_reindex)."""
+    pending = getattr(_deferred, "ids", None)
+    if pending is not None:
+        pending.update(session_ids)
+    else:
+        _reindex_now(session_ids)
+
+
+def unindex_sessions(session_ids):
+    # PostgreSQL : le document disparaît avec la ligne
+    ids = list(session_ids)
+    if connection.vendor == "postgresql" or not ids:
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), 500):  # limite de paramètres SQLite
+            chunk = ids[start : start + 500]
+            marks = ",".join("%s" for _ in chunk)
+            cursor.execute(
+                f"DELETE FROM core_session_fts WHERE rowid IN ({marks})", chunk
+            )
+
+
+@contextmanager
+def deferred_reindex():
+    """Regroupe les réindexations du bloc en une seule passe à la sortie."""
+    if getattr(_deferred, "ids", None) is not None:  # déjà dans un bloc
+        yield
+        return
+    _deferred.ids = set()
+    try:
+        yield
+        ids = _deferred.ids
+    finally:
+        _deferred.ids = None
+    _reindex_now(ids)
+
+
+def _fts5_query(term: str) -> str:
+    # chaque mot entre guillemets (pas d'opérateurs FTS5 saisis par l'utilisateur),
+    # recherche par préfixe
+    words = [w.replace('"', "") for w in normalize_search(term).split()]
+    return " ".join(f'"{w}"*' for w in words if w)
+
+
+# plafond des résultats classés renvoyés à la recherche publique (paginée)
+SEARCH_MAX_RESULTS = 1000
+
+
+def _match_sql(term: str) -> tuple[str, list] | None:
+    """
+    (SQL, paramètres) des séances correspondant à la recherche, avec leur
+    score de pertinence (plus petit = plus pertinent) ; None si rien à chercher.
+    """
+    if not normalize_search(term):
+        return None
+    if connection.vendor == "postgresql":
+        return (
+            """
+            SELECT s.id, -ts_rank(s.search_document, query) AS score,
+                   s.start_at AS tiebreak
+            FROM core_session s,
+                 websearch_to_tsquery('french', unaccent(%s)) AS query
+            WHERE s.search_document @@ query
+            """,
+            [term],
+        )
+    match = _fts5_query(term)
+    if not match:
+        return None
+    return (
+        """
+        SELECT rowid AS id, bm25(core_session_fts, 3.0, 2.0, 1.0) AS score,
+               rowid AS tiebreak
+        FROM core_session_fts
+        WHERE core_session_fts MATCH %s
+        """,
+        [match],
+    )
+
+
+def matching_sessions(term: str) -> RawSQL | None:
+    """Ids des séances correspondantes en sous-requête, pour `pk__in=` (sans classement)."""
+    match = _match_sql(term)
+    if match is None:
+        return None
+    sql, params = match
+    return RawSQL(f"SELECT id FROM ({sql}) AS m", params)
+
+
+def ranked_session_ids(
+    term: str, qs=None, limit: int = SEARCH_MAX_RESULTS
+) -> list[int]:
+    """
+    Ids des séances correspondant à la recherche, du plus pertinent au moins
+    pertinent, au plus `limit`. `qs` restreint les séances en SQL (sous-requête),
+    sans rapatrier tous les ids correspondants.
+    """
+    match = _match_sql(term)
+    if match is None:
+        return []
+    sql, params = match
+    where = ""
+    if qs is not None:
+        sub_sql, sub_params = qs.order_by().values("pk").query.sql_with_params()
+        where = f"WHERE m.id IN ({sub_sql})"
+        params = [*params, *sub_params]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT m.id FROM ({sql}) AS m {where} "
+            "ORDER BY m.score, m.tiebreak LIMIT %s",
+            [*params, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_sessions(term: str, qs) -> list[int]:
+    """Restreint la recherche aux séances de `qs`, en conservant l'ordre de pertinence."""
+    return ranked_session_ids(term, qs)
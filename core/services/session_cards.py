@@ -0,0 +1,107 @@
+# core/services/session_cards.py
+
+from core.models import CoachAssignment
+from core.utils import PARIS_TZ
+from django.utils.dates import MONTHS_3, WEEKDAYS_ABBR
+
+from . import refdata
+
+# -----------------------------------------------------------
+# Cartes séance "légères" pour les pages publiques
+# -----------------------------------------------------------
+# Au lieu d'instances Session/Location/Category/Member complètes (notes,
+# horodatages...), on lit une projection values() des séances et, en une
+# seconde requête, les seules inscriptions confirmées (id et nom du coach).
+# Catégories et lieux viennent du cache de référence ; les titres sont
+# formatés en lot avec les abréviations résolues une fois par appel.
+
+CARD_FIELDS = (
+    "id",
+    "start_at",
+    "group",
+    "min_coaches",
+    "category_id",
+    "location_id",
+    "year_iso",
+    "week_iso",
+    "confirmed_cnt",
+)
+
+
+def card_values(qs, *extra):
+    """Projection d'un queryset de séances annoté `confirmed_cnt`."""
+    return qs.values(*CARD_FIELDS, *extra)
+
+
+def title_formatter():
+    """
+    Formateur de titres de séance, même rendu que Session.title_auto, avec
+    les noms de jours et de mois résolus une fois pour tout un lot.
+    """
+    days = [str(d) for d in WEEKDAYS_ABBR.values()]
+    months = {k: str(m).title() for k, m in MONTHS_3.items()}
+
+    def title(category_label, group, start_at, location_name=None) -> str:
+        dt = start_at.astimezone(PARIS_TZ)
+        parts = [category_label]
+        if group:
+            parts.append(f"— {group}")
+        parts.append(
+            f"— {days[dt.weekday()]} {dt.day:02d} {months[dt.month]} {dt:%H:%M}"
+        )
+        if location_name:
+            parts.append(f"— {location_name}")
+        return " ".join(parts)
+
+    return title
+
+
+def session_cards(rows) -> list[dict]:
+    """
+    Transforme des lignes `card_values` en cartes prêtes à afficher :
+    title, coaches [{id, name}], missing (+ champs de la projection).
+    """
+    rows = list(rows)
+    coaches = {r["id"]: [] for r in rows}
+    for session_id, coach_id, first, last in (
+        CoachAssignment.objects.filter(session_id__in=coaches, status="confirmed")
+        .order_by("pk")
+        .values_list("session_id", "coach_id", "coach__first_name", "coach__last_name")
+    ):
+        coaches[session_id].append({"id": coach_id, "name": f"{first} {last}"})
+
+    title = title_formatter()
+    labels = {c.id: c.label for c in refdata.categories()}
+    places = {loc.id: loc.name for loc in refdata.locations()}
+
+    cards = []
+    for r in rows:
+        cards.append(
+            {
+                **r,
+                "title": title(
+                    labels.get(r["category_id"], "None"),
+                    r["group"],
+                    r["start_at"],
+                    places.get(r["location_id"]),
+                ),
+                "coaches": coaches[r["id"]],
+                "missing": r["confirmed_cnt"] < r["min_coaches"],
+            }
+        )
+    return cards
+
+
+def iter_card_chunks(qs, chunk_size: int = 200, *extra):
+    """
+    Cartes d'un queryset de séances par lots de `chunk_size`, sans charger
+    l'ensemble : curseur `.iterator()` et une requête d'inscriptions par lot.
+    """
+    rows = []
+    for row in card_values(qs, *extra).iterator(chunk_size=chunk_size):
+        rows.append(row)
+        if len(rows) == chunk_size:
+            yield session_cards(rows)
+            rows = []
+    if rows:
+        yield session_cards(rows)
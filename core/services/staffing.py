@@ -0,0 +1,403 @@
+# core/services/staffing.py
+
+import heapq
+from collections import defaultdict
+from datetime import date, timedelta
+
+from core.models import CoachAssignment, Member, Session, StaffingProposal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import summaries
+from .eligibility import can_coach
+from .live import publish_coverage
+
+# -----------------------------------------------------------
+# Propositions d'encadrement automatiques
+# -----------------------------------------------------------
+# Séances à venir sous-encadrées × coachs éligibles, résolu par flot de coût
+# minimal, une semaine ISO à la fois (les chevauchements et la charge
+# hebdomadaire ne lient que des séances d'une même semaine) :
+#
+#   source → séance (besoin) → coach × créneau (1) → coach (1) → puits
+#
+# - créneau : groupe de séances qui se recouvrent dans le temps ; un coach
+#   en prend au plus une par groupe, donc jamais deux séances simultanées ;
+# - coach → puits : un arc de capacité 1 par séance supplémentaire dans la
+#   semaine, de coût croissant, jusqu'à STAFFING_MAX_PER_WEEK séances en
+#   comptant celles déjà confirmées : la charge se répartit ;
+# - séance → coach : coût de base augmenté de la charge du coach sur la
+#   période, pour solliciter d'abord les moins chargés.
+
+BASE_COST = 100
+LOAD_COST = 5
+WEEK_LOAD_COST = 40
+
+
+class MinCostFlow:
+    """Flot de coût minimal sur un graphe orienté à coûts entiers positifs."""
+
+    def __init__(self):
+        # nœud -> [arc] ; arc = [vers, capacité restante, coût, arc inverse]
+        self.graph = defaultdict(list)
+
+    def add_edge(self, u, v, cap: int, cost: int):
+        forward = [v, cap, cost, None]
+        backward = [u, 0, -cost, forward]
+        forward[3] = backward
+        self.graph[u].append(forward)
+        self.graph[v].append(backward)
+        return forward
+
+    def run(self, source, sink):
+        """
+        Pousse le flot maximal de coût minimal ; renvoie (flot, coût).
+        Primal-dual : Dijkstra (potentiels) donne les distances, puis un flot
+        bloquant (Dinic) sature tous les plus courts chemins d'un coup.
+        """
+        potential = defaultdict(int)  # coûts initiaux >= 0 : potentiels nuls
+        flow = cost = 0
+        while True:
+            dist = {source: 0}
+            heap, n = [(0, 0, source)], 1
+            while heap:
+                d, _, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                if u == sink:
+                    break
+                for v, cap, c, _ in self.graph[u]:
+                    if cap <= 0:
+                        continue
+                    nd = d + c + potential[u] - potential[v]
+                    if nd < dist.get(v, float("inf")):
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, n, v))
+                        n += 1
+            if sink not in dist:
+                return flow, cost
+            # arrêt au puits : distances plafonnées, coûts réduits toujours >= 0
+            for node in self.graph:
+                potential[node] += min(dist.get(node, dist[sink]), dist[sink])
+            pushed, pushed_cost = self._blocking_flow(source, sink, potential)
+            flow += pushed
+            cost += pushed_cost
+
+    def _blocking_flow(self, source, sink, potential):
+        """Flot bloquant sur les arcs de coût réduit nul (plus courts chemins)."""
+
+        def admissible(u, arc):
+            return arc[1] > 0 and arc[2] + potential[u] - potential[arc[0]] == 0
+
+        flow = cost = 0
+        while True:
+            level, queue = {source: 0}, [source]
+            for u in queue:
+                for arc in self.graph[u]:
+                    if arc[0] not in level and admissible(u, arc):
+                        level[arc[0]] = level[u] + 1
+                        queue.append(arc[0])
+            if sink not in level:
+                return flow, cost
+
+            position = dict.fromkeys(level, 0)
+            while True:
+                # chemin augmentant (DFS itérative, arcs déjà épuisés sautés)
+                path, u = [], source
+                while u != sink:
+                    arcs = self.graph[u]
+                    while position[u] < len(arcs):
+                        arc = arcs[position[u]]
+                        if level.get(arc[0]) == level[u] + 1 and admissible(u, arc):
+                            break
+                        position[u] += 1
+                    else:
+                        if u == source:
+                            break
+                        level.pop(u)  # impasse : retirée du graphe de niveaux
+                        u = path.pop()[3][0]
+                        position[u] += 1
+                        continue
+                    path.append(arc)
+                    u = arc[0]
+                if u != sink:
+                    break
+                push = min(arc[1] for arc in path)
+                for arc in path:
+                    arc[1] -= push
+                    arc[3][1] += push
+                    cost += push * arc[2]
+                flow += push
+
+
+def _overlap_groups(sessions):
+    """Numéro de groupe de recouvrement de chaque séance (triées par début)."""
+    groups, group, group_end = {}, -1, None
+    for s in sorted(sessions, key=lambda s: s["start_at"]):
+        if group_end is None or s["start_at"] >= group_end:
+            group += 1
+            group_end = s["end_at"]
+        else:
+            group_end = max(group_end, s["end_at"])
+        groups[s["id"]] = group
+    return groups
+
+
+def understaffed_sessions(qs=None):
+    """Séances à venir, actives, non verrouillées, avec moins de confirmés que requis."""
+    qs = Session.objects.all() if qs is None else qs
+    return (
+        qs.filter(is_cancelled=False, is_locked=False, start_at__gte=timezone.now())
+        .annotate(
+            confirmed_cnt=Count(
+                "assignments", filter=Q(assignments__status="confirmed")
+            )
+        )
+        .filter(confirmed_cnt__lt=F("min_coaches"))
+    )
+
+
+def propose(qs=None) -> list[StaffingProposal]:
+    """Calcule (sans les enregistrer) les propositions pour les séances de `qs`."""
+    sessions = list(
+        understaffed_sessions(qs).values(
+            "id",
+            "category_id",
+            "start_at",
+            "end_at",
+            "year_iso",
+            "week_iso",
+            "min_coaches",
+            "confirmed_cnt",
+        )
+    )
+    if not sessions:
+        return []
+    first = min(s["start_at"] for s in sessions)
+    last = max(s["end_at"] for s in sessions)
+
+    coaches = dict(
+        Member.objects.filter(is_active=True)
+        .exclude(eligibility_mask=0)
+        .values_list("pk", "eligibility_mask")
+    )
+    # inscriptions confirmées sur la période : charge, semaines, occupations
+    busy = defaultdict(list)  # (coach, année, semaine) -> [(début, fin)]
+    week_load = defaultdict(int)  # (coach, année, semaine) -> séances
+    period_load = defaultdict(int)
+    for coach_id, start, end, year, week in CoachAssignment.objects.filter(
+        status="confirmed",
+        coach_id__in=coaches,
+        session__is_cancelled=False,
+        session__start_at__lt=last,
+        session__end_at__gt=first - timedelta(days=7),
+    ).values_list(
+        "coach_id",
+        "session__start_at",
+        "session__end_at",
+        "session__year_iso",
+        "session__week_iso",
+    ):
+        busy[coach_id, year, week].append((start, end))
+        week_load[coach_id, year, week] += 1
+        period_load[coach_id] += 1
+
+    weeks = defaultdict(list)
+    for s in sessions:
+        weeks[s["year_iso"], s["week_iso"]].append(s)
+
+    max_per_week = settings.STAFFING_MAX_PER_WEEK
+    proposals = []
+    for (year, week), week_sessions in sorted(weeks.items()):
+        # une séance du dimanche soir peut déborder sur le lundi
+        previous = (
+            date.fromisocalendar(year, week, 1) - timedelta(days=1)
+        ).isocalendar()
+        groups = _overlap_groups(week_sessions)
+        mcf = MinCostFlow()
+        candidates = []  # (arc séance → créneau, séance, coach, coût)
+        used_coaches = set()
+        for s in week_sessions:
+            mcf.add_edge(
+                "source", ("s", s["id"]), s["min_coaches"] - s["confirmed_cnt"], 0
+            )
+            for coach_id, mask in coaches.items():
+                if not can_coach(mask, s["category_id"]):
+                    continue
+                if any(
+                    b_start < s["end_at"] and s["start_at"] < b_end
+                    for key in ((year, week), previous[:2])
+                    for b_start, b_end in busy.get((coach_id, *key), ())
+                ):
+                    continue  # déjà inscrit sur cette séance ou une séance simultanée
+                cost = BASE_COST + LOAD_COST * period_load[coach_id]
+                slot = ("g", coach_id, groups[s["id"]])
+                arc = mcf.add_edge(("s", s["id"]), slot, 1, cost)
+                candidates.append((arc, s["id"], coach_id, cost))
+                used_coaches.add(coach_id)
+
+        for slot_coach, group in {
+            (coach_id, groups[sid]) for _, sid, coach_id, _ in candidates
+        }:
+            mcf.add_edge(("g", slot_coach, group), ("c", slot_coach), 1, 0)
+        for coach_id in used_coaches:
+            already = week_load[coach_id, year, week]
+            for k in range(already, max_per_week):
+                mcf.add_edge(("c", coach_id), "sink", 1, WEEK_LOAD_COST * k)
+
+        mcf.run("source", "sink")
+        proposals += [
+            StaffingProposal(session_id=sid, coach_id=coach_id, cost=cost)
+            for arc, sid, coach_id, cost in candidates
+            if arc[1] == 0  # arc saturé : séance attribuée au coach
+        ]
+    return proposals
+
+
+@transaction.atomic
+def generate_proposals(qs=None) -> int:
+    """
+    Remplace les propositions en attente des séances de `qs` (toutes si None)
+    par un nouveau calcul ; renvoie le nombre de propositions.
+    """
+    proposals = propose(qs)
+    pending = StaffingProposal.objects.all()
+    if qs is not None:
+        pending = pending.filter(session__in=qs.values("pk"))
+    pending.delete()
+    StaffingProposal.objects.bulk_create(proposals, batch_size=1000)
+    return len(proposals)
+
+
+def _current_state(qs):
+    """
+    Propositions de `qs` avec l'état actuel de leur séance et de leur coach,
+    en une requête (sous-requêtes corrélées) : encadrement confirmé, charge de
+    la semaine, inscription confirmée qui chevauche (la séance elle-même comprise).
+    """
+    confirmed = CoachAssignment.objects.filter(status="confirmed").order_by()
+    session_confirmed = (
+        confirmed.filter(session=OuterRef("session"))
+        .values("session")
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    coach_week = (
+        confirmed.filter(
+            coach=OuterRef("coach"),
+            session__is_cancelled=False,
+            session__year_iso=OuterRef("session__year_iso"),
+            session__week_iso=OuterRef("session__week_iso"),
+        )
+        .values("coach")
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    busy = confirmed.filter(
+        coach=OuterRef("coach"),
+        session__is_cancelled=False,
+        session__start_at__lt=OuterRef("session__end_at"),
+        session__end_at__gt=OuterRef("session__start_at"),
+    )
+    return (
+        qs.order_by("cost", "pk")
+        .annotate(
+            confirmed_cnt=Coalesce(Subquery(session_confirmed), 0),
+            week_load=Coalesce(Subquery(coach_week), 0),
+            busy=Exists(busy),
+        )
+        .values(
+            "session_id",
+            "coach_id",
+            "confirmed_cnt",
+            "week_load",
+            "busy",
+            "session__category_id",
+            "session__min_coaches",
+            "session__is_cancelled",
+            "session__is_locked",
+            "session__start_at",
+            "session__end_at",
+            "session__year_iso",
+            "session__week_iso",
+            "coach__is_active",
+            "coach__eligibility_mask",
+        )
+    )
+
+
+def still_valid(rows):
+    """
+    Paires (séance, coach) encore applicables, par coût croissant : séance
+    active et à venir, encore sous-encadrée (places restantes), coach actif,
+    éligible, libre sur ce créneau et sous STAFFING_MAX_PER_WEEK ; les paires
+    retenues comptent pour les suivantes.
+    """
+    now = timezone.now()
+    max_per_week = settings.STAFFING_MAX_PER_WEEK
+    filled = defaultdict(int)  # séance -> paires retenues
+    week_load = defaultdict(int)  # (coach, année, semaine) -> paires retenues
+    taken = defaultdict(list)  # coach -> [(début, fin)] des paires retenues
+    pairs = []
+    for row in rows:
+        session_id, coach_id = row["session_id"], row["coach_id"]
+        start, end = row["session__start_at"], row["session__end_at"]
+        week = (coach_id, row["session__year_iso"], row["session__week_iso"])
+        if (
+            row["session__is_cancelled"]
+            or row["session__is_locked"]
+            or start < now
+            or not row["coach__is_active"]
+            or row["busy"]
+            or not can_coach(
+                row["coach__eligibility_mask"], row["session__category_id"]
+            )
+            or row["confirmed_cnt"] + filled[session_id] >= row["session__min_coaches"]
+            or row["week_load"] + week_load[week] >= max_per_week
+            or any(
+                t_start < end and start < t_end for t_start, t_end in taken[coach_id]
+            )
+        ):
+            continue
+        filled[session_id] += 1
+        week_load[week] += 1
+        taken[coach_id].append((start, end))
+        pairs.append((session_id, coach_id))
+    return pairs
+
+
+@transaction.atomic
+def apply_proposals(qs) -> tuple[int, int]:
+    """
+    Confirme les propositions de `qs` encore valables (voir still_valid) en
+    une écriture (insertion ou réinscription d'un coach désinscrit), puis
+    retire toutes les propositions de `qs`. Renvoie (confirmées, écartées :
+    devenues caduques depuis le calcul).
+    """
+    rows = list(_current_state(qs))
+    pairs = still_valid(rows)
+    now = timezone.now()
+    CoachAssignment.objects.bulk_create(
+        [
+            CoachAssignment(
+                session_id=session_id,
+                coach_id=coach_id,
+                status="confirmed",
+                updated_at=now,
+            )
+            for session_id, coach_id in pairs
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["session", "coach"],
+        update_fields=["status", "updated_at"],
+    )
+    qs.delete()
+    session_ids = {session_id for session_id, _ in pairs}
+    for session_id in session_ids:
+        publish_coverage(session_id)
+    summaries.touch(session_ids)
+    return len(pairs), len(rows) - len(pairs)
@@ -0,0 +1,66 @@
+# core/services/stats.py
+
+import json
+
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Aggregate, CharField, Value
+from django.utils.functional import cached_property
+
+# -----------------------------------------------------------
+# Agrégats et comptages pour les listes d'administration
+# -----------------------------------------------------------
+
+# en dessous, le COUNT(*) exact reste bon marché
+APPROX_COUNT_THRESHOLD = 10_000
+
+
+class StringAgg(Aggregate):
+    """Concaténation de chaînes : STRING_AGG (PostgreSQL), GROUP_CONCAT (SQLite)."""
+
+    function = "STRING_AGG"
+    template = "%(function)s(%(distinct)s%(expressions)s)"
+    allow_distinct = True
+    output_field = CharField()
+
+    def __init__(self, expression, delimiter: str, **extra):
+        super().__init__(expression, Value(delimiter), **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, function="GROUP_CONCAT", **extra_context
+        )
+
+
+def estimated_count(qs) -> int | None:
+    """
+    Nombre de lignes estimé par les statistiques du planificateur
+    (PostgreSQL) : reltuples pour la table entière, estimation d'EXPLAIN
+    sinon. None si indisponible (autre base, table jamais analysée).
+    """
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        if not qs.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [qs.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+        plan = json.loads(qs.order_by().explain(format="json"))
+    # selon le pilote, le plan JSON arrive dans une liste ou déjà déballé
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan["Plan"]["Plan Rows"])
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator qui remplace le COUNT(*) exact par l'estimation sur les grosses tables."""
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate >= APPROX_COUNT_THRESHOLD:
+            return estimate
+        return super().count
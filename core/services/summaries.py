@@ -0,0 +1,224 @@
+# core/services/summaries.py
+
+import threading
+from datetime import date
+
+from core.models import (
+    CoachAssignment,
+    CoachMonthlyLoad,
+    Session,
+    WeeklyCoverage,
+)
+from core.utils import PARIS_TZ
+from django.db import transaction
+from django.db.models import (
+    Count,
+    DateField,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce, TruncMonth
+
+# -----------------------------------------------------------
+# Tables de synthèse de l'encadrement
+# -----------------------------------------------------------
+# WeeklyCoverage (semaine ISO × catégorie × lieu) et CoachMonthlyLoad
+# (coach × mois) sont lues telles quelles par le tableau de bord.
+# Chaque écriture sur des séances ou inscriptions signale les séances
+# touchées avec touch(), de préférence AVANT de les modifier : les clés de
+# synthèse sont relevées tout de suite (état avant) puis à nouveau au
+# commit (état après), et seules ces lignes sont recalculées, par
+# quelques requêtes groupées. Les inscriptions enregistrées ou supprimées
+# une à une (save(), delete(), cascades) sont signalées par core.signals ;
+# les écritures ensemblistes (update(), bulk_create) par leur service.
+# Les touch() d'une même transaction sont regroupés en un seul recalcul.
+# `rebuild_summaries` recalcule tout.
+
+
+def _local_month():
+    """Premier jour du mois (heure de Paris) de la séance de l'inscription."""
+    return TruncMonth("session__start_at", tzinfo=PARIS_TZ, output_field=DateField())
+
+
+def _session_keys(session_ids):
+    """Clés (semaine, catégorie, lieu) et (coach, mois) des séances."""
+    weeks = set(
+        Session.objects.filter(pk__in=session_ids).values_list(
+            "year_iso", "week_iso", "category_id", "location_id"
+        )
+    )
+    months = set(
+        CoachAssignment.objects.filter(session_id__in=session_ids)
+        .annotate(month=_local_month())
+        .values_list("coach_id", "month")
+    )
+    return weeks, months
+
+
+# touch() en attente du commit, par thread : {"sessions", "weeks", "months"}
+_pending = threading.local()
+
+
+def touch(session_ids):
+    """Planifie, au commit, le recalcul des lignes de synthèse des séances."""
+    if mark(session_ids):
+        # un rappel par touch() : le premier exécuté recalcule tout le lot,
+        # les suivants le trouvent vide (après un rollback, le lot est repris
+        # au commit suivant : recalcul en trop, jamais en moins)
+        transaction.on_commit(_flush)
+
+
+def mark(session_ids) -> bool:
+    """
+    Relève les clés des séances (état avant) sans planifier le recalcul : pour
+    un pre_save hors transaction, où on_commit s'exécuterait avant l'écriture.
+    """
+    session_ids = set(session_ids)
+    if not session_ids:
+        return False
+    weeks, months = _session_keys(session_ids)
+    batch = getattr(_pending, "batch", None)
+    if batch is None:
+        batch = _pending.batch = {"sessions": set(), "weeks": set(), "months": set()}
+    batch["sessions"] |= session_ids
+    batch["weeks"] |= weeks
+    batch["months"] |= months
+    return True
+
+
+def _flush():
+    batch = getattr(_pending, "batch", None)
+    _pending.batch = None
+    if not batch:
+        return
+    after_weeks, after_months = _session_keys(batch["sessions"])
+    refresh(batch["weeks"] | after_weeks, batch["months"] | after_months)
+
+
+def _confirmed_count():
+    return Coalesce(
+        Subquery(
+            CoachAssignment.objects.filter(session=OuterRef("pk"), status="confirmed")
+            .order_by()
+            .values("session")
+            .annotate(n=Count("pk"))
+            .values("n")
+        ),
+        0,
+        output_field=IntegerField(),
+    )
+
+
+def weekly_rows(sessions) -> list[WeeklyCoverage]:
+    """Lignes WeeklyCoverage des séances actives de `sessions`, en une requête groupée."""
+    rows = (
+        sessions.filter(is_cancelled=False)
+        .annotate(confirmed_cnt=_confirmed_count())
+        .values("year_iso", "week_iso", "category_id", "location_id")
+        .annotate(
+            n_sessions=Count("pk"),
+            n_covered=Count("pk", filter=Q(confirmed_cnt__gte=F("min_coaches"))),
+            n_confirmed=Sum("confirmed_cnt"),
+            n_required=Sum("min_coaches"),
+        )
+        .order_by()
+    )
+    return [
+        WeeklyCoverage(
+            year_iso=r["year_iso"],
+            week_iso=r["week_iso"],
+            category_id=r["category_id"],
+            location_id=r["location_id"],
+            sessions=r["n_sessions"],
+            covered=r["n_covered"],
+            confirmed=r["n_confirmed"] or 0,
+            required=r["n_required"] or 0,
+        )
+        for r in rows
+    ]
+
+
+def monthly_rows(assignments) -> list[CoachMonthlyLoad]:
+    """Lignes CoachMonthlyLoad des inscriptions confirmées sur séances actives."""
+    rows = (
+        assignments.filter(status="confirmed", session__is_cancelled=False)
+        .annotate(month=_local_month())
+        .values("coach_id", "month")
+        .annotate(n_sessions=Count("pk"), n_minutes=Sum("session__duration_min"))
+        .order_by()
+    )
+    return [
+        CoachMonthlyLoad(
+            coach_id=r["coach_id"],
+            month=r["month"],
+            sessions=r["n_sessions"],
+            minutes=r["n_minutes"] or 0,
+        )
+        for r in rows
+    ]
+
+
+def _month_bounds(months):
+    first = min(m for _, m in months)
+    last = max(m for _, m in months)
+    return first, date(last.year + last.month // 12, last.month % 12 + 1, 1)
+
+
+# clés (semaine, catégorie, lieu) par requête : un terme OR par clé, et
+# SQLite refuse les arbres d'expressions trop profonds (vers 1000 termes)
+KEY_CHUNK = 200
+
+
+def _week_chunks(weeks):
+    weeks = list(weeks)
+    for i in range(0, len(weeks), KEY_CHUNK):
+        yield weeks[i : i + KEY_CHUNK]
+
+
+@transaction.atomic
+def refresh(weeks, months):
+    """Recalcule les lignes des clés données (semaine, catégorie, lieu) / (coach, mois)."""
+    for chunk in _week_chunks(weeks):
+        key_q = Q()
+        for year, week, category_id, location_id in chunk:
+            key_q |= Q(
+                year_iso=year,
+                week_iso=week,
+                category_id=category_id,
+                location_id=location_id,
+            )
+        WeeklyCoverage.objects.filter(key_q).delete()
+        WeeklyCoverage.objects.bulk_create(weekly_rows(Session.objects.filter(key_q)))
+
+    if months:
+        coach_ids = {coach_id for coach_id, _ in months}
+        first, end = _month_bounds(months)
+        rows = monthly_rows(
+            CoachAssignment.objects.filter(
+                coach_id__in=coach_ids,
+                session__day__gte=first,
+                session__day__lt=end,
+            )
+        )
+        CoachMonthlyLoad.objects.filter(
+            coach_id__in=coach_ids, month__gte=first, month__lt=end
+        ).delete()
+        CoachMonthlyLoad.objects.bulk_create(rows)
+
+
+@transaction.atomic
+def rebuild() -> tuple[int, int]:
+    """Recalcule entièrement les deux tables ; renvoie leurs nombres de lignes."""
+    WeeklyCoverage.objects.all().delete()
+    CoachMonthlyLoad.objects.all().delete()
+    weekly = WeeklyCoverage.objects.bulk_create(
+        weekly_rows(Session.objects.all()), batch_size=1000
+    )
+    monthly = CoachMonthlyLoad.objects.bulk_create(
+        monthly_rows(CoachAssignment.objects.all()), batch_size=1000
+    )
+    return len(weekly), len(monthly)
@@ -0,0 +1,196 @@
+# core/services/workload.py
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from core.models import CoachAssignment, Member
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Q, When
+
+from .calendar import season_of
+from .closures import day_start
+
+# -----------------------------------------------------------
+# Charge des coachs sur une saison (analyse pandas)
+# -----------------------------------------------------------
+# Les inscriptions de la saison sont lues en une requête dans un tableau
+# numpy d'entiers ; les indicateurs par coach sont calculés par opérations
+# vectorisées (masques, groupby), sans boucle Python par inscription :
+# - séances confirmées, heures, semaines actives, pic hebdomadaire ;
+# - charge moyenne par semaine de la période, rapportée à la médiane des coachs ;
+# - désinscriptions (updated_at : date du passage à "withdrawn"), dont tardives.
+# Statut et retard sont codés en 0/1 par la requête : pas de chaîne ni de
+# datetime Python à convertir par ligne.
+
+COLUMNS = ["coach_id", "withdrawn", "late", "duration_min", "year_iso", "week_iso"]
+
+OVERLOAD_RATIO = 1.5  # charge hebdo >= 1,5 × la médiane : surchargé
+UNDERUSE_RATIO = 0.5  # charge hebdo <= 0,5 × la médiane : sous-utilisé
+LATE_WITHDRAWAL = timedelta(hours=48)  # désinscription à moins de 48 h
+
+
+def season_assignments(season: int | None = None):
+    """Inscriptions (confirmées et désinscrites) des séances actives de la saison."""
+    if season is None:
+        season = season_of(date.today())
+    return CoachAssignment.objects.filter(
+        session__is_cancelled=False,
+        session__start_at__gte=day_start(date(season, 8, 1)),
+        session__start_at__lt=day_start(date(season + 1, 8, 1)),
+    )
+
+
+def assignment_frame(assignments) -> pd.DataFrame:
+    """Une ligne par inscription, colonnes entières COLUMNS, en une requête."""
+    late = Q(updated_at__gt=F("session__start_at") - LATE_WITHDRAWAL)
+    rows = (
+        assignments.order_by()
+        .annotate(
+            withdrawn=Case(
+                When(status="withdrawn", then=1),
+                default=0,
+                output_field=IntegerField(),
+            ),
+            # CASE imbriqué : la comparaison de dates (fonction Python sous
+            # SQLite) n'est évaluée que pour les désinscriptions
+            late=Case(
+                When(
+                    status="withdrawn",
+                    then=Case(When(late, then=1), default=0),
+                ),
+                default=0,
+                output_field=IntegerField(),
+            ),
+        )
+        .values_list(
+            "coach_id",
+            "withdrawn",
+            "late",
+            "session__duration_min",
+            "session__year_iso",
+            "session__week_iso",
+        )
+    )
+    # SQL compilé par l'ORM mais lu au curseur : pas de convertisseur Python
+    # par valeur (int() sur chaque CASE), les tuples vont droit dans numpy
+    sql, params = rows.query.sql_with_params()
+    with connections[rows.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        data = np.array(cursor.fetchall(), dtype=np.int64)
+    return pd.DataFrame(data.reshape(-1, len(COLUMNS)), columns=COLUMNS)
+
+
+def coach_workload(df: pd.DataFrame, coach_ids=None) -> pd.DataFrame:
+    """
+    Indicateurs par coach (index coach_id) à partir de assignment_frame().
+    coach_ids : coachs à faire figurer même sans inscription (charge nulle).
+    """
+    withdrawn = df["withdrawn"].to_numpy(dtype=bool)
+    confirmed = ~withdrawn
+    late = withdrawn & df["late"].to_numpy(dtype=bool)
+    week = df["year_iso"].to_numpy() * 100 + df["week_iso"].to_numpy()
+    work = pd.DataFrame(
+        {
+            "coach_id": df["coach_id"].to_numpy(),
+            "week": week,
+            "confirmed": confirmed,
+            "withdrawn": withdrawn,
+            "late": late,
+            "minutes": np.where(confirmed, df["duration_min"].to_numpy(), 0),
+        }
+    )
+
+    by_coach = work.groupby("coach_id")
+    result = pd.DataFrame(
+        {
+            "assignments": by_coach.size(),
+            "sessions": by_coach["confirmed"].sum(),
+            "withdrawn": by_coach["withdrawn"].sum(),
+            "late_withdrawals": by_coach["late"].sum(),
+            "hours": by_coach["minutes"].sum() / 60,
+        }
+    )
+    per_week = work[work["confirmed"]].groupby(["coach_id", "week"]).size()
+    weekly = per_week.groupby(level="coach_id")
+    result["active_weeks"] = weekly.size()
+    result["peak_week"] = weekly.max()
+
+    if coach_ids is not None:
+        result = result.reindex(result.index.union(pd.Index(coach_ids)))
+    result = result.fillna(0)
+    counts = [
+        "assignments",
+        "sessions",
+        "withdrawn",
+        "late_withdrawals",
+        "active_weeks",
+        "peak_week",
+    ]
+    result[counts] = result[counts].astype(np.int64)
+
+    # semaines de la période : celles où au moins une séance a un inscrit
+    weeks = max(work["week"].nunique(), 1)
+    result["per_week"] = result["sessions"] / weeks
+    median = median_per_week(result)
+    result["load_ratio"] = result["per_week"] / median if median else 0.0
+    result["withdrawal_rate"] = (
+        result["withdrawn"] / result["assignments"].where(result["assignments"] > 0)
+    ).fillna(0.0)
+    result["flag"] = np.select(
+        [
+            result["load_ratio"] >= OVERLOAD_RATIO,
+            result["load_ratio"] <= UNDERUSE_RATIO,
+        ],
+        ["surchargé", "sous-utilisé"],
+        default="",
+    )
+    result.index.name = "coach_id"
+    return result
+
+
+def median_per_week(result: pd.DataFrame) -> float | None:
+    """Charge hebdomadaire médiane des coachs ayant au moins une séance."""
+    median = result.loc[result["sessions"] > 0, "per_week"].median()
+    return None if pd.isna(median) else float(median)
+
+
+def season_workload(season: int | None = None) -> pd.DataFrame:
+    """
+    Rapport de la saison : coachs actifs qualifiés (même sans inscription)
+    et coachs inscrits, nommés, du plus au moins chargé.
+    """
+    df = assignment_frame(season_assignments(season))
+    coaches = Member.objects.filter(is_active=True).exclude(eligibility_mask=0)
+    result = coach_workload(df, coaches.values_list("pk", flat=True))
+    names = {
+        pk: f"{first} {last}"
+        for pk, first, last in Member.objects.filter(pk__in=result.index).values_list(
+            "pk", "first_name", "last_name"
+        )
+    }
+    result.insert(0, "coach", result.index.map(names))
+    return result.sort_values(["per_week", "coach"], ascending=[False, True])
+
+
+CSV_HEADERS = {
+    "coach": "Coach",
+    "sessions": "Séances",
+    "hours": "Heures",
+    "active_weeks": "Semaines actives",
+    "per_week": "Séances / semaine",
+    "peak_week": "Pic hebdo",
+    "load_ratio": "Charge / médiane",
+    "assignments": "Inscriptions",
+    "withdrawn": "Désinscriptions",
+    "late_withdrawals": "Désinscriptions tardives",
+    "withdrawal_rate": "Taux de désinscription",
+    "flag": "Alerte",
+}
+
+
+def write_csv(result: pd.DataFrame, buffer):
+    """Écrit le rapport en CSV (en-têtes en français, décimales arrondies)."""
+    result[list(CSV_HEADERS)].round(
+        {"hours": 1, "per_week": 2, "load_ratio": 2, "withdrawal_rate": 3}
+    ).rename(columns=CSV_HEADERS).to_csv(buffer, index_label="id")
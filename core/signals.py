@@ -0,0 +1,125 @@
+# core/signals.py
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .models import Category, CoachAssignment, Location, Member, Session, Tombstone
+from .services import invalidation, summaries
+from .services.eligibility import refresh_eligibility
+from .services.search import reindex_sessions, unindex_sessions
+
+# -----------------------------------------------------------
+# Triggers du bus d'invalidation
+# -----------------------------------------------------------
+
+
+@receiver(post_migrate)
+def restore_version_triggers(sender, using, **kwargs):
+    if sender.name == "core":
+        invalidation.ensure_triggers(connections[using])
+
+
+# -----------------------------------------------------------
+# Pierres tombales pour la synchro incrémentale
+# -----------------------------------------------------------
+
+
+@receiver(post_delete, sender=Session)
+def session_deleted(sender, instance, **kwargs):
+    Tombstone.objects.create(kind="session", object_id=instance.pk)
+    unindex_sessions([instance.pk])
+
+
+@receiver(post_delete, sender=CoachAssignment)
+def assignment_deleted(sender, instance, **kwargs):
+    Tombstone.objects.create(kind="assignment", object_id=instance.pk)
+
+
+# -----------------------------------------------------------
+# Masque d'éligibilité des licenciés
+# -----------------------------------------------------------
+
+
+@receiver(m2m_changed, sender=Member.qualifications.through)
+def qualifications_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        refresh_eligibility([instance.pk])
+    elif pk_set is not None:
+        refresh_eligibility(pk_set)
+    else:
+        # category.coaches.clear() : on ne connaît plus les licenciés concernés
+        refresh_eligibility()
+
+
+@receiver(post_save, sender=Category)
+def category_loaded(sender, instance, raw, **kwargs):
+    # fixture (loaddata) sans bit : save() n'est pas appelé en mode raw
+    if raw and instance.bit is None:
+        instance.save(update_fields=["bit"])
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    # les lignes m2m partent en cascade sans signal : le bit libéré doit
+    # disparaître des masques avant d'être réattribué
+    refresh_eligibility(
+        Member.objects.alias(_bit=F("eligibility_mask").bitand(instance.mask))
+        .exclude(_bit=0)
+        .values_list("pk", flat=True)
+    )
+
+
+# -----------------------------------------------------------
+# Index plein texte des séances
+# -----------------------------------------------------------
+
+
+@receiver(post_save, sender=Session)
+def session_saved(sender, instance, **kwargs):
+    reindex_sessions([instance.pk])
+
+
+@receiver(post_save, sender=Location)
+def location_saved(sender, instance, created, **kwargs):
+    if not created:
+        reindex_sessions(instance.sessions.values_list("pk", flat=True))
+
+
+# -----------------------------------------------------------
+# Tables de synthèse de l'encadrement
+# -----------------------------------------------------------
+
+
+@receiver(pre_delete, sender=Session)
+def session_deleting(sender, instance, **kwargs):
+    # clés relevées tant que la séance et ses inscriptions existent
+    summaries.touch([instance.pk])
+
+
+@receiver(pre_save, sender=CoachAssignment)
+def assignment_saving(sender, instance, raw, **kwargs):
+    # avant l'écriture : le (coach, mois) d'avant un changement de coach
+    if not raw:
+        summaries.mark([instance.session_id])
+
+
+@receiver(post_save, sender=CoachAssignment)
+def assignment_saved(sender, instance, raw, **kwargs):
+    if not raw:
+        summaries.touch([instance.session_id])
+
+
+@receiver(pre_delete, sender=CoachAssignment)
+def assignment_deleting(sender, instance, **kwargs):
+    # y compris en cascade (suppression d'un licencié ou d'une séance)
+    summaries.touch([instance.session_id])
@@ -1,6 +1,10 @@
 (function () {
-  // Lecture du JSON global injecté via {{ available_coaches|json_script:"coachesData" }}
-  const COACHES = JSON.parse(document.getElementById('coachesData').textContent || '{}');
+  // Lecture du JSON injecté via {{ available_coaches|json_script:"coachesData" }}
+  // (en vue complète ?all=1 : un bloc "coachesData-<n>" par lot de séances)
+  const COACHES = Object.assign({}, ...Array.from(
+    document.querySelectorAll('script[id^="coachesData"]'),
+    el => JSON.parse(el.textContent || '{}')
+  ));
 
   const debounce = (fn, delay = 250) => {
     let t;
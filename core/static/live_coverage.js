@@ -0,0 +1,35 @@
+(function () {
+  // Mise à jour en direct des cartes séance via le flux SSE de la catégorie
+  if (!window.EventSource) return;
+
+  const script = document.currentScript;
+  const unassignUrl = script.dataset.unassignUrl;
+  const origin = encodeURIComponent(script.dataset.origin);
+
+  const escapeHtml = s => s.replace(/[&<>"']/g, c => ({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+  }[c]));
+
+  const chip = (sid, c) =>
+    `<span class="coach-chip">${escapeHtml(c.name)} ` +
+    `<a class="remove" title="Retirer" ` +
+    `href="${unassignUrl}?session_id=${sid}&coach_id=${c.id}&origin=${origin}">×</a></span>`;
+
+  const source = new EventSource(script.dataset.url);
+
+  source.addEventListener('coverage', e => {
+    const ev = JSON.parse(e.data);
+    const card = document.getElementById(`session-${ev.session_id}`);
+    if (!card) return; // séance absente de la page courante
+
+    const chips = ev.coaches.length
+      ? ev.coaches.map(c => chip(ev.session_id, c)).join('')
+      : 'Aucun';
+    card.querySelector('.session-coaches').innerHTML = `Encadrants : ${chips}`;
+    card.querySelector('.confirmed-cnt').textContent = ev.confirmed_cnt;
+
+    const missing = ev.confirmed_cnt < ev.min_coaches;
+    card.classList.toggle('session-missing', missing);
+    card.classList.toggle('session-enough', !missing);
+  });
+})();
@@ -1,3 +1,1624 @@
-from django.test import TestCase
+import asyncio
+import gzip
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from . import views
+from .forms import SessionAdminForm
+from .management.commands.explain_queries import parse_plan
+from .models import (
+    HEAD_COACH_MASK,
+    CalendarDay,
+    Category,
+    Closure,
+    CoachAssignment,
+    CoachMonthlyLoad,
+    DataVersion,
+    Location,
+    Member,
+    Session,
+    StaffingProposal,
+    WeeklyCoverage,
+)
+from .services import (
+    admission,
+    bulk,
+    calendar,
+    capacity,
+    changes,
+    closures,
+    compression,
+    eligibility,
+    ical,
+    invalidation,
+    live,
+    overlap,
+    publish,
+    ratelimit,
+    refdata,
+    staffing,
+    stats,
+    summaries,
+    workload,
+)
+from .services.closures import ClosedDays
+from .services.eligibility import can_coach, eligible_members
+from .services.public_view_utils import get_coach_agenda, get_public_sessions
+from .services.recurrence import generate_series, propagate_form_fields
+from .services.search import (
+    deferred_reindex,
+    matching_sessions,
+    name_q,
+    ranked_session_ids,
+    reindex_sessions,
+    search_sessions,
+)
+from .services.session_cards import card_values, iter_card_chunks, session_cards
+from .services.staffing import MinCostFlow
+from .utils import PARIS_TZ, to_paris
+
+# semaine ISO de référence, dans le futur : les séances restent "à venir"
+MONDAY = date.fromisocalendar(date.today().year + 2, 10, 1)
+
+
+def at(day: int, hour: float) -> datetime:
+    """Instant (heure de Paris) du jour `day` de la semaine de référence."""
+    moment = datetime.combine(MONDAY + timedelta(days=day), time(), tzinfo=PARIS_TZ)
+    return moment + timedelta(hours=hour)
+
+
+class ServiceTestCase(TestCase):
+    """Données de base : deux catégories et trois coachs, qualifiés pour l'une ou l'autre."""
+
+    def setUp(self):
+        self.swim = Category.objects.create(code="swim", label="Natation")
+        self.run = Category.objects.create(code="run", label="Course")
+        self.anna = self.coach("Anna", self.swim)
+        self.bruno = self.coach("Bruno", self.swim)
+        self.chloe = self.coach("Chloé", self.run)
+        self.refresh_reference_data()
+        cache.clear()  # pages publiques mises en cache par un test précédent
+
+    def refresh_reference_data(self):
+        # les versions des données ne sont relues qu'à chaque requête HTTP
+        invalidation.refresh()
+        for cache in (refdata._categories, refdata._locations, refdata._coaches):
+            cache.clear()
+
+    def coach(self, first_name, *categories, **fields):
+        member = Member.objects.create(
+            first_name=first_name, last_name="Test", **fields
+        )
+        member.qualifications.add(*categories)
+        member.refresh_from_db()
+        return member
+
+    def session(self, day, hour, duration_min=60, category=None, **fields):
+        return Session.objects.create(
+            category=category or self.swim,
+            start_at=at(day, hour),
+            duration_min=duration_min,
+            group=fields.pop("group", ""),
+            **fields,
+        )
+
+    def confirm(self, session, coach, status="confirmed"):
+        return CoachAssignment.objects.create(
+            session=session, coach=coach, status=status
+        )
+
+
+# -----------------------------------------------------------
+# API de synchro incrémentale
+# -----------------------------------------------------------
+
+
+class ChangesTokenTests(TestCase):
+    def test_round_trip(self):
+        moment = (timezone.now() - timedelta(seconds=1)).replace(microsecond=123456)
+        self.assertEqual(changes.decode_token(changes.encode_token(moment)), moment)
+
+    def test_missing_token(self):
+        self.assertIsNone(changes.decode_token(None))
+        self.assertIsNone(changes.decode_token(""))
+
+    def test_invalid_tokens(self):
+        future = timezone.now() + timedelta(days=1)
+        for token in (
+            "abc",
+            "-5",
+            "99999999999999999999999",
+            changes.encode_token(future),
+        ):
+            with self.subTest(token=token), self.assertRaises(ValueError):
+                changes.decode_token(token)
+
+    def test_view_rejects_invalid_tokens(self):
+        for token in ("abc", "99999999999999999999999", "9" * 17):
+            with self.subTest(token=token):
+                response = self.client.get("/public/api/changes", {"since": token})
+                self.assertEqual(response.status_code, 400)
+
+
+class ChangesTests(ServiceTestCase):
+    @override_settings(CHANGES_SAFETY_LAG=5)
+    def test_snapshot_then_delta(self):
+        session = self.session(0, 18)
+        snapshot = changes.get_changes(None)
+        self.assertEqual([s["id"] for s in snapshot["sessions"]], [session.pk])
+        since = changes.decode_token(snapshot["token"])
+        self.assertLess(since, timezone.now() - timedelta(seconds=4))
+
+        assignment = self.confirm(session, self.anna)
+        delta = changes.get_changes(since)
+        self.assertEqual([a["id"] for a in delta["assignments"]], [assignment.pk])
+        # lignes des 5 dernières secondes renvoyées de nouveau, jamais perdues
+        self.assertEqual([s["id"] for s in delta["sessions"]], [session.pk])
+        self.assertGreaterEqual(changes.decode_token(delta["token"]), since)
+
+    def test_deletions_and_category_filter(self):
+        since = timezone.now() - timedelta(seconds=1)
+        kept = self.session(0, 18)
+        self.session(1, 18, category=self.run).delete()
+
+        delta = changes.get_changes(since, "swim")
+        self.assertEqual([s["id"] for s in delta["sessions"]], [kept.pk])
+        self.assertEqual(len(delta["deleted"]["session"]), 1)
+
+    def test_view(self):
+        self.session(0, 18)
+        response = self.client.get("/public/api/changes", {"category": "swim"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data["sessions"]), 1)
+        changes.decode_token(data["token"])
+
+
+# -----------------------------------------------------------
+# Flux SSE de couverture
+# -----------------------------------------------------------
+
+
+class LiveCoverageTests(ServiceTestCase):
+    def test_coverage_events(self):
+        session = self.session(0, 18, min_coaches=2)
+        self.confirm(session, self.anna)
+        self.confirm(session, self.bruno, status="withdrawn")
+
+        [event] = live.coverage_events([session.pk])
+        self.assertEqual(event["category"], "swim")
+        self.assertEqual((event["confirmed_cnt"], event["min_coaches"]), (1, 2))
+        self.assertEqual([c["id"] for c in event["coaches"]], [self.anna.pk])
+
+    def test_wsgi_catch_up_batch(self):
+        since = changes.encode_token(timezone.now() - timedelta(seconds=1))
+        session = self.session(0, 18)
+        self.confirm(session, self.anna)
+        self.session(0, 18, category=self.run)
+
+        response = self.client.get("/public/category/swim/live/", {"since": since})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = b"".join(response.streaming_content).decode()
+        self.assertTrue(body.startswith("retry: "))
+        self.assertEqual(body.count("event: coverage"), 1)
+        self.assertIn(f'"session_id": {session.pk}', body)
+
+    @override_settings(LIVE_POLL_INTERVAL=60)
+    async def test_stream_polls_database_on_wake_up(self):
+        token = changes.encode_token(timezone.now() - timedelta(seconds=1))
+        stream = views._coverage_stream("swim", token)
+        self.assertTrue((await anext(stream)).startswith("retry: "))
+
+        # inscription faite "ailleurs" : le réveil ne porte que l'id, la base fait foi
+        session = await sync_to_async(self.session)(0, 18)
+        await sync_to_async(self.confirm)(session, self.anna)
+        live.broker.publish(["swim"], {"session_id": session.pk})
+        message = await asyncio.wait_for(anext(stream), timeout=5)
+        await stream.aclose()
+
+        self.assertIn("event: coverage", message)
+        self.assertIn('"confirmed_cnt": 1', message)
+        self.assertFalse(live.broker.has_subscribers("swim"))
+
+
+# -----------------------------------------------------------
+# Bus d'invalidation
+# -----------------------------------------------------------
+
+
+class InvalidationTests(ServiceTestCase):
+    def versions(self):
+        return dict(DataVersion.objects.values_list("name", "version"))
+
+    def assertBumps(self, family, write):
+        before = self.versions()
+        write()
+        after = self.versions()
+        self.assertGreater(after[family], before[family], family)
+
+    def test_writes_bump_their_family(self):
+        session = self.session(0, 18)
+        writes = {
+            "session": lambda: Session.objects.filter(pk=session.pk).update(
+                min_coaches=2
+            ),
+            "assignment": lambda: self.confirm(session, self.anna),
+            "member": lambda: self.anna.qualifications.add(self.run),
+            "category": lambda: Category.objects.create(code="bike", label="Vélo"),
+            "location": lambda: Location.objects.create(name="Piscine"),
+        }
+        for family, write in writes.items():
+            with self.subTest(family=family):
+                self.assertBumps(family, write)
+
+    def test_local_copy_refreshed_by_sync(self):
+        invalidation.refresh()
+        before = invalidation.versions_for("category")
+        Category.objects.create(code="bike", label="Vélo")
+        self.assertEqual(invalidation.versions_for("category"), before)
+        invalidation.sync()  # sans écoute LISTEN : relecture à chaque requête
+        self.assertGreater(invalidation.versions_for("category"), before)
+
+    @skipUnless(connection.vendor == "sqlite", "triggers SQLite")
+    def test_ensure_triggers_restores_dropped_triggers(self):
+        with connection.cursor() as cursor:
+            for sql in invalidation.drop_triggers_sql("sqlite", "core_location"):
+                cursor.execute(sql)
+        invalidation.ensure_triggers(connection)
+        self.assertBumps("location", lambda: Location.objects.create(name="Stade"))
+
+
+# -----------------------------------------------------------
+# Cache des données de référence
+# -----------------------------------------------------------
+
+
+class RefdataTests(ServiceTestCase):
+    def test_cached_until_version_changes(self):
+        refdata.categories()
+        with self.assertNumQueries(0):
+            self.assertEqual(refdata.category_by_code("swim").id, self.swim.pk)
+
+        Category.objects.filter(pk=self.swim.pk).update(label="Nage")
+        invalidation.sync()
+        self.assertEqual(refdata.category_by_code("swim").label, "Nage")
+
+    def test_cat_coaches_follow_qualifications(self):
+        names = {c.first_name for c in refdata.cat_coaches("swim")}
+        self.assertEqual(names, {"Anna", "Bruno"})
+        self.assertEqual(len(refdata.cat_coaches("all")), 3)
+        self.assertEqual(refdata.cat_coaches("unknown"), [])
+
+        self.chloe.qualifications.add(self.swim)
+        invalidation.sync()
+        names = {c.first_name for c in refdata.cat_coaches("swim")}
+        self.assertEqual(names, {"Anna", "Bruno", "Chloé"})
+
+    def test_versioned_cache_is_bounded(self):
+        cache = refdata.VersionedCache(("category",), maxsize=2)
+        for key in "abc":
+            cache.get(key, lambda: key)
+        loads = []
+        cache.get("a", lambda: loads.append("a") or "a")
+        cache.get("c", lambda: loads.append("c") or "c")
+        self.assertEqual(loads, ["a"])  # "a", le plus ancien, a été évincé
+
+
+# -----------------------------------------------------------
+# Masque d'éligibilité
+# -----------------------------------------------------------
+
+
+class EligibilityTests(ServiceTestCase):
+    def eligible(self, category):
+        ids = eligible_members(category.pk if category else None)
+        return set(ids.values_list("first_name", flat=True))
+
+    def test_bits_are_distinct(self):
+        self.assertNotEqual(self.swim.bit, self.run.bit)
+        self.assertEqual(self.anna.eligibility_mask, self.swim.mask)
+
+    def test_mask_follows_qualifications(self):
+        self.assertEqual(self.eligible(self.swim), {"Anna", "Bruno"})
+        self.anna.qualifications.add(self.run)
+        self.assertEqual(self.eligible(self.run), {"Anna", "Chloé"})
+        self.swim.coaches.clear()
+        self.assertEqual(self.eligible(self.swim), set())
+
+    def test_head_coach_can_coach_everything(self):
+        head = self.coach("Denis", is_head_coach=True)
+        self.assertEqual(head.eligibility_mask, HEAD_COACH_MASK)
+        self.assertEqual(self.eligible(None), {"Denis"})
+        self.assertTrue(eligibility.can_coach(head.eligibility_mask, self.run.pk))
+        self.assertFalse(eligibility.can_coach(self.anna.eligibility_mask, None))
+
+    def test_deleted_category_frees_its_bit(self):
+        bit = self.run.bit
+        self.run.delete()
+        self.chloe.refresh_from_db()
+        self.assertEqual(self.chloe.eligibility_mask, 0)
+        bike = Category.objects.create(code="bike", label="Vélo")
+        self.assertEqual(bike.bit, bit)
+        self.refresh_reference_data()
+        self.assertEqual(self.eligible(bike), set())
+
+    def test_category_without_bit(self):
+        [raw] = Category.objects.bulk_create([Category(code="bike", label="Vélo")])
+        self.refresh_reference_data()
+        self.assertEqual(raw.mask, 0)
+        self.assertEqual(self.eligible(raw), set())
+
+
+# -----------------------------------------------------------
+# Index des séances à venir
+# -----------------------------------------------------------
+
+
+class ExplainQueriesTests(ServiceTestCase):
+    def test_parse_postgresql_plan(self):
+        plan = (
+            "Nested Loop\n"
+            "  ->  Index Scan using session_upcoming_idx on core_session\n"
+            "  ->  Bitmap Index Scan on core_coacha_session_idx\n"
+            "  ->  Seq Scan on core_location\n"
+        )
+        indexes, seq_scans = parse_plan(plan, "postgresql")
+        self.assertEqual(indexes, {"session_upcoming_idx", "core_coacha_session_idx"})
+        self.assertEqual(seq_scans, {"core_location"})
+
+    def test_parse_sqlite_plan(self):
+        plan = (
+            "2 0 0 SEARCH core_session USING INDEX session_upcoming_idx (start_at>?)\n"
+            "5 0 0 SCAN core_category\n"
+        )
+        indexes, seq_scans = parse_plan(plan, "sqlite")
+        self.assertEqual(indexes, {"session_upcoming_idx"})
+        self.assertEqual(seq_scans, {"core_category"})
+
+    @skipUnless(connection.vendor == "sqlite", "plans SQLite")
+    def test_public_queries_use_indexes(self):
+        location = Location.objects.create(name="Piscine")
+        session = self.session(0, 18, location=location)
+        self.confirm(session, self.anna)
+
+        out = StringIO()
+        call_command("explain_queries", stdout=out)
+        self.assertIn("session_upcoming_idx", out.getvalue())
+        self.assertIn("0 requête(s) avec parcours séquentiel", out.getvalue())
+
+
+# -----------------------------------------------------------
+# Recherche par nom de coach
+# -----------------------------------------------------------
+
+
+class NameSearchTests(ServiceTestCase):
+    def names(self, term):
+        members = Member.objects.filter(name_q(term))
+        return set(members.values_list("first_name", flat=True))
+
+    def test_search_name_follows_renames(self):
+        self.assertEqual(self.chloe.search_name, "chloe test")
+        self.chloe.last_name = "Müller"
+        self.chloe.save(update_fields=["last_name"])
+        self.chloe.refresh_from_db()
+        self.assertEqual(self.chloe.search_name, "chloe muller")
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.names("CHLOÉ"), {"Chloé"})
+        self.assertEqual(self.names("test  chlo"), {"Chloé"})
+        self.assertEqual(self.names("test"), {"Anna", "Bruno", "Chloé"})
+        self.assertEqual(self.names("anna bruno"), set())
+
+    def test_public_filter_on_confirmed_coaches(self):
+        both = self.session(0, 18)
+        self.confirm(both, self.anna)
+        self.confirm(both, self.bruno)
+        withdrawn = self.session(1, 18)
+        self.confirm(withdrawn, self.anna, status="withdrawn")
+
+        qs = get_public_sessions("all", {"coach_q": "test"})
+        # un seul résultat par séance malgré deux coachs correspondants
+        self.assertEqual(list(qs.values_list("pk", flat=True)), [both.pk])
+        self.assertEqual(qs.get().confirmed_cnt, 2)
+
+
+# -----------------------------------------------------------
+# Recherche plein texte sur les séances
+# -----------------------------------------------------------
+
+
+class SessionSearchTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pool = Location.objects.create(name="Piscine Jean Bouin")
+        self.in_group = self.session(0, 18, group="Groupe piscine")
+        self.in_location = self.session(1, 18, location=self.pool)
+        self.in_notes = self.session(2, 18, notes="Rendez-vous devant la piscine")
+        self.session(3, 18, group="Fractionné")
+
+    def test_ranking_and_accents(self):
+        self.assertEqual(
+            ranked_session_ids("PISCINE"),
+            [self.in_group.pk, self.in_location.pk, self.in_notes.pk],
+        )
+        self.assertEqual(len(ranked_session_ids("fraction")), 1)  # préfixe
+        self.assertEqual(ranked_session_ids("piscine", limit=1), [self.in_group.pk])
+
+    def test_user_input_is_not_fts_syntax(self):
+        for term in ('piscine" OR "x', "NEAR(piscine", "-", "   "):
+            with self.subTest(term=term):
+                ranked_session_ids(term)
+        self.assertEqual(ranked_session_ids("   "), [])
+
+    def test_restricted_to_queryset(self):
+        qs = Session.objects.exclude(pk=self.in_group.pk)
+        self.assertEqual(
+            search_sessions("piscine", qs), [self.in_location.pk, self.in_notes.pk]
+        )
+        self.assertEqual(
+            Session.objects.filter(pk__in=matching_sessions("piscine")).count(), 3
+        )
+
+    def test_index_follows_writes(self):
+        self.pool.name = "Stade Charléty"
+        self.pool.save()
+        self.assertEqual(ranked_session_ids("charlety"), [self.in_location.pk])
+
+        self.in_group.delete()
+        self.assertEqual(ranked_session_ids("piscine"), [self.in_notes.pk])
+
+    def test_deferred_reindex(self):
+        with deferred_reindex():
+            Session.objects.filter(pk=self.in_notes.pk).update(notes="Vestiaires")
+            reindex_sessions([self.in_notes.pk])
+            self.assertIn(self.in_notes.pk, ranked_session_ids("piscine"))
+        self.assertEqual(ranked_session_ids("vestiaires"), [self.in_notes.pk])
+
+    def test_public_view(self):
+        response = self.client.get("/public/search/", {"q": "piscine"})
+        self.assertEqual(response.status_code, 200)
+        cards = response.context["page_obj"].object_list
+        self.assertEqual([c["id"] for c in cards][0], self.in_group.pk)
+
+
+# -----------------------------------------------------------
+# Agenda d'un coach
+# -----------------------------------------------------------
+
+
+class CoachAgendaTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mine = self.session(0, 18)
+        self.confirm(self.mine, self.anna)
+        self.open = self.session(1, 18)
+        self.other = self.session(1, 19, category=self.run)
+        self.session(2, 18, is_cancelled=True)
+
+    def agenda(self, coach, mine=False):
+        qs = get_coach_agenda(coach, {}, mine=mine)
+        return [(s.pk, s.is_mine, s.confirmed_cnt) for s in qs]
+
+    def test_eligible_sessions(self):
+        self.assertEqual(
+            self.agenda(self.anna),
+            [(self.mine.pk, True, 1), (self.open.pk, False, 0)],
+        )
+        head = self.coach("Denis", is_head_coach=True)
+        self.assertEqual(len(self.agenda(head)), 3)
+
+    def test_mine_only(self):
+        self.assertEqual(self.agenda(self.anna, mine=True), [(self.mine.pk, True, 1)])
+        self.assertEqual(self.agenda(self.bruno, mine=True), [])
+
+    def test_iso_week_in_paris_time(self):
+        # lundi 0h30 à Paris : encore dimanche, semaine précédente, en UTC
+        early = self.session(0, 0.5)
+        self.assertEqual(early.start_at.astimezone(dt_timezone.utc).isocalendar()[1], 9)
+        self.assertEqual((early.year_iso, early.week_iso), (MONDAY.year, 10))
+
+    def test_page(self):
+        response = self.client.get(f"/public/coach/{self.anna.slug}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Me retirer", count=1)
+        self.assertContains(response, "M’inscrire", count=1)
+        response = self.client.get(f"/public/coach/{self.anna.slug}/", {"mine": "1"})
+        self.assertNotContains(response, "M’inscrire")
+        self.assertEqual(self.client.get("/public/coach/inconnu/").status_code, 404)
+
+
+# -----------------------------------------------------------
+# Cartes séance des pages publiques
+# -----------------------------------------------------------
+
+
+class SessionCardsTests(ServiceTestCase):
+    def test_cards(self):
+        pool = Location.objects.create(name="Piscine")
+        self.refresh_reference_data()
+        session = self.session(0, 18.5, group="Débutants", location=pool)
+        self.confirm(session, self.anna)
+        self.confirm(session, self.bruno, status="withdrawn")
+
+        [card] = session_cards(card_values(get_public_sessions("swim", {})))
+        self.assertEqual(card["title"], session.title_auto)
+        self.assertEqual(card["coaches"], [{"id": self.anna.pk, "name": "Anna Test"}])
+        self.assertEqual(card["confirmed_cnt"], 1)
+        self.assertFalse(card["missing"])
+
+    def test_chunks(self):
+        for hour in range(5):
+            self.session(0, 8 + hour)
+        chunks = list(iter_card_chunks(get_public_sessions("all", {}), 2))
+        self.assertEqual([len(c) for c in chunks], [2, 2, 1])
+
+    def test_filters(self):
+        pool = Location.objects.create(name="Piscine")
+        at_pool = self.session(0, 18, location=pool, min_coaches=1)
+        self.confirm(at_pool, self.anna)
+        self.session(1, 18, min_coaches=1)
+
+        def ids(**params):
+            return list(get_public_sessions("all", params).values_list("pk", flat=True))
+
+        self.assertEqual(ids(loc=str(pool.pk)), [at_pool.pk])
+        self.assertEqual(ids(loc="abc", dow="x"), ids())
+        self.assertEqual(len(ids(needs=True)), 1)
+
+    def test_page_ignores_invalid_filters(self):
+        self.session(0, 18)
+        response = self.client.get("/public/category/swim/", {"loc": "abc", "dow": "x"})
+        self.assertEqual(response.status_code, 200)
+
+
+# -----------------------------------------------------------
+# Vue complète en flux (?all=1)
+# -----------------------------------------------------------
+
+
+class StreamedPageTests(ServiceTestCase):
+    def body(self, url, **params):
+        response = self.client.get(url, {"all": "1", **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    @patch.object(views, "STREAM_CHUNK_SIZE", 2)
+    def test_weeks_split_across_chunks(self):
+        for day in range(3):
+            self.session(day, 18)
+        self.session(7, 18)  # semaine suivante
+
+        body = self.body("/public/category/swim/")
+        self.assertEqual(body.count("<h2>Semaine 10"), 1)
+        self.assertEqual(body.count("<h2>Semaine 11"), 1)
+        self.assertEqual(body.count("session-card"), 4)
+        # suggestions d'encadrants émises par lot
+        self.assertIn('id="coachesData-0"', body)
+        self.assertIn('id="coachesData-1"', body)
+        self.assertTrue(body.rstrip().endswith("</html>"))
+
+    def test_empty_and_coach_page(self):
+        self.assertIn("Aucune séance à venir.", self.body("/public/category/swim/"))
+        self.session(0, 18)
+        body = self.body(f"/public/coach/{self.anna.slug}/")
+        self.assertEqual(body.count("M’inscrire"), 1)
+
+
+# -----------------------------------------------------------
+# Flux iCalendar
+# -----------------------------------------------------------
+
+
+class ICalTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f"/public/coach/{self.anna.slug}/calendar.ics"
+        self.mine = self.session(0, 18, notes="", group="Groupe 1, débutants")
+        self.confirm(self.mine, self.anna)
+
+    def get(self, url=None, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(url or self.url, **headers)
+
+    def test_feed_content(self):
+        response = self.get()
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(body.count("BEGIN:VEVENT"), 1)
+        self.assertIn("SUMMARY:Natation — Groupe 1\\, débutants\r\n", body)
+        for line in body.split("\r\n"):
+            self.assertLessEqual(len(line.encode()), 75)
+
+    def test_escape_normalizes_line_breaks(self):
+        self.assertEqual(ical._escape("a\r\nb\rc\nd;e"), "a\\nb\\nc\\nd\\;e")
+
+    def test_not_modified_until_own_rows_change(self):
+        with patch.object(ical, "feed_etag", wraps=ical.feed_etag) as feed_etag:
+            etag = self.get()["ETag"]
+        feed_etag.assert_called_once()
+
+        self.assertEqual(self.get(etag=etag).status_code, 304)
+        # inscription d'un autre coach ailleurs : flux inchangé
+        self.confirm(self.session(1, 18), self.bruno)
+        self.assertEqual(self.get(etag=etag).status_code, 304)
+
+        self.confirm(self.session(2, 18), self.anna)
+        response = self.get(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_category_feed(self):
+        url = "/public/category/swim/calendar.ics"
+        etag = self.get(url)["ETag"]
+        self.assertEqual(self.get(url, etag).status_code, 304)
+        Session.objects.filter(pk=self.mine.pk).update(is_cancelled=True)
+        self.assertEqual(self.get(url, etag).status_code, 200)
+        self.assertEqual(
+            self.get("/public/category/nope/calendar.ics").status_code, 404
+        )
+
+
+# -----------------------------------------------------------
+# Export statique des pages publiques
+# -----------------------------------------------------------
+
+
+class PublishTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session(0, 18)
+        self.session(0, 19, category=self.run)
+        self.root = Path(self.enterContext(TemporaryDirectory()))
+        self.enterContext(override_settings(STATIC_ROOT=self.root))
+
+    def publish(self):
+        out = StringIO()
+        call_command("publish_public_site", workers=1, stdout=out)
+        self.refresh_reference_data()
+        return out.getvalue()
+
+    def fingerprints(self):
+        return {p.path: p.fingerprint for p in publish.public_pages()}
+
+    def test_only_affected_pages_change(self):
+        before = self.fingerprints()
+        self.confirm(Session.objects.get(category=self.swim), self.anna)
+        after = self.fingerprints()
+        changed = {path for path in before if before[path] != after[path]}
+        self.assertEqual(
+            changed,
+            {
+                "public/category/all/index.html",
+                "public/api/changes.json",
+                "public/category/swim/index.html",
+                "public/category/swim/calendar.ics",
+                "public/api/changes/swim.json",
+                f"public/coach/{self.anna.slug}/index.html",
+                f"public/coach/{self.anna.slug}/calendar.ics",
+                f"public/coach/{self.bruno.slug}/index.html",
+                f"public/coach/{self.bruno.slug}/calendar.ics",
+            },
+        )
+
+    def test_incremental_export(self):
+        pages = len(publish.public_pages())
+        self.assertIn(f"{pages} page(s) à rendre sur {pages}", self.publish())
+        page = self.root / "public/category/run/index.html"
+        self.assertIn("Séances de Course", page.read_text())
+        self.assertTrue((self.root / publish.MANIFEST).exists())
+
+        self.assertIn(f"0 page(s) à rendre sur {pages}", self.publish())
+
+        # coach supprimé : ses fichiers disparaissent de l'export
+        self.chloe.delete()
+        self.refresh_reference_data()
+        self.assertIn(f"{pages - 2} page(s) à rendre", self.publish())
+        self.assertEqual(list(self.root.glob(f"public/coach/{self.chloe.slug}/*")), [])
+
+
+# -----------------------------------------------------------
+# Pages publiques compressées et mises en cache
+# -----------------------------------------------------------
+
+
+class CompressionTests(ServiceTestCase):
+    url = "/public/category/swim/"
+
+    def get(self, encoding="gzip", **params):
+        response = self.client.get(self.url, params, HTTP_ACCEPT_ENCODING=encoding)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Accept-Encoding", response["Vary"])
+        return response
+
+    def test_accepted_encoding(self):
+        factory = RequestFactory()
+        for header, expected in (
+            ("gzip, deflate", "gzip"),
+            ("gzip;q=0, identity", None),
+            ("gzip;q=abc", None),
+            ("", None),
+        ):
+            request = factory.get("/", HTTP_ACCEPT_ENCODING=header)
+            with self.subTest(header=header):
+                self.assertEqual(compression.accepted_encoding(request), expected)
+
+    def test_gzip_variant_matches_identity(self):
+        self.session(0, 18, group="Débutants")
+        identity = self.get("identity")
+        self.assertFalse(identity.has_header("Content-Encoding"))
+        compressed = self.get()
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(compressed.content), identity.content)
+        self.assertLess(len(compressed.content), len(identity.content))
+
+    def test_cache_follows_data_versions(self):
+        self.session(0, 18, group="Débutants")
+        self.get()
+        with patch.object(views, "get_public_sessions") as get_public_sessions:
+            self.get()
+        get_public_sessions.assert_not_called()
+
+        self.session(1, 18, group="Confirmés")
+        self.assertIn("Confirmés", gzip.decompress(self.get().content).decode())
+
+    def test_streamed_page_is_gzipped(self):
+        self.session(0, 18)
+        response = self.get(all="1")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        body = gzip.decompress(b"".join(response.streaming_content)).decode()
+        self.assertEqual(body.count("session-card"), 1)
+
+
+# -----------------------------------------------------------
+# Contrôle d'admission
+# -----------------------------------------------------------
+
+
+@override_settings(ADMISSION_LIMITS={"read": 1, "write": 1}, ADMISSION_WRITE_WAIT=0)
+class AdmissionTests(ServiceTestCase):
+    url = "/public/category/swim/"
+
+    def setUp(self):
+        super().setUp()
+        admission._gates.clear()
+        self.addCleanup(admission._gates.clear)
+        self.read = admission.gate("read")
+
+    def test_view_classes(self):
+        self.assertEqual(admission.view_class(self.url), "read")
+        self.assertEqual(admission.view_class("/public/assign/do/"), "write")
+        self.assertIsNone(admission.view_class("/public/category/swim/live/"))
+        self.assertIsNone(admission.view_class("/nope/"))
+
+    def test_saturated_reads_get_stale_page_or_503(self):
+        self.assertTrue(self.read.try_enter())  # la seule place est prise
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
+
+        self.read.leave()
+        self.client.get(self.url)  # mise en cache
+        self.read.try_enter()
+        response = self.client.get(self.url)
+        self.assertEqual((response.status_code, response["X-Cache"]), (200, "stale"))
+        self.assertEqual(self.read.snapshot()["served_stale"], 1)
+        self.assertEqual(self.read.snapshot()["rejected"], 1)
+        self.read.leave()
+
+    def test_write_waits_then_times_out(self):
+        write = admission.gate("write")
+        write.try_enter()
+        response = self.client.post("/public/assign/do/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(write.snapshot()["wait_timeouts"], 1)
+        write.leave()
+
+    def test_streamed_response_holds_its_slot(self):
+        self.session(0, 18)
+        response = self.client.get(self.url, {"all": "1"})
+        self.assertEqual(self.read.snapshot()["in_flight"], 1)
+        b"".join(response.streaming_content)
+        self.assertEqual(self.read.snapshot()["in_flight"], 0)
+
+        # client parti en cours de route : la fermeture rend la place
+        response = self.client.get(self.url, {"all": "1"})
+        next(iter(response.streaming_content))
+        response.close()
+        self.assertEqual(self.read.snapshot()["in_flight"], 0)
+
+
+# -----------------------------------------------------------
+# Limitation de débit des inscriptions
+# -----------------------------------------------------------
+
+
+@override_settings(
+    RATELIMIT_IP_BURST=3,
+    RATELIMIT_IP_PER_MINUTE=60,
+    RATELIMIT_BURST=2,
+    RATELIMIT_PER_MINUTE=30,
+    RATELIMIT_TRUSTED_PROXIES=0,
+)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        ratelimit._buckets.clear()
+        self.addCleanup(ratelimit._buckets.clear)
+        self.view = ratelimit.rate_limited("ip", "ip_and_coach")(
+            lambda request: HttpResponse("ok")
+        )
+
+    def post(self, coach_id, ip="10.0.0.1", **headers):
+        request = RequestFactory().post(
+            "/", {"coach_id": coach_id}, REMOTE_ADDR=ip, **headers
+        )
+        return self.view(request)
+
+    def test_token_bucket(self):
+        bucket = ratelimit.TokenBucket(burst=2, per_minute=60)
+        allowed, state, _ = bucket.take(None, 100.0)
+        allowed, state, _ = bucket.take(state, 100.0)
+        self.assertTrue(allowed)
+        allowed, state, wait = bucket.take(state, 100.5)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 0.5)
+        self.assertTrue(bucket.take(state, 101.0)[0])
+
+    def check_limits(self):
+        responses = [self.post("1") for _ in range(3)]
+        self.assertEqual([r.status_code for r in responses], [200, 200, 429])
+        # seau IP + coach vide (30 / min) : un jeton dans 2 s
+        self.assertEqual(responses[-1]["Retry-After"], "2")
+        # autre coach : seau IP vide à son tour (60 / min)
+        response = self.post("2")
+        self.assertEqual((response.status_code, response["Retry-After"]), (429, "1"))
+        self.assertEqual(self.post("2", ip="10.0.0.2").status_code, 200)
+
+    def test_memory_buckets(self):
+        self.check_limits()
+
+    @override_settings(RATELIMIT_BACKEND="cache", RATELIMIT_CACHE="default")
+    def test_cache_buckets(self):
+        cache.clear()
+        self.check_limits()
+
+    def test_client_ip(self):
+        factory = RequestFactory()
+        request = factory.get(
+            "/", REMOTE_ADDR="10.0.0.9", HTTP_X_FORWARDED_FOR="1.1.1.1, 2.2.2.2"
+        )
+        for hops, expected in ((0, "10.0.0.9"), (1, "2.2.2.2"), (2, "1.1.1.1")):
+            with self.subTest(hops=hops), self.settings(RATELIMIT_TRUSTED_PROXIES=hops):
+                self.assertEqual(ratelimit.client_ip(request), expected)
+        with self.settings(RATELIMIT_TRUSTED_PROXIES=5):
+            self.assertEqual(ratelimit.client_ip(request), "1.1.1.1")
+
+    @override_settings(RATELIMIT_TRUSTED_PROXIES=1)
+    def test_forged_forwarded_for_is_ignored(self):
+        for n in range(3):
+            forged = f"192.168.0.{n}, 3.3.3.3"
+            response = self.post(str(n), HTTP_X_FORWARDED_FOR=forged)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.post("9", HTTP_X_FORWARDED_FOR="7.7.7.7, 3.3.3.3").status_code, 429
+        )
+
+
+# -----------------------------------------------------------
+# Liste des séances dans l'admin
+# -----------------------------------------------------------
+
+
+class SessionAdminTests(ServiceTestCase):
+    url = "/admin/core/session/"
+
+    def setUp(self):
+        super().setUp()
+        admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin)
+
+    def test_changelist_columns(self):
+        session = self.session(0, 18, group="Débutants", min_coaches=2)
+        self.confirm(session, self.anna)
+        self.confirm(session, self.bruno, status="withdrawn")
+        full = self.session(1, 18, min_coaches=1)
+        self.confirm(full, self.anna)
+        self.confirm(full, self.bruno)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, session.title_auto)
+        self.assertContains(response, '<strong style="color:#d9534f">1/2</strong>')
+        self.assertContains(response, "2/1")
+        rows = {s.pk: s for s in response.context["cl"].result_list}
+        self.assertEqual(rows[session.pk].coach_names, "Anna Test")
+        self.assertEqual(
+            sorted(rows[full.pk].coach_names.split(", ")), ["Anna Test", "Bruno Test"]
+        )
+
+    def test_search_and_count(self):
+        self.session(0, 18, notes="Apporter les plaquettes")
+        self.session(1, 18)
+        response = self.client.get(self.url, {"q": "plaquette"})
+        self.assertEqual(response.context["cl"].result_count, 1)
+        self.assertIsNone(stats.estimated_count(Session.objects.all()))
+        paginator = stats.ApproximateCountPaginator(Session.objects.order_by("pk"), 1)
+        self.assertEqual(paginator.count, 2)
+
+
+# -----------------------------------------------------------
+# Actions en masse sur les séances
+# -----------------------------------------------------------
+
+
+class ReplaceCoachTests(ServiceTestCase):
+    def test_moves_confirmed_and_reconfirms_withdrawn(self):
+        moved = self.session(0, 18)
+        merged = self.session(1, 18)
+        left = self.session(2, 18)
+        self.confirm(moved, self.anna)
+        self.confirm(merged, self.anna)
+        self.confirm(merged, self.bruno, status="withdrawn")
+        self.confirm(left, self.anna, status="withdrawn")
+
+        result = bulk.replace_coach(Session.objects.all(), self.anna, self.bruno)
+        self.assertEqual(result, (1, 1, []))
+        self.assertEqual(
+            set(CoachAssignment.objects.values_list("session", "coach", "status")),
+            {
+                (moved.pk, self.bruno.pk, "confirmed"),
+                (merged.pk, self.bruno.pk, "confirmed"),
+                (left.pk, self.anna.pk, "withdrawn"),
+            },
+        )
+
+    def test_refuses_ineligible_coach(self):
+        self.confirm(self.session(0, 18), self.anna)
+        with self.assertRaises(ValidationError):
+            bulk.replace_coach(Session.objects.all(), self.anna, self.chloe)
+        self.assertEqual(
+            list(CoachAssignment.objects.values_list("coach", flat=True)),
+            [self.anna.pk],
+        )
+
+    def test_checks_overlaps_of_new_coach(self):
+        target = self.session(0, 18)
+        self.confirm(target, self.anna)
+        self.confirm(self.session(0, 18.5), self.bruno)
+        with override_settings(OVERLAP_POLICY="reject"):
+            with self.assertRaises(ValidationError):
+                bulk.replace_coach(
+                    Session.objects.filter(pk=target.pk), self.anna, self.bruno
+                )
+        with override_settings(OVERLAP_POLICY="warn"):
+            moved, merged, overlapping = bulk.replace_coach(
+                Session.objects.filter(pk=target.pk), self.anna, self.bruno
+            )
+        self.assertEqual((moved, merged, len(overlapping)), (1, 0, 1))
+
+
+class ShiftAndReactivateTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.early = self.session(0, 17)
+        self.late = self.session(0, 18)
+        self.confirm(self.early, self.anna)
+        self.confirm(self.late, self.anna)
+
+    def starts(self):
+        return list(Session.objects.order_by("pk").values_list("start_at", flat=True))
+
+    @override_settings(OVERLAP_POLICY="reject")
+    def test_shift_into_overlap_is_rejected(self):
+        before = self.starts()
+        with self.assertRaises(ValidationError):
+            bulk.shift_time(Session.objects.filter(pk=self.early.pk), 30)
+        self.assertEqual(self.starts(), before)
+
+        # décalage commun : pas de nouveau chevauchement entre elles
+        count, overlapping = bulk.shift_time(Session.objects.all(), 30)
+        self.assertEqual((count, overlapping), (2, []))
+        self.assertEqual(self.starts(), [at(0, 17.5), at(0, 18.5)])
+
+    @override_settings(OVERLAP_POLICY="warn")
+    def test_shift_warns(self):
+        count, overlapping = bulk.shift_time(
+            Session.objects.filter(pk=self.early.pk), 30
+        )
+        self.assertEqual((count, overlapping), (1, [self.early]))
+        self.assertEqual(self.starts(), [at(0, 17.5), at(0, 18)])
+
+    def test_shift_refuses_day_change(self):
+        with self.assertRaises(ValidationError):
+            bulk.shift_time(Session.objects.all(), 7 * 60)
+
+    @override_settings(OVERLAP_POLICY="reject")
+    def test_reactivation_checks_overlaps(self):
+        clash = self.session(0, 18.5, is_cancelled=True)
+        self.confirm(clash, self.anna)
+        with self.assertRaises(ValidationError):
+            bulk.set_cancelled(Session.objects.filter(pk=clash.pk), False)
+        self.assertTrue(Session.objects.get(pk=clash.pk).is_cancelled)
+
+        # deux séances rétablies ensemble qui se chevauchent entre elles
+        bulk.set_cancelled(Session.objects.filter(pk=self.late.pk), True)
+        with self.assertRaises(ValidationError):
+            bulk.set_cancelled(
+                Session.objects.filter(pk__in=[self.late.pk, clash.pk]), False
+            )
+        self.assertEqual(
+            bulk.set_cancelled(Session.objects.filter(pk=self.late.pk), False),
+            (1, []),
+        )
+
+    @override_settings(OVERLAP_POLICY="warn")
+    def test_admin_action_reports_overlaps(self):
+        clash = self.session(0, 18.5, is_cancelled=True)
+        self.confirm(clash, self.anna)
+        admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin)
+        response = self.client.post(
+            "/admin/core/session/?locked_cancelled=all",
+            {"action": "reactivate_sessions", "_selected_action": [clash.pk]},
+            follow=True,
+        )
+        [message] = [str(m) for m in response.context["messages"]]
+        self.assertIn("1 séance a été rétablie. Chevauchements : ", message)
+        self.assertFalse(Session.objects.get(pk=clash.pk).is_cancelled)
+
+
+# -----------------------------------------------------------
+# Fermetures
+# -----------------------------------------------------------
+
+
+class ClosureTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pool = Location.objects.create(name="Piscine")
+        self.stadium = Location.objects.create(name="Stade")
+
+    def close(self, first_week, last_week, **fields):
+        # semaines de la série, comptées depuis la semaine de référence
+        return Closure.objects.create(
+            start_date=MONDAY + timedelta(weeks=first_week),
+            end_date=MONDAY + timedelta(weeks=last_week, days=6),
+            **fields,
+        )
+
+    def test_closed_days_merge_overlapping_closures(self):
+        self.close(1, 2, location=self.pool)
+        self.close(2, 3)
+        self.close(3, 4, category=self.run)  # autre catégorie
+        self.close(5, 5, location=self.stadium)  # autre lieu
+        closed = ClosedDays(
+            self.pool.pk, self.swim.pk, MONDAY, MONDAY + timedelta(weeks=8)
+        )
+        self.assertEqual(len(closed.starts), 1)
+        weeks = [w for w in range(8) if at(7 * w + 2, 18) in closed]
+        self.assertEqual(weeks, [1, 2, 3])
+        self.assertNotIn(at(7 * 4, 0.5), closed)
+
+    def test_generate_series_skips_closed_weeks(self):
+        self.close(2, 3, location=self.pool, reason="Vidange")
+        self.close(5, 5, category=self.run)
+        first = self.session(0, 18, location=self.pool)
+        self.confirm(first, self.anna)
+
+        generate_series(first, "weekly", MONDAY + timedelta(weeks=6))
+        weeks = sorted(
+            s.week_iso for s in Session.objects.filter(recurrence=first.recurrence)
+        )
+        self.assertEqual(weeks, [10, 11, 14, 15, 16])
+        self.assertEqual(CoachAssignment.objects.count(), 5)
+
+    def test_apply_closure(self):
+        closure = self.close(0, 0, location=self.pool)
+        covered = self.session(1, 18, location=self.pool)
+        locked = self.session(2, 18, location=self.pool, is_locked=True)
+        elsewhere = self.session(1, 18, location=self.stadium)
+        self.confirm(covered, self.anna)
+        self.confirm(locked, self.bruno)
+
+        self.assertEqual(
+            [(m.pk, m.closed_sessions) for m in closures.affected_coaches(closure)],
+            [(self.anna.pk, 1)],
+        )
+        self.assertEqual(closures.apply_closure(closure), 1)
+        self.assertEqual(closures.apply_closure(closure), 0)
+        cancelled = Session.objects.filter(is_cancelled=True)
+        self.assertEqual(list(cancelled), [covered])
+        self.assertFalse(Session.objects.get(pk=elsewhere.pk).is_cancelled)
+
+
+# -----------------------------------------------------------
+# Dimension calendrier
+# -----------------------------------------------------------
+
+
+class CalendarTests(TestCase):
+    def test_holidays(self):
+        self.assertEqual(calendar.easter(2024), date(2024, 3, 31))
+        self.assertEqual(calendar.easter(2025), date(2025, 4, 20))
+        holidays = calendar.public_holidays(2025)
+        self.assertEqual(holidays[date(2025, 6, 9)], "Lundi de Pentecôte")
+        self.assertEqual(len(holidays), 11)
+
+    def test_calendar_days(self):
+        school = [(date(2026, 12, 19), date(2027, 1, 3), "Noël")]
+        days = {
+            d.date: d
+            for d in calendar.calendar_days(date(2026, 7, 30), date(2027, 1, 5), school)
+        }
+        self.assertEqual(days[date(2026, 7, 31)].season, 2025)
+        self.assertEqual(days[date(2026, 8, 1)].season, 2026)
+        new_year = days[date(2027, 1, 1)]
+        self.assertEqual((new_year.year_iso, new_year.week_iso), (2026, 53))
+        self.assertEqual(new_year.parity, "odd")
+        self.assertTrue(new_year.is_public_holiday and new_year.is_school_holiday)
+        self.assertEqual(new_year.holiday_name, "Jour de l'an")
+        self.assertEqual(days[date(2026, 12, 21)].holiday_name, "Noël")
+
+    def test_populate_is_idempotent(self):
+        self.assertEqual(calendar.populate(date(2026, 1, 1), date(2026, 12, 31)), 365)
+        calendar.populate(date(2026, 6, 1), date(2027, 1, 31))
+        self.assertEqual(CalendarDay.objects.count(), 365 + 31)
+        self.assertTrue(calendar.covers(date(2026, 1, 1), date(2027, 1, 31)))
+        self.assertFalse(calendar.covers(date(2025, 12, 31), date(2026, 1, 2)))
+
+    def test_occurrences_match_python_fallback(self):
+        # période à cheval sur une année ISO de 53 semaines et un changement d'heure
+        start_at = datetime(2026, 9, 3, 18, 30, tzinfo=PARIS_TZ)
+        end = date(2027, 4, 30)
+        fallback = {
+            same_type: calendar.occurrence_dates(start_at, end, same_type)
+            for same_type in (False, True)
+        }
+        calendar.populate(date(2026, 8, 1), date(2027, 7, 31))
+        with self.assertNumQueries(2):  # couverture, puis les dates
+            weekly = calendar.occurrence_dates(start_at, end, False)
+        self.assertEqual(weekly, fallback[False])
+        self.assertEqual(calendar.occurrence_dates(start_at, end, True), fallback[True])
+        self.assertEqual(len(weekly), 34)
+        self.assertTrue(all(d <= end for d in fallback[True]))
+
+
+# -----------------------------------------------------------
+# Chevauchements d'inscriptions
+# -----------------------------------------------------------
+
+
+class OverlapTests(ServiceTestCase):
+    def test_sweep_yields_overlapping_pairs_only(self):
+        intervals = [("a", 0, 10), ("b", 5, 15), ("c", 10, 20), ("d", 12, 13)]
+        self.assertEqual(
+            set(overlap.sweep(intervals)),
+            {("a", "b"), ("b", "c"), ("b", "d"), ("c", "d")},
+        )
+
+    def test_sweep_back_to_back_sessions_do_not_overlap(self):
+        self.assertEqual(list(overlap.sweep([(1, 0, 60), (2, 60, 120)])), [])
+
+    def test_conflicts(self):
+        evening = self.session(0, 18)
+        self.confirm(evening, self.anna)
+        overlapping = self.session(0, 18.5)
+        after = self.session(0, 19)
+        withdrawn = self.session(0, 18.25)
+        self.confirm(withdrawn, self.anna, status="withdrawn")
+        cancelled = self.session(0, 18.75, is_cancelled=True)
+        self.confirm(cancelled, self.anna)
+
+        self.assertEqual(list(overlap.conflicts(self.anna.pk, overlapping)), [evening])
+        self.assertEqual(list(overlap.conflicts(self.anna.pk, after)), [])
+        self.assertEqual(list(overlap.conflicts(self.bruno.pk, overlapping)), [])
+
+    def test_check_assignment_follows_policy(self):
+        self.confirm(self.session(0, 18), self.anna)
+        overlapping = self.session(0, 18.5)
+        with override_settings(OVERLAP_POLICY="reject"):
+            with self.assertRaises(ValidationError):
+                overlap.check_assignment(overlapping, self.anna)
+        with override_settings(OVERLAP_POLICY="warn"):
+            self.assertEqual(len(overlap.check_assignment(overlapping, self.anna)), 1)
+        with override_settings(OVERLAP_POLICY="off"):
+            self.assertEqual(overlap.check_assignment(overlapping, self.anna), [])
+
+    def test_season_overlaps(self):
+        first = self.session(0, 18)
+        second = self.session(0, 18.5)
+        self.confirm(first, self.anna)
+        self.confirm(second, self.anna)
+        self.confirm(first, self.bruno)
+        self.confirm(self.session(0, 19), self.bruno)
+
+        self.assertEqual(
+            overlap.season_overlaps(calendar.season_of(MONDAY)),
+            [overlap.Overlap(self.anna.pk, first.pk, second.pk)],
+        )
+
+
+# -----------------------------------------------------------
+# Capacité des lieux
+# -----------------------------------------------------------
+
+
+class CapacityTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pool = Location.objects.create(name="Piscine", capacity=1)
+        self.stadium = Location.objects.create(name="Stade")
+
+    def test_over_capacity(self):
+        intervals = [("a", 0, 10), ("b", 5, 15), ("c", 10, 20), ("d", 12, 13)]
+        self.assertEqual(
+            [
+                (start, sorted(keys))
+                for start, keys in capacity.over_capacity(intervals, 2)
+            ],
+            [(12, ["b", "c", "d"])],
+        )
+
+    def test_location_conflicts(self):
+        existing = self.session(0, 18, location=self.pool)
+        candidate = [("new", at(0, 18.5), at(0, 19.5))]
+        [conflict] = capacity.location_conflicts(self.pool, candidate)
+        self.assertEqual(set(conflict.keys), {existing.pk, "new"})
+        # la séance remplacée ne compte pas ; bout à bout : pas de dépassement
+        self.assertEqual(
+            capacity.location_conflicts(self.pool, candidate, [existing.pk]), []
+        )
+        self.assertEqual(
+            capacity.location_conflicts(self.pool, [("new", at(0, 19), at(0, 20))]), []
+        )
+        self.assertEqual(capacity.location_conflicts(self.stadium, candidate), [])
+
+    def test_zero_capacity_closes_the_location(self):
+        self.pool.capacity = 0
+        self.pool.save()
+        with self.assertRaises(ValidationError):
+            capacity.check_capacity(self.pool, [("new", at(0, 18), at(0, 19))])
+        form = SessionAdminForm(data=self.form_data(location=self.pool.pk))
+        self.assertFalse(form.is_valid())
+        self.assertIn("au plus 0 séance", str(form.errors))
+
+    def form_data(self, **fields):
+        return {
+            "category": self.swim.pk,
+            "start_at": at(0, 18.5).strftime("%Y-%m-%dT%H:%M"),
+            "duration_min": 60,
+            "min_coaches": 1,
+            "group": "Débutants",
+            "recurrence_mode": "none",
+            **fields,
+        }
+
+    def test_admin_save_is_rejected(self):
+        self.session(0, 18, location=self.pool)
+        admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin)
+        data = {
+            **self.form_data(location=self.pool.pk),
+            "assignments-TOTAL_FORMS": 0,
+            "assignments-INITIAL_FORMS": 0,
+        }
+        response = self.client.post("/admin/core/session/add/", data)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Piscine accueille au plus 1 séance(s)")
+        self.assertEqual(Session.objects.count(), 1)
+
+        data["location"] = self.stadium.pk
+        response = self.client.post("/admin/core/session/add/", data)
+        self.assertEqual(response.status_code, 302)
+
+    def test_bulk_actions_check_capacity(self):
+        self.session(0, 18, location=self.pool)
+        moved = self.session(0, 18.5, location=self.stadium)
+        cancelled = self.session(0, 18, location=self.pool, is_cancelled=True)
+
+        with self.assertRaises(ValidationError):
+            bulk.change_location(Session.objects.filter(pk=moved.pk), self.pool)
+        with self.assertRaises(ValidationError):
+            bulk.set_cancelled(Session.objects.filter(pk=cancelled.pk), False)
+
+        bulk.shift_time(Session.objects.filter(pk=moved.pk), 30)
+        self.assertEqual(
+            bulk.change_location(Session.objects.filter(pk=moved.pk), self.pool), 1
+        )  # bout à bout
+        with self.assertRaises(ValidationError):
+            bulk.shift_time(Session.objects.filter(pk=moved.pk), -30)
+        # toutes les séances du lieu décalées ensemble : pas de dépassement
+        self.assertEqual(
+            bulk.shift_time(Session.objects.filter(location=self.pool), -30)[0], 3
+        )
+
+    def test_propagation_checks_capacity(self):
+        self.session(7, 19, location=self.pool)
+        first = self.session(0, 18, location=self.pool)
+        generate_series(first, "weekly", MONDAY + timedelta(weeks=2))
+        first.refresh_from_db()
+
+        first.start_at = at(0, 19)
+        with self.assertRaises(ValidationError):
+            propagate_form_fields(first, ["start_at"])
+        following = Session.objects.filter(recurrence=first.recurrence).exclude(
+            pk=first.pk
+        )
+        self.assertEqual({to_paris(s.start_at).hour for s in following}, {18})
+
+
+# -----------------------------------------------------------
+# Encadrement automatique
+# -----------------------------------------------------------
+
+
+class MinCostFlowTests(TestCase):
+    def test_assignment_at_minimum_cost(self):
+        # deux coachs, deux séances : 1 + 8 coûte plus que 4 + 2
+        costs = {("a", "x"): 1, ("a", "y"): 4, ("b", "x"): 2, ("b", "y"): 8}
+        mcf = MinCostFlow()
+        for coach in "ab":
+            mcf.add_edge("source", coach, 1, 0)
+        arcs = {pair: mcf.add_edge(*pair, 1, cost) for pair, cost in costs.items()}
+        for session in "xy":
+            mcf.add_edge(session, "sink", 1, 0)
+
+        self.assertEqual(mcf.run("source", "sink"), (2, 6))
+        chosen = {pair for pair, arc in arcs.items() if arc[1] == 0}
+        self.assertEqual(chosen, {("a", "y"), ("b", "x")})
+
+    def test_flow_limited_by_capacity(self):
+        mcf = MinCostFlow()
+        mcf.add_edge("source", "a", 3, 0)
+        mcf.add_edge("a", "sink", 2, 5)
+        self.assertEqual(mcf.run("source", "sink"), (2, 10))
+
+
+class StaffingTests(ServiceTestCase):
+    def assertValidProposals(self, proposals):
+        by_coach = {}
+        for p in proposals:
+            session = Session.objects.get(pk=p.session_id)
+            coach = Member.objects.get(pk=p.coach_id)
+            self.assertTrue(
+                can_coach(coach.eligibility_mask, session.category_id),
+                f"{coach} proposé sans qualification",
+            )
+            self.assertEqual(
+                list(overlap.conflicts(coach.pk, session)), [], f"{coach} déjà occupé"
+            )
+            by_coach.setdefault(coach.pk, []).append(
+                (session.pk, session.start_at, session.end_at)
+            )
+        for sessions in by_coach.values():
+            sessions.sort(key=lambda s: s[1])
+            self.assertEqual(
+                list(overlap.sweep(sessions)), [], "propositions simultanées"
+            )
+
+    def test_propose_respects_eligibility_overlaps_and_needs(self):
+        evening = self.session(0, 18, min_coaches=2)
+        overlapping = self.session(0, 18.5)
+        running = self.session(1, 18, category=self.run)
+        self.confirm(self.session(1, 18), self.bruno)
+        busy = self.session(1, 18.5)
+
+        proposals = staffing.propose()
+        self.assertValidProposals(proposals)
+        pairs = {(p.session_id, p.coach_id) for p in proposals}
+        self.assertIn((running.pk, self.chloe.pk), pairs)
+        self.assertEqual(sum(1 for s, _ in pairs if s == evening.pk), 2)
+        self.assertNotIn((busy.pk, self.bruno.pk), pairs)
+        # Anna et Bruno encadrent la séance de 18 h : personne pour celle de 18 h 30
+        self.assertNotIn(overlapping.pk, {s for s, _ in pairs})
+
+    @override_settings(STAFFING_MAX_PER_WEEK=2)
+    def test_propose_respects_weekly_cap(self):
+        self.confirm(self.session(0, 8), self.anna)
+        for day in range(5):
+            self.session(day, 18)
+
+        proposals = staffing.propose()
+        self.assertValidProposals(proposals)
+        per_coach = {}
+        for p in proposals:
+            per_coach[p.coach_id] = per_coach.get(p.coach_id, 0) + 1
+        # Anna a déjà une séance confirmée dans la semaine
+        self.assertEqual(per_coach, {self.anna.pk: 1, self.bruno.pk: 2})
+
+    def test_apply_proposals_drops_stale_pairs(self):
+        full = self.session(0, 18)
+        open_ = self.session(1, 18)
+        staffing.generate_proposals()
+        self.assertEqual(StaffingProposal.objects.count(), 2)
+        # entre le calcul et la validation, la séance a trouvé un encadrant
+        self.confirm(full, self.coach("Denis", is_head_coach=True))
+
+        self.assertEqual(
+            staffing.apply_proposals(StaffingProposal.objects.all()), (1, 1)
+        )
+        self.assertFalse(StaffingProposal.objects.exists())
+        self.assertEqual(
+            open_.assignments.filter(status="confirmed").count(), open_.min_coaches
+        )
+        self.assertEqual(full.assignments.filter(status="confirmed").count(), 1)
+
+
+# -----------------------------------------------------------
+# Tables de synthèse
+# -----------------------------------------------------------
+
+
+class SummariesTests(ServiceTestCase):
+    def snapshot(self):
+        def rows(model):
+            fields = [f.attname for f in model._meta.fields if f.name != "id"]
+            return sorted(model.objects.values_list(*fields), key=repr)
+
+        return rows(WeeklyCoverage), rows(CoachMonthlyLoad)
+
+    def assertMatchesRebuild(self):
+        touched = self.snapshot()
+        summaries.rebuild()
+        self.assertEqual(touched, self.snapshot())
+
+    def test_touch_matches_rebuild(self):
+        monday = self.session(0, 18)
+        thursday = self.session(3, 18, category=self.run)
+        evening = self.session(4, 20)
+        self.confirm(monday, self.anna)
+        late = self.confirm(evening, self.bruno)
+        summaries.rebuild()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.confirm(thursday, self.chloe)
+            # changement de coach : l'ancien (coach, mois) est aussi recalculé
+            late.coach = self.anna
+            late.save()
+        self.assertMatchesRebuild()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pool = Location.objects.create(name="Piscine")
+            bulk.change_location(Session.objects.filter(pk=monday.pk), pool)
+        self.assertMatchesRebuild()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.set_cancelled(Session.objects.filter(pk=thursday.pk), True)
+        self.assertMatchesRebuild()
+
+    def test_cascade_delete_matches_rebuild(self):
+        self.confirm(self.session(0, 18), self.anna)
+        self.confirm(self.session(1, 18), self.anna)
+        self.confirm(self.session(1, 18), self.bruno)
+        summaries.rebuild()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.anna.delete()
+        self.assertMatchesRebuild()
+
+    def test_replace_coach_refreshes_summaries(self):
+        self.confirm(self.session(0, 18), self.anna)
+        summaries.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.replace_coach(Session.objects.all(), self.anna, self.bruno)
+        touched = CoachMonthlyLoad.objects.values_list("coach", flat=True)
+        self.assertEqual(list(touched), [self.bruno.pk])
+
+    def test_refresh_many_keys(self):
+        # au-delà de ~1000 termes OR, SQLite refuse la requête d'un seul bloc
+        session = self.session(0, 18)
+        self.confirm(session, self.anna)
+        keys = {(2000 + n // 53, n % 53 + 1, self.swim.pk, None) for n in range(1500)}
+        keys.add((session.year_iso, session.week_iso, session.category_id, None))
+        summaries.refresh(keys, set())
+        coverage = WeeklyCoverage.objects.get()
+        self.assertEqual((coverage.sessions, coverage.covered), (1, 1))
+
+
+# -----------------------------------------------------------
+# Charge des coachs
+# -----------------------------------------------------------
+
+
+class WorkloadTests(ServiceTestCase):
+    def frame(self, rows):
+        return pd.DataFrame(rows, columns=workload.COLUMNS)
+
+    def test_coach_workload(self):
+        df = self.frame(
+            [
+                # coach, désinscrit, tardif, durée, année, semaine
+                (1, 0, 0, 60, 2024, 1),
+                (1, 0, 0, 60, 2024, 1),
+                (1, 0, 0, 90, 2024, 2),
+                (1, 1, 1, 60, 2024, 2),
+                (2, 0, 0, 60, 2024, 1),
+                (2, 1, 0, 60, 2024, 2),
+            ]
+        )
+        result = workload.coach_workload(df, coach_ids=[1, 2, 3])
+
+        first = result.loc[1]
+        self.assertEqual(
+            (
+                first.assignments,
+                first.sessions,
+                first.withdrawn,
+                first.late_withdrawals,
+            ),
+            (4, 3, 1, 1),
+        )
+        self.assertEqual((first.active_weeks, first.peak_week), (2, 2))
+        self.assertAlmostEqual(first.hours, 3.5)
+        self.assertAlmostEqual(first.per_week, 1.5)
+        self.assertAlmostEqual(first.withdrawal_rate, 0.25)
+
+        # médiane des coachs ayant au moins une séance : (1,5 + 0,5) / 2
+        self.assertEqual(workload.median_per_week(result), 1.0)
+        self.assertEqual(result.loc[1, "flag"], "surchargé")
+        self.assertEqual(result.loc[2, "flag"], "sous-utilisé")
+        self.assertEqual(result.loc[2, "late_withdrawals"], 0)
+        # coach qualifié sans inscription : charge nulle, pas de division par 0
+        idle = result.loc[3]
+        self.assertEqual((idle.assignments, idle.sessions), (0, 0))
+        self.assertEqual(idle.withdrawal_rate, 0.0)
+
+    def test_empty_frame(self):
+        result = workload.coach_workload(self.frame([]), coach_ids=[1])
+        self.assertEqual(result.loc[1, "sessions"], 0)
+        self.assertIsNone(workload.median_per_week(result))
+
+    def test_season_workload(self):
+        self.confirm(self.session(0, 18, duration_min=90), self.anna)
+        self.confirm(self.session(1, 18), self.bruno, status="withdrawn")
+        report = workload.season_workload(calendar.season_of(MONDAY))
+        self.assertEqual(report.iloc[0]["coach"], "Anna Test")
+        self.assertEqual(report.loc[self.anna.pk, "hours"], 1.5)
+        self.assertEqual(report.loc[self.bruno.pk, "withdrawn"], 1)
+
+
+class WorkloadAdminTests(ServiceTestCase):
+    url = "/admin/core/member/workload/"
+
+    def setUp(self):
+        super().setUp()
+        admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin)
+        self.confirm(self.session(0, 18), self.anna)
+
+    def test_view_and_csv(self):
+        season = calendar.season_of(MONDAY)
+        response = self.client.get(self.url, {"season": season})
+        self.assertEqual(response.context["season"], season)
+        self.assertContains(response, "Anna Test")
+
+        response = self.client.get(self.url, {"season": season, "format": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("Anna Test", response.content.decode())
+
+    def test_invalid_season_falls_back_to_current(self):
+        current = calendar.season_of(timezone.localdate())
+        for season in ("0", "-3", "9999", "99999", "abc"):
+            with self.subTest(season=season):
+                response = self.client.get(self.url, {"season": season})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context["season"], current)
+        response = self.client.get(self.url, {"season": "1"})
+        self.assertEqual(response.context["season"], 1)
@@ -10,11 +10,31 @@ urlpatterns = [
         views.public_sessions_by_category,
         name="public_sessions_by_category",
     ),
+    path(
+        "public/category/<slug:category_code>/live/",
+        views.public_live_category,
+        name="public_live_category",
+    ),
+    path(
+        "public/category/<slug:category_code>/calendar.ics",
+        views.public_category_calendar,
+        name="public_category_calendar",
+    ),
     path(
         "public/coach/<slug:coach_slug>/",
         views.public_sessions_by_coach,
         name="coach_page",
     ),
+    path(
+        "public/coach/<slug:coach_slug>/calendar.ics",
+        views.public_coach_calendar,
+        name="coach_calendar",
+    ),
+    path(
+        "public/search/",
+        views.public_search,
+        name="public_search",
+    ),
     path(
         "public/unassign/confirm/",
         views.unassign_confirm,
@@ -35,6 +55,16 @@ urlpatterns = [
         views.assign_do,
         name="assign_do",
     ),
+    path(
+        "public/api/changes",
+        views.public_changes,
+        name="public_changes",
+    ),
+    path(
+        "metrics/admission/",
+        views.admission_metrics,
+        name="admission_metrics",
+    ),
     path("public/", views.public_homepage, name="public_homepage"),
 ]
 
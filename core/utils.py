@@ -31,6 +31,11 @@ def normalize_string(s: str):
     return res
 
 
+def normalize_search(s: str) -> str:
+    """Forme de comparaison pour la recherche : sans accents, minuscules, espaces réduits."""
+    return " ".join(normalize_string(s).lower().split())
+
+
 def split_name(name: str) -> dict:
     return {"first_name": name.split(" ", 1)[0], "last_name": name.split(" ", 1)[1]}
 
@@ -113,6 +118,8 @@ def iter_weekly_occurrences(
             while next_parity != start_parity:
                 current += timedelta(days=7)
                 next_parity = get_week_parity(current)
+            if current.date() > end_date:
+                break
         yield current
         current += timedelta(days=7)
 
@@ -121,9 +128,10 @@ def compare_model_instance(inst_new, inst_old):
     change_dict = {}
     for f in inst_new._meta.concrete_fields:
         name = f.name
-        # évite les champs auto_now_add/auto_created (ex: created_at) et pk/id
+        # évite les champs auto_now/auto_now_add/auto_created (ex: created_at) et pk/id
         if (
-            getattr(f, "auto_now_add", False)
+            getattr(f, "auto_now", False)
+            or getattr(f, "auto_now_add", False)
             or getattr(f, "auto_created", False)
             or name in ("id", "pk")
         ):
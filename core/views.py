@@ -1,58 +1,80 @@
 # core/views.py
+import asyncio
+
+from asgiref.sync import sync_to_async
+from core.services import admission, ical, overlap, refdata
+from core.services.assignment import assign_coach, is_eligible, unassign_coach
+from core.services.changes import decode_token, encode_token, get_changes
+from core.services.compression import cached_page
+from core.services.live import broker, coverage_events, format_sse
 from core.services.public_view_utils import (
-    add_filters_to_qs,
     build_available_coaches,
     get_cat_coaches,
+    get_coach_agenda,
     get_public_sessions,
+    group_by_week,
 )
+from core.services.ratelimit import rate_limited
+from core.services.search import search_sessions
+from core.services.session_cards import card_values, iter_card_chunks, session_cards
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import Count, F, Q
-from django.http import Http404
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.html import json_script
+from django.views.decorators.http import condition
+
+from .models import CoachAssignment, Member, Session
 
-from .models import Category, CoachAssignment, Location, Member, Session
+# familles de données dont dépendent les listes de séances publiques
+PAGE_FAMILIES = ("session", "assignment", "member", "category", "location")
 
 
+@cached_page("member", "category")
 def public_homepage(request):
-    cats = Category.objects.all()
-    ms = Member.objects.all()
-    dictslug = {str(m): m.slug for m in ms}
+    cats = refdata.categories()
+    dictslug = {str(m): m.slug for m in refdata.coaches().values()}
     return render(request, "core/homepage.html", {"cats": cats, "dictslug": dictslug})
 
 
+@cached_page(*PAGE_FAMILIES)
 def public_sessions_by_coach(request, coach_slug):
     filters = {
-        "loc_id": request.GET.get("loc"),
+        "loc": request.GET.get("loc"),
         "dow": request.GET.get("dow"),
         "coach_q": request.GET.get("coach"),
         "needs": request.GET.get("needs") == "1",  # bool
     }
-    ms = Member.objects.all()
-    coach = next((m for m in ms if m.slug == coach_slug), None)
+    coach = refdata.coach_by_slug(coach_slug)
     if not coach:
         raise Http404("Coach non trouvé")
-    if coach.is_head_coach:
-        categories = Category.objects.all()
-    else:
-        categories = Category.objects.filter(Q(coaches=coach))
-    now = timezone.now()
-    qs = (
-        Session.objects.filter(
-            category__in=categories, is_cancelled=False, start_at__gte=now
-        )
-        .select_related("location", "category")
-        .prefetch_related("assignments__coach", "coach")
-        .annotate(
-            confirmed_cnt=Count(
-                "assignments", filter=Q(assignments__status="confirmed")
-            )
+    mine = request.GET.get("mine") == "1"
+    qs = get_coach_agenda(coach, filters, mine=mine)
+    context = {
+        "origin": request.get_full_path(),
+        "coach": coach,
+        "mine": mine,
+        "locations": refdata.locations(),
+        "params": request.GET,
+        "all_query": _all_toggle_query(request),
+        "card_template": "core/includes/coach_session_card.html",
+    }
+    if request.GET.get("all") == "1":
+        return _stream_page(
+            request,
+            "core/public_sessions_by_coach.html",
+            context,
+            qs,
+            extra=("is_mine",),
         )
-        .order_by("start_at", "pk")
-    )
-    qs = add_filters_to_qs(qs, filters)
+
     # Pagination : 50 séances par page
-    paginator = Paginator(qs, 50)
+    paginator = Paginator(card_values(qs, "is_mine"), 50)
     page = request.GET.get("page")
 
     try:
@@ -61,39 +83,72 @@ def public_sessions_by_coach(request, coach_slug):
         sessions_page = paginator.page(1)
     except EmptyPage:
         sessions_page = paginator.page(paginator.num_pages)
-    weeks = {}
-    for s in sessions_page:
-        cids = [a.coach_id for a in s.assignments.all() if a.status == "confirmed"]
-        year, week, _ = s.start_at.isocalendar()
-        weeks.setdefault((year, week), []).append([s, coach.pk in cids])
     return render(
         request,
         "core/public_sessions_by_coach.html",
         {
-            "origin": request.get_full_path(),
-            "coach": coach,
-            "weeks": sorted(weeks.items(), key=lambda x: x[0]),
+            **context,
+            "weeks": group_by_week(session_cards(sessions_page)),
             "page_obj": sessions_page,
             "paginator": paginator,
-            "locations": Location.objects.all().only("id", "name"),
-            "params": request.GET,
         },
     )
 
 
+STREAM_MARKER = "<!-- weeks -->"
+STREAM_CHUNK_SIZE = 200
+
+
+def _all_toggle_query(request) -> str:
+    """Lien de bascule vue paginée / vue complète, filtres conservés."""
+    query = request.GET.copy()
+    query.pop("page", None)
+    if query.get("all") == "1":
+        query.pop("all")
+    else:
+        query["all"] = "1"
+    return query.urlencode()
+
+
+@cached_page(*PAGE_FAMILIES)
 def public_sessions_by_category(request, category_code):
 
     # extraire les paramètres GET
     filters = {
-        "loc_id": request.GET.get("loc"),
+        "loc": request.GET.get("loc"),
         "dow": request.GET.get("dow"),
         "coach_q": request.GET.get("coach"),
         "needs": request.GET.get("needs") == "1",  # bool
     }
 
+    if category_code == "all":
+        page_title = "Toutes les séances"
+    else:
+        cat = refdata.category_by_code(category_code)
+        if cat is None:
+            raise Http404("Catégorie non trouvée")
+        page_title = f"Séances de {cat.label}"
+
     qs = get_public_sessions(category_code, filters)
+    cat_coaches = get_cat_coaches(category_code)
+    stream = request.GET.get("all") == "1"
+
+    context = {
+        "origin": request.get_full_path(),
+        "locations": refdata.locations(),
+        "params": request.GET,
+        "page_title": page_title,
+        "category_code": category_code,
+        "all_query": _all_toggle_query(request),
+    }
+
+    if stream:
+        return _stream_page(
+            request, "core/public_sessions_by_cat.html", context, qs, cat_coaches
+        )
+
     # Pagination : 50 séances par page
-    paginator = Paginator(qs, 50)
+    paginator = Paginator(card_values(qs), 50)
     page = request.GET.get("page")
 
     try:
@@ -103,33 +158,91 @@ def public_sessions_by_category(request, category_code):
     except EmptyPage:
         sessions_page = paginator.page(paginator.num_pages)
 
-    if category_code == "all":
-        page_title = "Toutes les séances"
-    else:
-        cat = get_object_or_404(Category, code=category_code)
-        page_title = f"Séances de {cat.label}"
-
-    cat_coaches = get_cat_coaches(category_code)
-
-    # regroupement par (année, semaine)
-    weeks = {}
-    available_coaches = build_available_coaches(sessions_page, cat_coaches)
-    for s in sessions_page:
-        year, week, _ = s.start_at.isocalendar()
-        weeks.setdefault((year, week), []).append(s)
+    cards = session_cards(sessions_page)
+    available_coaches = build_available_coaches(cards, cat_coaches)
 
     return render(
         request,
         "core/public_sessions_by_cat.html",
         {
-            "origin": request.get_full_path(),
-            "weeks": sorted(weeks.items(), key=lambda x: x[0]),
+            **context,
+            "weeks": group_by_week(cards),
             "page_obj": sessions_page,  # 👈 important
             "paginator": paginator,
-            "locations": Location.objects.all().only("id", "name"),
-            "params": request.GET,
             "available_coaches": available_coaches,
-            "page_title": page_title,
+        },
+    )
+
+
+def _stream_page(request, template, context, qs, cat_coaches=None, extra=()):
+    """
+    Vue complète (?all=1) : la page est rendue autour d'un marqueur, puis les
+    blocs semaine sont envoyés lot par lot (mémoire et 1er octet constants).
+    cat_coaches : suggestions d'encadrants à émettre par lot (page catégorie).
+    """
+    context = {**context, "stream_marker": STREAM_MARKER}
+    head, tail = render_to_string(template, context, request).split(STREAM_MARKER, 1)
+    return StreamingHttpResponse(
+        _stream_weeks(request, context, qs, cat_coaches, extra, head, tail)
+    )
+
+
+def _stream_weeks(request, context, qs, cat_coaches, extra, head, tail):
+    yield head
+    last_week = None
+    for n, cards in enumerate(iter_card_chunks(qs, STREAM_CHUNK_SIZE, *extra)):
+        for yw, sessions in group_by_week(cards):
+            yield render_to_string(
+                "core/includes/week_block.html",
+                {
+                    **context,
+                    "year": yw[0],
+                    "week": yw[1],
+                    "sessions": sessions,
+                    "show_header": yw != last_week,
+                },
+                request,
+            )
+            last_week = yw
+        if cat_coaches is not None:
+            yield json_script(
+                build_available_coaches(cards, cat_coaches), f"coachesData-{n}"
+            )
+    if last_week is None:
+        yield "<p>Aucune séance à venir.</p>"
+    yield tail
+
+
+def public_search(request):
+    q = request.GET.get("q", "").strip()
+    ranked = search_sessions(
+        q, Session.objects.filter(is_cancelled=False, start_at__gte=timezone.now())
+    )
+    paginator = Paginator(ranked, 50)
+    try:
+        ids_page = paginator.page(request.GET.get("page"))
+    except PageNotAnInteger:
+        ids_page = paginator.page(1)
+    except EmptyPage:
+        ids_page = paginator.page(paginator.num_pages)
+
+    # la page d'ids, dans l'ordre de pertinence, remplacée par les cartes
+    rows = card_values(
+        get_public_sessions("all", {}).filter(pk__in=ids_page.object_list)
+    )
+    by_pk = {card["id"]: card for card in session_cards(rows)}
+    ids_page.object_list = [by_pk[pk] for pk in ids_page.object_list if pk in by_pk]
+
+    return render(
+        request,
+        "core/public_search.html",
+        {
+            "q": q,
+            "page_obj": ids_page,
+            "paginator": paginator,
+            "available_coaches": build_available_coaches(
+                ids_page.object_list, get_cat_coaches("all")
+            ),
         },
     )
 
@@ -144,10 +257,21 @@ def assign_confirm(request):
     return render(
         request,
         "core/assign_confirm.html",
-        {"session": ses, "coach": coach, "origin": origin},
+        {
+            "session": ses,
+            "coach": coach,
+            "origin": origin,
+            "conflicts": (
+                overlap.conflicts(coach.pk, ses)
+                if settings.OVERLAP_POLICY != "off"
+                else []
+            ),
+            "overlap_policy": settings.OVERLAP_POLICY,
+        },
     )
 
 
+@rate_limited("ip", "ip_and_coach")
 def assign_do(request):
     if request.method != "POST":
         return redirect(request.GET.get("origin", "/public/category/all"))
@@ -156,22 +280,27 @@ def assign_do(request):
     origin = request.POST.get("origin", "/public/category/all")
     ses = get_object_or_404(Session, pk=session_id)
     coach = get_object_or_404(Member, pk=coach_id)
-    cat = ses.category
-    # Vérifie la qualification du coach
-    ok = coach.is_head_coach or (
-        cat and coach.qualifications.filter(pk=cat.pk).exists()
-    )
     # si coach non qualifié, on dit que c'est pas possible
-    if not ok:
+    if not is_eligible(coach, ses):
         return render(
             request,
             "core/assign_issue.html",
             {"session": ses, "coach": coach, "origin": origin},
         )
-    if ok:
-        ca, i = CoachAssignment.objects.get_or_create(session=ses, coach=coach)
-        ca.status = "confirmed"
-        ca.save()
+    try:
+        overlap.check_assignment(ses, coach)
+    except ValidationError:
+        return render(
+            request,
+            "core/assign_issue.html",
+            {
+                "session": ses,
+                "coach": coach,
+                "origin": origin,
+                "conflicts": overlap.conflicts(coach.pk, ses),
+            },
+        )
+    assign_coach(ses, coach)
     return redirect(origin)
 
 
@@ -192,18 +321,158 @@ def unassign_confirm(request):
     )
 
 
+@rate_limited("ip", "ip_and_coach")
 def unassign_do(request):
     if request.method != "POST":
         return redirect(request.GET.get("origin", "/public/category/all"))
     session_id = request.POST.get("session_id")
     coach_id = request.POST.get("coach_id")
     origin = request.POST.get("origin", "/public/category/all")
-    ca = CoachAssignment.objects.filter(
-        session_id=session_id, coach_id=coach_id, status="confirmed"
-    ).first()
-
-    if ca:
-        ca.status = "withdrawn"
-        ca.save(update_fields=["status"])
+    unassign_coach(session_id, coach_id)
 
     return redirect(origin)
+
+
+def _calendar_response(name, filename, etag, qs):
+    response = StreamingHttpResponse(
+        ical.stream_feed(etag, name, qs), content_type="text/calendar; charset=utf-8"
+    )
+    response["Content-Disposition"] = f'inline; filename="{filename}"'
+    return response
+
+
+def _coach_calendar_etag(request, coach_slug):
+    coach = refdata.coach_by_slug(coach_slug)
+    if coach is None:
+        return None
+    # calculé une fois par requête : relu par la vue pour la clé de cache
+    request.feed_etag = ical.feed_etag(
+        "coach", coach.pk, ical.coach_feed_sessions(coach.pk)
+    )
+    return request.feed_etag
+
+
+@condition(etag_func=_coach_calendar_etag)
+def public_coach_calendar(request, coach_slug):
+    """Flux iCalendar des séances où le coach est inscrit (304 si inchangé)."""
+    coach = refdata.coach_by_slug(coach_slug)
+    if not coach:
+        raise Http404("Coach non trouvé")
+    return _calendar_response(
+        f"TriHub — {coach}",
+        f"{coach.slug}.ics",
+        request.feed_etag,
+        ical.coach_feed_qs(coach.pk),
+    )
+
+
+def _category_calendar_etag(request, category_code):
+    cat = refdata.category_by_code(category_code)
+    if cat is None:
+        return None
+    request.feed_etag = ical.feed_etag(
+        "category", cat.code, ical.category_feed_sessions(cat.id)
+    )
+    return request.feed_etag
+
+
+@condition(etag_func=_category_calendar_etag)
+def public_category_calendar(request, category_code):
+    """Flux iCalendar des séances de la catégorie (304 si inchangé)."""
+    cat = refdata.category_by_code(category_code)
+    if cat is None:
+        raise Http404("Catégorie non trouvée")
+    return _calendar_response(
+        f"TriHub — {cat.label}",
+        f"{cat.code}.ics",
+        request.feed_etag,
+        ical.category_feed_qs(cat.id),
+    )
+
+
+@staff_member_required
+def admission_metrics(request):
+    """Compteurs du contrôle d'admission (processus courant), réservé au staff."""
+    return JsonResponse(admission.metrics())
+
+
+def public_changes(request):
+    """API de synchro incrémentale : /public/api/changes?since=<jeton>&category=<code>"""
+    try:
+        since = decode_token(request.GET.get("since"))
+    except ValueError:
+        return JsonResponse({"error": "Paramètre since invalide."}, status=400)
+    return JsonResponse(get_changes(since, request.GET.get("category")))
+
+
+def _poll_coverage(category_code, token):
+    """Rattrapage en base : événements des séances modifiées depuis le jeton."""
+    changes = get_changes(decode_token(token), category_code)
+    session_ids = {s["id"] for s in changes["sessions"]}
+    session_ids |= {a["session_id"] for a in changes["assignments"]}
+    return changes["token"], coverage_events(session_ids)
+
+
+async def _coverage_stream(category_code, token):
+    # Les événements locaux ne servent que de réveil : on relit alors la base
+    # depuis le jeton (un seul rattrapage pour tous les événements en attente),
+    # ce qui inclut les changements des autres workers et fait avancer le
+    # jeton à chaque envoi. Sans trafic local, relecture toutes les
+    # LIVE_POLL_INTERVAL secondes.
+    poll_interval = settings.LIVE_POLL_INTERVAL
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIVE_STREAM_MAX_SECONDS
+    next_poll = loop.time() + poll_interval
+    queue = broker.subscribe(category_code)
+    # séance -> dernier état envoyé : le jeton retardé (CHANGES_SAFETY_LAG)
+    # fait relire les séances récentes, renvoyées seulement si elles changent
+    sent = {}
+    try:
+        yield f"retry: {poll_interval * 1000}\n\n"
+        while loop.time() < deadline:
+            try:
+                await asyncio.wait_for(
+                    queue.get(), timeout=max(next_poll - loop.time(), 0)
+                )
+                woken = True
+            except asyncio.TimeoutError:
+                woken = False
+            while not queue.empty():
+                queue.get_nowait()
+            next_poll = loop.time() + poll_interval
+            token, events = await sync_to_async(_poll_coverage)(category_code, token)
+            events = [e for e in events if sent.get(e["session_id"]) != e]
+            if not events and not woken:
+                yield ": keepalive\n\n"
+            for event in events:
+                sent[event["session_id"]] = event
+                yield format_sse(event, token)
+    finally:
+        broker.unsubscribe(category_code, queue)
+
+
+async def public_live_category(request, category_code):
+    """
+    Flux SSE des changements d'encadrement d'une catégorie (ou "all").
+    Sous ASGI le flux reste ouvert ; sous WSGI on renvoie un seul lot de
+    rattrapage et le navigateur se reconnecte après `retry`.
+    """
+    try:
+        token = request.headers.get("Last-Event-ID") or request.GET.get("since")
+        decode_token(token)
+    except ValueError:
+        token = None
+    if token is None:
+        token = encode_token(timezone.now())
+
+    if isinstance(request, ASGIRequest):
+        stream = _coverage_stream(category_code, token)
+    else:
+        token, events = await sync_to_async(_poll_coverage)(category_code, token)
+        retry = settings.LIVE_POLL_INTERVAL * 1000
+        stream = [f"retry: {retry}\n\n"] + [format_sse(e, token) for e in events]
+
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # pas de buffering côté proxy
+    return response
@@ -56,12 +56,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middleware.AdmissionControlMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.InvalidationMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
@@ -100,6 +102,9 @@ if USE_POSTGRES:
             "PASSWORD": os.getenv("DB_PASSWORD"),
             "HOST": os.getenv("DB_HOST"),
             "PORT": os.getenv("DB_PORT", "6543"),
+            # curseurs serveur (.iterator) incompatibles avec un pooler en mode transaction
+            "DISABLE_SERVER_SIDE_CURSORS": os.getenv("DB_DISABLE_SERVER_SIDE_CURSORS")
+            == "1",
         }
     }
 else:
@@ -148,6 +153,69 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# API de synchro (voir core.services.changes) : retard du jeton sur l'instant
+# de lecture, à garder au-dessus de la durée d'une transaction d'écriture (s)
+CHANGES_SAFETY_LAG = float(os.getenv("CHANGES_SAFETY_LAG", "5"))
+
+# Mises à jour en direct (SSE, servi sous ASGI)
+# Intervalle du polling en base qui rattrape les changements des autres workers
+LIVE_POLL_INTERVAL = int(os.getenv("LIVE_POLL_INTERVAL", "10"))
+# Durée max d'un flux : le navigateur se reconnecte ensuite automatiquement
+LIVE_STREAM_MAX_SECONDS = int(os.getenv("LIVE_STREAM_MAX_SECONDS", "300"))
+
+# Pages publiques en cache (rendu + variantes gzip/brotli), par version de
+# données ; durée max car les séances passées sortent des listes
+PUBLIC_PAGE_CACHE_SECONDS = int(os.getenv("PUBLIC_PAGE_CACHE_SECONDS", "300"))
+# conservation au-delà de la fraîcheur, pour servir périmé en cas de surcharge
+PUBLIC_PAGE_STALE_SECONDS = int(os.getenv("PUBLIC_PAGE_STALE_SECONDS", "3600"))
+
+# Contrôle d'admission (voir core.services.admission) : requêtes en cours
+# max par processus et par classe de vues ; attente max d'une écriture (s)
+ADMISSION_LIMITS = {
+    "read": int(os.getenv("ADMISSION_READ_LIMIT", "16")),
+    "write": int(os.getenv("ADMISSION_WRITE_LIMIT", "4")),
+}
+ADMISSION_WRITE_WAIT = float(os.getenv("ADMISSION_WRITE_WAIT", "3"))
+
+# Caches : "default" (pages publiques, flux iCalendar) dans la mémoire du
+# processus ; "shared" commun à tous les workers, en table de la base
+# (à créer par `python manage.py createcachetable` après migrate)
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "core_shared_cache",
+    },
+}
+
+# Limitation de débit des inscriptions publiques, par IP et par IP + coach
+# (voir core.services.ratelimit) : "memory" (par processus) ou "cache"
+# (partagé entre workers, dans le cache RATELIMIT_CACHE)
+RATELIMIT_BACKEND = os.getenv("RATELIMIT_BACKEND", "memory")
+RATELIMIT_CACHE = os.getenv("RATELIMIT_CACHE", "shared")
+RATELIMIT_BURST = int(os.getenv("RATELIMIT_BURST", "5"))
+RATELIMIT_PER_MINUTE = float(os.getenv("RATELIMIT_PER_MINUTE", "20"))
+# seau par IP, tous coachs confondus
+RATELIMIT_IP_BURST = int(os.getenv("RATELIMIT_IP_BURST", "20"))
+RATELIMIT_IP_PER_MINUTE = float(os.getenv("RATELIMIT_IP_PER_MINUTE", "60"))
+# derrière des reverse proxies : nombre de proxies de confiance devant l'appli.
+# L'IP client est l'entrée de X-Forwarded-For ajoutée par le plus éloigné
+# (la N-ième en partant de la droite) ; 0 : X-Forwarded-For ignoré.
+RATELIMIT_TRUSTED_PROXIES = int(os.getenv("RATELIMIT_TRUSTED_PROXIES", "0"))
+
+# Inscription d'un coach sur deux séances qui se chevauchent (voir
+# core.services.overlap) : "reject" (refusée), "warn" (signalée) ou "off"
+OVERLAP_POLICY = os.getenv("OVERLAP_POLICY", "reject")
+
+# Encadrement automatique (voir core.services.staffing) : séances max par
+# coach et par semaine, inscriptions déjà confirmées comprises
+STAFFING_MAX_PER_WEEK = int(os.getenv("STAFFING_MAX_PER_WEEK", "3"))
+
+# Bus d'invalidation des caches locaux (voir core.services.invalidation)
+# True : écoute LISTEN/NOTIFY (PostgreSQL, connexion directe sans pgbouncer en
+# mode transaction) au lieu de relire les versions à chaque requête
+INVALIDATION_LISTEN = os.getenv("INVALIDATION_LISTEN", "False") == "True"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 